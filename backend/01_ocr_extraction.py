@@ -4,24 +4,35 @@ import json
 import logging
 import time
 import re
-from difflib import SequenceMatcher
+import sqlite3
+import inspect
+from contextlib import ExitStack
 from merger import ConstitutionMerger 
+from build_state import BuildState, digest, file_digest
+from checkpoint import load_checkpoint, append_batch, compact_checkpoint
+from legacy_index import LegacyIndex
+from page_index import build_page_index, extend_pages, image_to_pdf, write_page_index
+from section_model import Section, SectionId, to_dicts
+from sequence_repair import merge_duplicates, repair_section_ids, section_key
+from similarity import SimilarityEngine
+import telemetry
 
 # --- Config ---
 from config import (
     OPENROUTER_API_KEY, 
-    TARGET_CONST_ID, 
-    IMAGE_FOLDER, 
+    OCR_BACKEND,
     LEGACY_JSON,
     IMAGES_PER_BATCH,
-    CHECKPOINT_FILE,
     OUTPUT_DIR_CLEAN,
-    FILE_CLEAN
+    SIMILARITY_THRESHOLD,
+    SIMILARITY_WORKERS,
+    TELEMETRY_ENABLED,
+    get_run_config
 )
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
 
-if not os.getenv("TYPHOON_OCR_API_KEY"):
+if OCR_BACKEND == "typhoon" and not os.getenv("TYPHOON_OCR_API_KEY"):
     logging.warning("⚠️ Warning: TYPHOON_OCR_API_KEY not found!")
 
 # --- Helper Functions ---
@@ -31,23 +42,27 @@ def convert_thai_numerals(text):
     if not text or not isinstance(text, str): return ""
     return text.translate(str.maketrans("๐๑๒๓๔๕๖๗๘๙", "0123456789"))
 
+def open_legacy_index(json_path):
+    """เปิด (หรือสร้าง) SQLite index ของ legacy JSON -> None ถ้าไม่มีไฟล์/อ่านไม่ได้"""
+    if not os.path.exists(json_path): return None
+    try:
+        return LegacyIndex(json_path)
+    except (OSError, ValueError, KeyError, TypeError, sqlite3.Error) as e:
+        logging.warning(f"⚠️ Cannot load legacy data from {json_path}: {e}")
+        return None
+
 def load_legacy_data(json_path, target_id):
-    if not os.path.exists(json_path): return {}
+    legacy_index = open_legacy_index(json_path)
+    if legacy_index is None: return {}
     try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        section_map = {}
-        if isinstance(data, list):
-            target = next((c for c in data if c.get("id") == target_id), None)
-            if target and "sections" in target:
-                for sec in target["sections"]:
-                    section_map[str(sec["id"])] = sec["content"] 
-        return section_map
-    except:
-        return {}
+        return legacy_index.section_map(target_id)
+    finally:
+        legacy_index.close()
+
+similarity_engine = SimilarityEngine()
 
-def calculate_similarity(a, b):
-    return SequenceMatcher(None, str(a), str(b)).ratio()
+def calculate_similarity(a, b, cutoff=0.0):
+    return similarity_engine.score(a, b, cutoff)
 
 def get_numeric_id(sec_id):
     try:
@@ -57,93 +72,283 @@ def get_numeric_id(sec_id):
     except:
         return None
 
-def smart_heal_sequence(items):
-    healed_items = []
-    all_numeric_ids = []
-    for item in items:
-        nid = get_numeric_id(item["id"])
-        if nid: all_numeric_ids.append(nid)
+def _split_first_intro(curr):
+    """Intro ตัวแรกสุด: ถ้ามี 'หมวด' ซ่อนอยู่ท้ายข้อความ ให้แยกออกมาเป็น Header"""
+    content = curr.get("content", "")
     
-    missing_ids = []
-    if all_numeric_ids:
-        full_range = set(range(min(all_numeric_ids), max(all_numeric_ids) + 1))
-        missing_ids = list(full_range - set(all_numeric_ids))
-        missing_ids.sort()
+    # Regex หาคำว่า "หมวด..." ที่อยู่ท้ายข้อความ
+    match = re.search(r"(หมวด\s*[๐-๙0-9]+.*?)$", content, re.DOTALL)
+    if not match:
+        # ถ้าไม่มีหมวด ก็เก็บ Intro ไว้เฉยๆ
+        return [curr]
 
-    print(f"🔍 ตรวจพบเลขที่หายไป: {missing_ids}")
+    print(f"   ✂️ แยก Header ออกจาก Intro แรก...")
+    header_text = match.group(1).strip()
+    
+    # 1. เก็บ Intro ที่ตัดแล้ว
+    curr["content"] = content[:match.start()].strip()
+    
+    # 2. สร้าง Header ใหม่แทรกเข้าไป
+    try:
+        cat_num = get_numeric_id(header_text) or 1
+    except:
+        cat_num = 1
+        
+    header_item = {
+        "id": f"header_{cat_num}", 
+        "content": header_text,
+        "type": "header",
+        "status": "OCR"
+    }
+    # provenance: header อยู่หน้าเดียวกับ intro ต่อจากข้อความที่ตัดออก
+    if "page" in curr:
+        header_item["page"] = curr["page"]
+    if "offset" in curr:
+        header_item["offset"] = curr["offset"] + match.start(1)
+    return [curr, header_item]
+
+def _join_parts(item, parts):
+    """ต่อข้อความ continuation ทั้งหมดเข้ากับ item ในครั้งเดียว"""
+    if parts:
+        item["content"] = " ".join([item["content"]] + [p.get("content", "") for p in parts])
+        for part in parts:
+            extend_pages(item, part)
+    return item
+
+def join_continuations(items):
+    """
+    รวม intro/continuation เข้ากับ item ก่อนหน้า (เก็บใน buffer แล้ว join ครั้งเดียว)
+    generator: yield item เมื่อเจอ item ถัดไปที่ไม่ใช่ continuation -> ใช้ได้ทั้งโหมดปกติและ stream
+    """
+    pending, parts = None, []
 
     # Flag เพื่อเช็คว่าเจอ Intro ตัวแรกไปหรือยัง
     first_intro_processed = False
 
-    for i in range(len(items)):
-        curr = items[i]
+    for curr in items:
         curr_id_str = str(curr.get("id", "")).strip()
-        curr_nid = get_numeric_id(curr_id_str)
         
         # Merge Intro
         is_intro = curr_id_str.lower() == "intro" or not curr_id_str
         if is_intro:
-            if healed_items and first_intro_processed: 
+            if pending is not None and first_intro_processed: 
                 # ถ้าไม่ใช่ตัวแรก ให้รวมกับตัวก่อนหน้า (Continuation)
-                print(f"   🔗 พบ intro/continuation -> รวมเข้ากับมาตรา {healed_items[-1]['id']}")
-                healed_items[-1]["content"] += " " + curr.get("content", "")
+                print(f"   🔗 พบ intro/continuation -> รวมเข้ากับมาตรา {pending['id']}")
+                parts.append(curr)
             else:
-                # FIX: ถ้าเป็น Intro ตัวแรกสุด ให้เช็คว่ามี 'หมวด' ซ่อนอยู่ไหม?
-                content = curr.get("content", "")
-                
-                # Regex หาคำว่า "หมวด..." ที่อยู่ท้ายข้อความ
-                match = re.search(r"(หมวด\s*[๐-๙0-9]+.*?)$", content, re.DOTALL)
-                
-                if match:
-                    print(f"   ✂️ แยก Header ออกจาก Intro แรก...")
-                    header_text = match.group(1).strip()
-                    intro_content = content[:match.start()].strip()
-                    
-                    # 1. เก็บ Intro ที่ตัดแล้ว
-                    curr["content"] = intro_content
-                    healed_items.append(curr)
-                    
-                    # 2. สร้าง Header ใหม่แทรกเข้าไป
-                    try:
-                        cat_num = get_numeric_id(header_text) or 1
-                    except:
-                        cat_num = 1
-                        
-                    header_item = {
-                        "id": f"header_{cat_num}", 
-                        "content": header_text,
-                        "type": "header",
-                        "status": "OCR"
-                    }
-                    healed_items.append(header_item)
-                else:
-                    # ถ้าไม่มีหมวด ก็เก็บ Intro ไว้เฉยๆ
-                    healed_items.append(curr)
-                
+                for part in _split_first_intro(curr):
+                    if pending is not None: yield _join_parts(pending, parts)
+                    pending, parts = part, []
                 first_intro_processed = True
             continue 
 
-        # Fix Sequence
-        if i + 1 < len(items):
-            next_item = items[i+1]
-            next_nid = get_numeric_id(next_item.get("id", ""))
-            
-            if curr_nid and next_nid and curr_nid > next_nid:
-                candidate_fix = next_nid - 1
-                if candidate_fix in missing_ids:
-                    print(f"   🔧 ซ่อมลำดับ: เปลี่ยน {curr_id_str} -> {candidate_fix}")
-                    curr["id"] = str(candidate_fix)
-                    if candidate_fix in missing_ids: missing_ids.remove(candidate_fix)
-
-        healed_items.append(curr)
+        if pending is not None: yield _join_parts(pending, parts)
+        pending, parts = curr, []
+
+    if pending is not None: yield _join_parts(pending, parts)
+
+def repair_sequence(healed_items):
+    """ซ่อมเลขมาตราด้วย LIS ทั้งเอกสาร (sequence_repair.repair_section_ids) ต้องมีครบทุก section ก่อน"""
+    fixes, missing_ids = repair_section_ids(healed_items)
+    print(f"🔍 ตรวจพบเลขที่หายไป: {missing_ids}")
+    for old_id, new_id in fixes:
+        print(f"   🔧 ซ่อมลำดับ: เปลี่ยน {old_id} -> {new_id}")
     return healed_items
 
-def main():
-    target_folder = os.path.join(IMAGE_FOLDER, TARGET_CONST_ID)
-    if not os.path.exists(target_folder): return print("❌ Folder not found")
+def smart_heal_sequence(items):
+    """
+    1. รวม intro/continuation เข้ากับ item ก่อนหน้า (join_continuations)
+    2. ซ่อมเลขมาตราด้วย LIS (repair_sequence)
+    """
+    return repair_sequence(list(join_continuations(items)))
+
+def merge_and_compare(healed_sequence, legacy_map, legacy_index=None, const_id=None):
+    """Phase 2-3 หลัง heal (ทั้งโหมดปกติและ stream): รวม ID ซ้ำ -> เรียง -> เทียบ legacy -> list สุดท้าย"""
+    with telemetry.span("merge_sort"):
+        final_list = merge_duplicates(healed_sequence)
+        final_list.sort(key=section_sort_key)
+
+    # --- 🔥 PHASE 3: FINAL CLEANUP & COMPARISON ---
+    print("\n🧹 Converting Numerals & Comparing Legacy...")
+    
+    with telemetry.span("similarity", items=len(final_list)):
+        finalize_sections(final_list, legacy_map)
+    with telemetry.span("match_misnumbered"):
+        matched = match_misnumbered(final_list, legacy_map, legacy_index, const_id)
+    if matched:
+        print(f"   🧩 จับคู่ legacy จากข้อความได้เพิ่ม {matched} มาตรา")
+    return final_list
+
+# --- Streaming Mode ---
+# join_continuations ทำงานทันทีที่หน้านั้น OCR เสร็จ ส่วนซ่อมเลข/รวม/เทียบ legacy ต้องเห็นทั้งเอกสาร
+# -> ทำครั้งเดียวตอนจบด้วยฟังก์ชันเดียวกับโหมดปกติ (ผลเหมือนกันทุก byte)
+
+def run_streaming(batch_stream, legacy_map, file_clean, legacy_index=None, const_id=None):
+    """
+    Stream: heal ทีละ batch และเขียน section ที่ต่อ continuation แล้วลง <clean>.partial.jsonl ทันที
+    (ดูผลบางส่วนได้ระหว่างรัน เลขมาตรายังไม่ได้ซ่อม) แล้วค่อยซ่อมเลข + เทียบ legacy ทั้งเอกสารตอนจบ
+    """
+    def raw_sections():
+        for batch_sections in batch_stream:
+            yield from (Section.from_dict(item) for item in batch_sections)
+
+    os.makedirs(OUTPUT_DIR_CLEAN, exist_ok=True)
+    partial_path = file_clean + ".partial.jsonl"
+    healed_sequence = []
+    with open(partial_path, "w", encoding="utf-8") as f:
+        for item in join_continuations(raw_sections()):
+            healed_sequence.append(item)
+            f.write(json.dumps(to_dicts([item])[0], ensure_ascii=False) + "\n")
+            f.flush()
+    print(f"   📝 Streamed {len(healed_sequence)} sections -> {partial_path}")
+
+    with telemetry.span("heal", items=len(healed_sequence)):
+        repair_sequence(healed_sequence)
+    final_list = merge_and_compare(healed_sequence, legacy_map, legacy_index, const_id)
+    with open(file_clean, "w", encoding="utf-8") as f:
+        json.dump(to_dicts(final_list), f, ensure_ascii=False, indent=2)
+    os.remove(partial_path)
+    return final_list
+
+def section_sort_key(x):
+    """Intro บนสุด -> header_N -> มาตรา (44 < 44/1) -> header_after_N (ดู section_model.SectionId)"""
+    sid = getattr(x, "sid", None)  # Section parse id ไว้แล้ว, dict parse ตอนนี้
+    return (sid or SectionId.of(str(x["id"]))).key
+
+def finalize_section(item, legacy_map, sim=None, cutoff=SIMILARITY_THRESHOLD):
+    """
+    Phase 3 ของ 1 section: แปลงเลขไทย + เทียบกับ Legacy (sim = คะแนนที่คำนวณไว้แล้วด้วย cutoff เดียวกัน)
+    cutoff ใช้ตัดสิน VERIFIED อย่างเดียว: คู่ที่ไม่ถึง (score คืน 0.0) คำนวณใหม่แบบไม่มี cutoff
+    -> "similarity" ของ REVIEW_NEEDED เป็นคะแนนจริงที่ผู้ตรวจดูบนหน้าเว็บ
+    """
+    sec_id = str(item["id"])
+    
+    item["content"] = convert_thai_numerals(item["content"])
+    
+    ocr_content = item["content"]
+    item["status"] = "OCR_ONLY"
+    item["similarity"] = 0.0
+    
+    if sec_id in legacy_map:
+        legacy_content = legacy_map[sec_id]
+        if sim is None:
+            sim = calculate_similarity(ocr_content, legacy_content, cutoff)
+        if sim < cutoff:
+            sim = calculate_similarity(ocr_content, legacy_content)
+        
+        item["similarity"] = round(sim, 4)
+        item["diff_versions"] = {
+            "ai_ocr": ocr_content,
+            "legacy_json": legacy_content
+        }
+        
+        if sim > SIMILARITY_THRESHOLD:
+            item["status"] = "VERIFIED"
+        else:
+            item["status"] = "REVIEW_NEEDED"
+    return item
+
+def finalize_sections(items, legacy_map, workers=SIMILARITY_WORKERS):
+    """finalize_section ทั้งเอกสาร (workers > 1 = คำนวณ similarity ด้วย process pool)"""
+    if workers <= 1:
+        for item in items:
+            finalize_section(item, legacy_map)
+        return items
+
+    compared = [item for item in items if str(item["id"]) in legacy_map]
+    pairs = [(convert_thai_numerals(item["content"]), legacy_map[str(item["id"])]) for item in compared]
+    scores = similarity_engine.score_pairs(pairs, SIMILARITY_THRESHOLD, workers)
+    # ไม่ถึง threshold -> คะแนนจริงแบบไม่มี cutoff (ใน pool เดียวกัน ไม่ต้องคำนวณทีละคู่ใน finalize_section)
+    below = [i for i, sim in enumerate(scores) if sim < SIMILARITY_THRESHOLD]
+    for i, sim in zip(below, similarity_engine.score_pairs([pairs[i] for i in below], 0.0, workers)):
+        scores[i] = sim
+    scores = dict(zip(map(id, compared), scores))
+    for item in items:
+        finalize_section(item, legacy_map, scores.get(id(item)), cutoff=0.0)
+    return items
+
+def match_misnumbered(items, legacy_map, legacy_index, const_id):
+    """
+    section ที่ยังไม่ VERIFIED (ไม่มีเลขตรงใน legacy หรือ OCR ได้เลขผิด)
+    -> หา legacy section ที่ข้อความใกล้เคียงด้วย MinHash แล้วเทียบจริงเฉพาะ candidate
+    เจอคู่ที่ผ่าน threshold -> VERIFIED + "legacy_id" = เลขมาตราใน legacy ที่จับคู่ได้
+    """
+    if legacy_index is None or not legacy_map: return 0
+    claimed = {str(item["id"]) for item in items if item["status"] == "VERIFIED"}
+    matched = 0
+    for item in items:
+        if item["status"] == "VERIFIED" or section_key(item["id"]) is None: continue
+        best_id, best_sim = None, SIMILARITY_THRESHOLD
+        for legacy_id in legacy_index.candidates(const_id, item["content"]):
+            if legacy_id in claimed: continue
+            sim = similarity_engine.score(item["content"], legacy_map[legacy_id], cutoff=best_sim)
+            if sim > best_sim:
+                best_id, best_sim = legacy_id, sim
+        if best_id is None: continue
+
+        print(f"   🧩 มาตรา {item['id']} ตรงกับ legacy มาตรา {best_id} ({best_sim:.2f})")
+        claimed.add(best_id)
+        item["legacy_id"] = best_id
+        item["similarity"] = round(best_sim, 4)
+        item["diff_versions"] = {
+            "ai_ocr": item["content"],
+            "legacy_json": legacy_map[best_id]
+        }
+        item["status"] = "VERIFIED"
+        matched += 1
+    return matched
+
+def save_page_index(final_list, run_cfg, image_count, exact_pages=True, complete=True):
+    """
+    json_output/pages/<id>.json จาก provenance (page = ลำดับรูป แปลงเป็นหน้า PDF ผ่าน image_pages.json)
+    คงตารางเดิมไว้ถ้าเลขหน้าไม่แน่นอน: section จาก checkpoint เก่าไม่มี page, backend เดาจุดตัดหน้า (replay),
+    OCR ไม่ครบทุก batch หรือยังไม่มี map รูป -> หน้า PDF ของฉบับนี้
+    """
+    keep = f"คง {run_cfg.file_pages} เดิมไว้"
+    if not exact_pages:
+        return print(f"   ⏩ OCR backend ไม่ได้อ่านทีละหน้าจริง (เลขหน้าเป็นค่าประมาณ): {keep}")
+    if not complete:
+        return print(f"   ⏩ OCR ไม่ครบทุก batch: {keep}")
+    if not final_list or not all("page" in item for item in final_list):
+        return print(f"   ⏩ Checkpoint ไม่มีเลขหน้าครบทุก section: {keep}")
+    try:
+        to_pdf, pdf_pages = image_to_pdf(run_cfg.const_id, image_count)
+    except ValueError as e:
+        return print(f"   ⏩ {e}: {keep}")
+    index = build_page_index(final_list, run_cfg.const_id, pdf_pages, to_pdf)
+    write_page_index(index, os.path.dirname(run_cfg.file_pages))
+    print(f"   📄 Page index -> {run_cfg.file_pages}")
+
+def _clean_key(batch_digests, legacy_map):
+    """key ของ stage1/clean: ผล OCR ทุก batch + legacy + โค้ด/ค่าที่ใช้ heal, merge, compare"""
+    modules = [__file__] + [inspect.getsourcefile(obj) for obj in (merge_duplicates, SimilarityEngine, LegacyIndex)]
+    code = [file_digest(path) for path in modules]
+    return digest(sorted(batch_digests.items()), legacy_map, code, similarity_engine.metric, SIMILARITY_THRESHOLD)
+
+def main(run_cfg=None):
+    run_cfg = run_cfg or get_run_config()
+    # จับเวลาแต่ละ phase + ทุก request OCR -> telemetry/<id>_stage1.* (ดู telemetry.py)
+    # ExitStack: ปิด SQLite ของ legacy index ทุกทางออก (run_all รันหลายฉบับใน process เดียวกัน)
+    with telemetry.run(run_cfg.const_id, "stage1", enabled=TELEMETRY_ENABLED and not run_cfg.dry_run), \
+            ExitStack() as cleanup:
+        return _run_stage(run_cfg, cleanup)
+
+def _run_stage(run_cfg, cleanup):
+    checkpoint_file = run_cfg.checkpoint_file
+    checkpoint_journal = run_cfg.checkpoint_journal
+    file_clean = run_cfg.file_clean
+
+    target_folder = run_cfg.image_folder
+    if not os.path.exists(target_folder):
+        # raise (ไม่ใช่แค่ print) -> run_all.py นับเป็นฉบับที่ล้มเหลว
+        raise FileNotFoundError(f"Image folder not found: {target_folder}")
     
-    # 1. โหลด Legacy Data
-    legacy_map = load_legacy_data(LEGACY_JSON, TARGET_CONST_ID)
+    # 1. โหลด Legacy Data (จาก SQLite index)
+    with telemetry.span("legacy_load"):
+        legacy_index = open_legacy_index(LEGACY_JSON)
+        if legacy_index is not None:
+            cleanup.callback(legacy_index.close)
+        legacy_map = legacy_index.section_map(run_cfg.const_id) if legacy_index else {}
     print(f"📚 Loaded Legacy Data: {len(legacy_map)} sections found.")
 
     # 2. OCR Pipeline
@@ -152,105 +357,164 @@ def main():
         key=lambda x: int("".join(filter(str.isdigit, os.path.basename(x))) or 0)
     )
     
-    processed_batches = {} 
-    if os.path.exists(CHECKPOINT_FILE):
-        print(f"🔄 Resuming from {CHECKPOINT_FILE}...")
-        with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            processed_batches = {int(k): v for k, v in data.items()}
+    processed_batches = {}
+    if run_cfg.use_checkpoint:
+        processed_batches = load_checkpoint(checkpoint_file, checkpoint_journal)
+    if processed_batches:
+        print(f"🔄 Resuming from {checkpoint_journal} ({len(processed_batches)} batches)...")
 
     image_batches = [image_files[i:i + IMAGES_PER_BATCH] for i in range(0, len(image_files), IMAGES_PER_BATCH)]
-    merger = ConstitutionMerger()
+    merger = ConstitutionMerger(run_cfg.ocr_concurrency, run_cfg.ocr_rate_limit)
 
+    # Build state: batch ที่รูปเปลี่ยน (hash ไม่ตรง) ต้อง OCR ใหม่แม้จะมีใน checkpoint แล้ว
+    build = BuildState(run_cfg.const_id, dry_run=run_cfg.dry_run, force=run_cfg.force)
+    batch_keys = {idx + 1: digest([file_digest(p) for p in paths]) for idx, paths in enumerate(image_batches)}
+    if batch_keys:
+        for batch_num in set(processed_batches) - set(batch_keys):
+            del processed_batches[batch_num]  # รูปถูกลบ / IMAGES_PER_BATCH เปลี่ยน
+        build.drop("stage1/batch/", keep={f"stage1/batch/{n}" for n in batch_keys})
+
+    pending = []
     for idx, batch_paths in enumerate(image_batches):
         batch_num = idx + 1
+        node = f"stage1/batch/{batch_num}"
         if batch_num in processed_batches:
-            print(f"⏩ Skipping Batch {batch_num} (Done)")
-            continue
-
-        print(f"⚡ Processing Batch {batch_num}...")
-        try:
-            result = merger.process_batch_images(batch_paths, []) 
-            processed_batches[batch_num] = result
-            with open(CHECKPOINT_FILE, "w", encoding="utf-8") as f:
-                json.dump(processed_batches, f, ensure_ascii=False, indent=2)
-            print(f"   ✅ Batch {batch_num} Saved.")
-        except Exception as e:
-            print(f"   ❌ Error Batch {batch_num}: {e}")
+            if build.get(node, "key") is None and not build.force:
+                # checkpoint จากก่อนมี build state: ถือว่าเป็นผลของรูปชุดนี้ (จำ hash ไว้เทียบรอบหน้า)
+                build.record(node, batch_keys[batch_num])
+            if build.check(node, batch_keys[batch_num], "images changed"):
+                print(f"⏩ Skipping Batch {batch_num} (Done)")
+                continue
+        else:
+            build.check(node, batch_keys[batch_num], "not OCR'd yet")
+        pending.append((batch_num, batch_paths))
+
+    if pending:
+        build.check("stage1/clean", None, "batches changed")
+    elif run_cfg.use_checkpoint:
+        clean_key = _clean_key({n: digest(s) for n, s in processed_batches.items()}, legacy_map)
+        if build.check("stage1/clean", clean_key, output=file_digest(file_clean)) and not run_cfg.dry_run:
+            build.save()
+            return print(f"✅ {file_clean} is up to date (no inputs changed)")
+    build.report("stage1")
+    if run_cfg.dry_run: return
+
+    first_pages = [(batch_num - 1) * IMAGES_PER_BATCH + 1 for batch_num, _ in pending]
+    if pending:
+        print(f"⚡ Processing {len(pending)} Batches (concurrency={merger.concurrency})...")
+        if merger.cache:
+            pending_pages = [p for _, paths in pending for p in paths]
+            cached_pages = sum(1 for p in pending_pages if merger.cache.has(p))
+            print(f"   ♻️ {cached_pages}/{len(pending_pages)} pages already in OCR cache")
+
+    if run_cfg.stream:
+        print("\n🌊 Streaming Mode: OCR -> Heal -> Compare ต่อเนื่องทีละ batch")
+
+        batch_digests = {}
+
+        def batch_stream():
+            results = merger.process_batches([paths for _, paths in pending], first_pages)
+            pending_nums = {num for num, _ in pending}
+            failed = False
+            for batch_num in sorted(set(processed_batches) | pending_nums):
+                if batch_num in pending_nums:
+                    if failed: continue
+                    try:
+                        _, result = next(results)
+                        if run_cfg.use_checkpoint:
+                            append_batch(checkpoint_journal, batch_num, result)
+                            build.record(f"stage1/batch/{batch_num}", batch_keys[batch_num])
+                            print(f"   ✅ Batch {batch_num} Saved.")
+                    except Exception as e:
+                        # เหมือนโหมดปกติ: ไปต่อด้วย batch ที่ได้แล้ว (batch ที่เหลือ OCR ใหม่รอบหน้า)
+                        print(f"   ❌ Error Batch: {e}")
+                        failed = True
+                        continue
+                else:
+                    # pop -> ไม่ถือข้อมูลทุก batch ไว้ใน memory
+                    result = processed_batches.pop(batch_num)
+                batch_digests[batch_num] = digest(result)
+                yield result
+            if pending:
+                if not failed:
+                    next(results, None)  # ปิด thread pool + log throughput
+                if run_cfg.use_checkpoint:
+                    compact_checkpoint(checkpoint_file, checkpoint_journal)
+
+        with telemetry.span("stream"):
+            final_list = run_streaming(batch_stream(), legacy_map, file_clean, legacy_index, run_cfg.const_id)
+        save_page_index(final_list, run_cfg, len(image_files), merger.backend.exact_pages,
+                        complete=set(batch_digests) == set(batch_keys))
+        if run_cfg.use_checkpoint:
+            build.record("stage1/clean", _clean_key(batch_digests, legacy_map), output=file_digest(file_clean))
+            build.save()
+        return print(f"\n🎉 DONE! Saved {len(final_list)} sections to {file_clean}")
+
+    if pending:
+        with telemetry.span("ocr", pages=sum(len(paths) for _, paths in pending)):
+            try:
+                # OCR ทุก batch ที่ค้างพร้อมกัน แต่ save checkpoint ตามลำดับ batch
+                results = merger.process_batches([paths for _, paths in pending], first_pages)
+                for i, result in results:
+                    batch_num = pending[i][0]
+                    processed_batches[batch_num] = result
+                    if run_cfg.use_checkpoint:
+                        append_batch(checkpoint_journal, batch_num, result)
+                        build.record(f"stage1/batch/{batch_num}", batch_keys[batch_num])
+                        print(f"   ✅ Batch {batch_num} Saved.")
+            except Exception as e:
+                print(f"   ❌ Error Batch: {e}")
+            if run_cfg.use_checkpoint:
+                # รวม journal ให้เหลือ 1 บรรทัดต่อ batch (เขียนครั้งเดียวตอนจบ)
+                compact_checkpoint(checkpoint_file, checkpoint_journal)
 
     # --- 🔥 PHASE 2: SMART MERGE ---
     print("\n🧠 Starting Smart Merge & Heal Sequence...")
+    batch_digests = {n: digest(s) for n, s in processed_batches.items()}  # ก่อน heal (heal แก้ dict ในที่)
+    # Section (__slots__) แทน dict -> เล็กกว่า + key สำหรับเรียงคำนวณครั้งเดียว (ดู section_model.py)
     raw_sequence = []
     for b_num in sorted(processed_batches.keys()):
-        raw_sequence.extend(processed_batches[b_num])
+        raw_sequence.extend(Section.from_dict(item) for item in processed_batches[b_num])
 
-    healed_sequence = smart_heal_sequence(raw_sequence)
+    with telemetry.span("heal", items=len(raw_sequence)):
+        healed_sequence = smart_heal_sequence(raw_sequence)
 
-    final_dict = {}
-    for item in healed_sequence:
-        sec_id = str(item["id"])
-        if sec_id in final_dict:
-            if not sec_id.startswith("header_"):
-                final_dict[sec_id]["content"] += " " + item["content"]
-        else:
-            final_dict[sec_id] = item
+    final_list = merge_and_compare(healed_sequence, legacy_map, legacy_index, run_cfg.const_id)
 
-    final_list = list(final_dict.values())
+    with telemetry.span("write"):
+        os.makedirs(OUTPUT_DIR_CLEAN, exist_ok=True)
+        with open(file_clean, "w", encoding="utf-8") as f:
+            json.dump(to_dicts(final_list), f, ensure_ascii=False, indent=2)
+        save_page_index(final_list, run_cfg, len(image_files), merger.backend.exact_pages,
+                        complete=set(processed_batches) == set(batch_keys))
+    if run_cfg.use_checkpoint:
+        build.record("stage1/clean", _clean_key(batch_digests, legacy_map), output=file_digest(file_clean))
+        build.save()
     
-    def sort_key(x):
-        s = str(x["id"])
-        
-        # Intro อยู่บนสุด
-        if s.lower() == "intro": return -1.0
-        
-        # Header แทรกกลาง (header_after_7 -> 7.5)
-        if s.startswith("header_after_"):
-            try: return float(s.replace("header_after_", "")) + 0.5 
-            except: return 9999.5 
-        
-        # Header ปกติ (header_1 -> 0.9)
-        if s.startswith("header_"): 
-            try: return float(s.replace("header_", "")) - 0.1
-            except: return 0
-            
-        # มาตราปกติ
-        try: return float(s)
-        except: return 9999
+    print(f"\n🎉 DONE! Saved {len(final_list)} sections to {file_clean}")
 
-    final_list.sort(key=sort_key)
-
-    # --- 🔥 PHASE 3: FINAL CLEANUP & COMPARISON ---
-    print("\n🧹 Converting Numerals & Comparing Legacy...")
-    
-    for item in final_list:
-        sec_id = str(item["id"])
-        
-        item["content"] = convert_thai_numerals(item["content"])
-        
-        ocr_content = item["content"]
-        item["status"] = "OCR_ONLY"
-        item["similarity"] = 0.0
-        
-        if sec_id in legacy_map:
-            legacy_content = legacy_map[sec_id]
-            sim = calculate_similarity(ocr_content, legacy_content)
-            
-            item["similarity"] = round(sim, 4)
-            item["diff_versions"] = {
-                "ai_ocr": ocr_content,
-                "legacy_json": legacy_content
-            }
-            
-            if sim > 0.85:
-                item["status"] = "VERIFIED"
-            else:
-                item["status"] = "REVIEW_NEEDED"
+if __name__ == "__main__":
+    import argparse
 
-    os.makedirs(OUTPUT_DIR_CLEAN, exist_ok=True)
-    with open(FILE_CLEAN, "w", encoding="utf-8") as f:
-        json.dump(final_list, f, ensure_ascii=False, indent=2)
-    
-    print(f"\n🎉 DONE! Saved {len(final_list)} sections to {FILE_CLEAN}")
+    parser = argparse.ArgumentParser(description="Stage 1: OCR & Cleanup")
+    parser.add_argument("const_id", nargs="?", help="constitution ID (default: TARGET_CONST_ID)")
+    parser.add_argument("--stream", action="store_true", help="stream pages through heal/compare as they finish")
+    parser.add_argument("--no-checkpoint", action="store_true", help="ignore and do not write checkpoints")
+    parser.add_argument("--profile", action="store_true", help="run under cProfile and print the hot functions")
+    parser.add_argument("--dry-run", action="store_true", help="show which batches/outputs would be rebuilt and exit")
+    parser.add_argument("--force", action="store_true", help="rebuild everything, ignoring the build state")
+    args = parser.parse_args()
 
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+    run_cfg = get_run_config(args.const_id)
+    run_cfg.stream = args.stream
+    run_cfg.use_checkpoint = not args.no_checkpoint
+    run_cfg.dry_run = args.dry_run
+    run_cfg.force = args.force
+    try:
+        if args.profile:
+            with telemetry.profiled(run_cfg.const_id, "stage1"):
+                main(run_cfg)
+        else:
+            main(run_cfg)
+    except FileNotFoundError as e:
+        raise SystemExit(f"❌ {e}")
\ No newline at end of file
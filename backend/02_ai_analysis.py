@@ -1,19 +1,28 @@
 import os
 import json
 import logging
-import time
 import re
-from google import genai
-from google.genai import types
 
 from agents import AgentSummarizer
+from build_state import BuildState, digest, file_digest, source_digest
+from compact_output import write_compact
+from header_resolver import HEADER_TABLE_FILE, HeaderResolver, normalize_header
+from llm_cache import shared_cache
+from llm_json import category_id, generate_json_text, salvage_object
+from llm_scheduler import PRIORITY_HIGH, LLMRequestError, shared_scheduler
+from section_model import load_sections, to_dicts
+import telemetry
 from config import (
     GOOGLE_API_KEY, 
     CATEGORIES,
-    TARGET_CONST_ID,
+    LLM_MAX_RETRIES,
     OUTPUT_DIR_FINAL,
-    FILE_CLEAN,
-    FILE_FINAL_SUMMARY
+    SUMMARY_MODE,
+    SUMMARY_TOKEN_BUDGET,
+    COMPACT_OUTPUT,
+    HEADER_MATCH_THRESHOLD,
+    TELEMETRY_ENABLED,
+    get_run_config
 )
 
 # Setup Logging
@@ -24,46 +33,16 @@ logging.basicConfig(
 if not GOOGLE_API_KEY:
     raise ValueError("❌ GOOGLE_API_KEY is missing!")
 
-# Init Google Client
-client = genai.Client(api_key=GOOGLE_API_KEY)
+HEADER_MODEL = "gemma-3-27b-it"
 
 
 # --- AI Helper Functions ---
 
-def _clean_json_text(text):
-    """ฟังก์ชันช่วยแกะ JSON สำหรับโมเดลที่ไม่รองรับ JSON Mode"""
-    text = text.strip()
-    # 1. ลบ Markdown ```json ... ```
-    if text.startswith("```"):
-        lines = text.split("\n")
-        if lines[0].strip().startswith("```"):
-            lines = lines[1:]
-        if lines[-1].strip().startswith("```"):
-            lines = lines[:-1]
-        text = "\n".join(lines)
-    
-    # 2. ลองหาปีกกาเปิด-ปิดตัวแรกและตัวสุดท้าย (เผื่อมี text นำหน้า/ตามหลัง)
-    start = text.find("{")
-    end = text.rfind("}")
-    if start != -1 and end != -1:
-        text = text[start : end + 1]
-    
-    return text
-
-def get_ai_header_mapping(headers_list):
-    """
-    ใช้ Gemma-3-27b-it ช่วย Map Header
-    (เน้น Prompt Engineering แทน Config JSON)
-    """
-    if not headers_list:
-        return {}
-
-    logging.info(f"🤖 Asking Gemma-3 to map {len(headers_list)} headers...")
-    
+def _header_prompt(headers_list):
     cats_text = "\n".join([f"- {k}: {v}" for k, v in CATEGORIES.items()])
     headers_text = "\n".join([f"- {h}" for h in headers_list])
 
-    prompt = f"""
+    return f"""
     You are a Thai Constitutional Law Expert.
     Task: Map the input headers (some are archaic/historical) to the standard category IDs.
     
@@ -82,30 +61,96 @@ def get_ai_header_mapping(headers_list):
     3. Format: {{ "Input Header Text": "category_id" }}
     """
 
-    for attempt in range(3):
-        try:
-            response = client.models.generate_content(
-                model="gemma-3-27b-it", 
-                contents=prompt,
+def _parse_header_map(text, headers_list):
+    """
+    {header ที่ขอ: category_id} จาก response (Gemma ไม่มี JSON mode -> llm_json.salvage_object)
+    entry ที่ category_id ไม่อยู่ใน CATEGORIES หรือ JSON เสีย ถูกทิ้งทีละ entry
+    LLM อาจคืน key ที่ตัดช่องว่าง/markdown ไปแล้ว -> เทียบด้วยชื่อที่ normalize
+    """
+    ai_map = salvage_object(text, category_id).valid
+    by_title = {normalize_header(k): v for k, v in ai_map.items()}
+    mapping = {}
+    for header in headers_list:
+        cat_id = ai_map.get(header) or by_title.get(normalize_header(header))
+        if cat_id:
+            mapping[header] = cat_id
+    return mapping
+
+def get_ai_header_mapping(headers_list):
+    """
+    ใช้ Gemma-3-27b-it ช่วย Map Header
+    (เน้น Prompt Engineering แทน Config JSON)
+    header ที่ไม่ได้คำตอบ/คำตอบไม่ผ่าน -> ถามใหม่เฉพาะ header เหล่านั้น (สูงสุด LLM_MAX_RETRIES รอบ)
+    """
+    mapping = {}
+    remaining = list(headers_list)
+    for _ in range(LLM_MAX_RETRIES):
+        if not remaining:
+            break
+        logging.info(f"🤖 Asking Gemma-3 to map {len(remaining)} headers...")
+        prompt = _header_prompt(remaining)
+
+        def parse(text, expected=tuple(remaining)):
+            return _parse_header_map(text, expected)
+
+        def generate(prompt=prompt):
+            # header mapping บล็อกการจัดกลุ่มทั้งฉบับ -> ลัดคิวก่อน request สรุป
+            return shared_scheduler().request(
+                HEADER_MODEL,
+                lambda: generate_json_text(HEADER_MODEL, prompt, json_mode=False, label="header mapping"),
+                validate=parse, priority=PRIORITY_HIGH, label="header mapping",
             )
-            
-            # Clean & Parse
-            raw_text = response.text
-            clean_text = _clean_json_text(raw_text)
-            mapping = json.loads(clean_text)
-            
-            logging.info(f"✅ Gemma-3 Mapping Success! (Mapped {len(mapping)} items)")
-            return mapping
-            
-        except Exception as e:
-            logging.warning(f"⚠️ Mapping Failed (Attempt {attempt+1}): {e}")
-            time.sleep(2)
-    
-    return {} # Fallback
 
-def group_sections_with_smart_mapping(sections):
+        try:
+            # Clean & Parse (ผ่าน cache: header ชุดเดิม = ไม่เรียก API ซ้ำ)
+            got = shared_cache().fetch(HEADER_MODEL, prompt, generate, parse)
+        except LLMRequestError as e:
+            logging.warning(f"⚠️ Mapping Failed: {e}")
+            break # Fallback: header ที่เหลือไม่มีหมวด
+        mapping.update(got)
+        remaining = [h for h in remaining if h not in mapping]
+        logging.info(f"✅ Gemma-3 Mapping Success! (Mapped {len(got)} items, {len(remaining)} left)")
+
+    return mapping
+
+def get_header_mapping(headers_list):
+    """
+    Header -> CategoryID: ตาราง + ความใกล้เคียงในเครื่องก่อน (header_resolver.py)
+    ส่งให้ LLM เฉพาะ header ที่ยังไม่มั่นใจ (request เดียว ถ้าคำตอบครบ)
     """
-    จัดกลุ่มโดยใช้ AI Mapping
+    mapping, unresolved, sources = HeaderResolver().resolve_all(headers_list)
+    logging.info(
+        f"🗂️ Header map: {sources['table']} from table, {sources['similar']} by similarity, "
+        f"{len(unresolved)} need AI"
+    )
+    if unresolved:
+        mapping.update(get_ai_header_mapping(unresolved))
+    return mapping
+
+def mapped_headers(headers_list, build=None):
+    """
+    get_header_mapping ผ่าน build state: header ชุดเดิม + ตาราง/CATEGORIES/prompt/โมเดลเดิม -> ใช้ map เดิม
+    dry run: ไม่ถาม LLM (header ที่ไม่รู้จัก -> general ในการประมาณว่าหมวดไหนจะเปลี่ยน)
+    """
+    if build is None:
+        return get_header_mapping(headers_list)
+    node = "stage2/header_map"
+    key = digest(headers_list, file_digest(HEADER_TABLE_FILE), CATEGORIES, HEADER_MATCH_THRESHOLD, HEADER_MODEL,
+                 source_digest(HeaderResolver, normalize_header, _header_prompt, _parse_header_map))
+    if build.check(node, key):
+        return build.get(node, "mapping")
+    if build.dry_run:
+        mapping, unresolved, _ = HeaderResolver().resolve_all(headers_list)
+        print(f"   ℹ️ {len(unresolved)} headers would be sent to the LLM (dry run maps them to general)")
+        return mapping
+    mapping = get_header_mapping(headers_list)
+    if len(mapping) == len(headers_list):  # LLM ตอบไม่ครบ -> ไม่จำ รอบหน้าถามใหม่
+        build.record(node, key, mapping=mapping)
+    return mapping
+
+def group_sections_with_smart_mapping(sections, build=None):
+    """
+    จัดกลุ่มโดยใช้ AI Mapping (build: BuildState -> ใช้ header map เดิมถ้า input ไม่เปลี่ยน)
     """
     # 1. ดึง Header ทั้งหมดออกมา
     headers_found = []
@@ -113,9 +158,10 @@ def group_sections_with_smart_mapping(sections):
         if item.get("type") == "header" or str(item["id"]).startswith("header_"):
             headers_found.append(item["content"])
     
-    # 2. ให้ AI สร้าง Map (Header -> CategoryID)
-    unique_headers = list(set(headers_found))
-    header_map = get_ai_header_mapping(unique_headers)
+    # 2. สร้าง Map (Header -> CategoryID) ในเครื่อง + AI เฉพาะที่ไม่รู้จัก
+    unique_headers = sorted(set(headers_found))  # ลำดับคงที่ -> prompt เดิม -> ใช้ LLM cache ได้
+    with telemetry.span("header_map", headers=len(unique_headers)):
+        header_map = mapped_headers(unique_headers, build)
     
     # 3. จัดกลุ่มข้อมูล
     grouped_sections = []
@@ -124,7 +170,7 @@ def group_sections_with_smart_mapping(sections):
     summary_groups = { k: [] for k in CATEGORIES.keys() } 
     raw_groups = { k: [] for k in CATEGORIES.keys() }
 
-    logging.info("⚡ Grouping sections using AI Map...")
+    logging.info("⚡ Grouping sections using Header Map...")
 
     for item in sections:
         # ถ้าเจอ Header -> เปลี่ยนหมวดตามที่ AI บอก
@@ -134,7 +180,7 @@ def group_sections_with_smart_mapping(sections):
             new_cat = header_map.get(h_text, "general")
             
             current_cat_id = new_cat
-            logging.info(f"   📌 Header: '{h_text}' -> AI mapped to: {current_cat_id}")
+            logging.info(f"   📌 Header: '{h_text}' -> mapped to: {current_cat_id}")
             continue 
             
         # ถ้าเป็น Intro
@@ -159,15 +205,43 @@ def group_sections_with_smart_mapping(sections):
     return grouped_sections, summary_groups, raw_groups
 
 
-def generate_summaries_from_data(grouped_content, raw_groups, year, output_path):
+def summary_key(cat_id, lines, summarizer):
+    """key ของ stage2/category/<id>: มาตราในหมวด + ชื่อหมวด + prompt/โมเดล/วิธีสรุป"""
+    return digest(lines, cat_id, CATEGORIES.get(cat_id, cat_id), summarizer.model_name, SUMMARY_MODE,
+                  SUMMARY_TOKEN_BUDGET, source_digest(AgentSummarizer))
+
+def generate_summaries_from_data(grouped_content, raw_groups, year, output_path, compact_dir=None, const_id=None,
+                                 build=None):
     """
     Step 2: สรุปเนื้อหา (ใช้ AgentSummarizer)
+    compact_dir: เขียนแบบ compact (shard ต่อหมวด + .gz/.br, ดู compact_output.py) ไว้ที่นี่ด้วย
+    build: BuildState -> สรุปใหม่เฉพาะหมวดที่มาตรา/prompt/โมเดลเปลี่ยน (dry run = แค่บอกว่าหมวดไหน)
     """
     summarizer = AgentSummarizer()
-    logging.info(f"⚡ Generating AI Summaries...")
-    
     active_groups = {k: v for k, v in grouped_content.items() if v}
-    ai_results = summarizer.run_batch(active_groups)
+
+    ai_results = {}
+    if build is not None:
+        keys = {cat_id: summary_key(cat_id, lines, summarizer) for cat_id, lines in active_groups.items()}
+        for cat_id, key in keys.items():
+            if build.check(f"stage2/category/{cat_id}", key):
+                ai_results[cat_id] = build.get(f"stage2/category/{cat_id}", "result")
+        build.drop("stage2/category/", keep={f"stage2/category/{cat_id}" for cat_id in keys})
+        if build.dry_run: return
+
+    todo = {k: v for k, v in active_groups.items() if k not in ai_results}
+    logging.info(f"⚡ Generating AI Summaries ({len(todo)} categories, {len(ai_results)} unchanged)...")
+    if todo:
+        if SUMMARY_MODE == "batch":
+            got = summarizer.run_batch(todo)
+        else:
+            got = summarizer.run_concurrent(todo)
+        ai_results.update(got)
+        if build is not None:
+            for cat_id, result in got.items():
+                # ผลแบบต่อส่วน (รวมผลไม่สำเร็จ) ไม่จดใน build state -> รอบหน้าลองสรุปใหม่
+                if cat_id in getattr(summarizer, "unmerged", ()): continue
+                build.record(f"stage2/category/{cat_id}", keys[cat_id], result=result)
 
     final_output = []
     for cat_id in CATEGORIES.keys():
@@ -183,37 +257,82 @@ def generate_summaries_from_data(grouped_content, raw_groups, year, output_path)
             "ai_summary": ai_data.get("summary", "ไม่มีการสรุป"),
             "key_change": ai_data.get("key_change", "-"),
             "section_count": len(raw_groups[cat_id]),
-            "sections": raw_groups[cat_id],
+            "sections": to_dicts(raw_groups[cat_id]),
         })
 
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(final_output, f, ensure_ascii=False, indent=2)
     logging.info(f"✅ FINAL SUCCESS! Saved to: {output_path}")
+    if compact_dir:
+        manifest = write_compact(final_output, compact_dir, const_id)
+        logging.info(f"📦 Compact output: {len(manifest['categories'])} shards -> {compact_dir}")
 
 
 # --- Main Execution ---
 
-def main():
-    if not os.path.exists(FILE_CLEAN):
-        logging.error(f"❌ ไม่พบไฟล์ {FILE_CLEAN}")
-        return
+def main(run_cfg=None):
+    run_cfg = run_cfg or get_run_config()
+    # จับเวลาแต่ละ phase + ทุก request LLM (tokens, retries, cache) -> telemetry/<id>_stage2.*
+    with telemetry.run(run_cfg.const_id, "stage2", enabled=TELEMETRY_ENABLED and not run_cfg.dry_run):
+        return _run_stage(run_cfg)
+
+def _run_stage(run_cfg):
+    file_clean = run_cfg.file_clean
+    shared_cache().enabled = run_cfg.use_llm_cache
+    shared_scheduler().set_quota_share(run_cfg.llm_quota_share)
+
+    if not os.path.exists(file_clean):
+        # raise (ไม่ใช่แค่ log) -> run_all.py นับเป็นฉบับที่ล้มเหลว
+        raise FileNotFoundError(f"ไม่พบไฟล์ {file_clean} (รัน 01_ocr_extraction.py ก่อน)")
 
-    print(f"📂 Loading Clean Data from: {FILE_CLEAN}")
-    with open(FILE_CLEAN, "r", encoding="utf-8") as f:
-        sections = json.load(f)
+    print(f"📂 Loading Clean Data from: {file_clean}")
+    with telemetry.span("load"):
+        sections = load_sections(file_clean)  # Section (__slots__) แทน dict ตลอด stage
     
     print(f"✅ Loaded {len(sections)} items.")
 
     # 1. Group by AI-Mapped Headers
-    enriched_sections, summary_groups, raw_groups = group_sections_with_smart_mapping(sections)
+    build = BuildState(run_cfg.const_id, dry_run=run_cfg.dry_run, force=run_cfg.force)
+    with telemetry.span("group", items=len(sections)):
+        enriched_sections, summary_groups, raw_groups = group_sections_with_smart_mapping(sections, build)
 
     # 2. Generate Final Summary
-    try: year = int("".join(filter(str.isdigit, TARGET_CONST_ID)))
+    try: year = int("".join(filter(str.isdigit, run_cfg.const_id)))
     except: year = 0
     
+    if run_cfg.dry_run:
+        generate_summaries_from_data(summary_groups, raw_groups, year, None, build=build)
+        return build.report("stage2")
     os.makedirs(OUTPUT_DIR_FINAL, exist_ok=True)
-    generate_summaries_from_data(summary_groups, raw_groups, year, FILE_FINAL_SUMMARY)
+    with telemetry.span("summarize"):
+        generate_summaries_from_data(summary_groups, raw_groups, year, run_cfg.file_final_summary,
+                                     run_cfg.dir_compact if COMPACT_OUTPUT else None, run_cfg.const_id, build)
+    build.report("stage2")
+    build.save()
+    logging.info(f"♻️ {shared_cache().stats()}")
+    logging.info(f"🚦 {shared_scheduler().stats()}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stage 2: AI Analysis & Summary")
+    parser.add_argument("const_id", nargs="?", help="constitution ID (default: TARGET_CONST_ID)")
+    parser.add_argument("--no-llm-cache", action="store_true", help="always call the API (skip the LLM cache)")
+    parser.add_argument("--profile", action="store_true", help="run under cProfile and print the hot functions")
+    parser.add_argument("--dry-run", action="store_true", help="show which categories would be re-summarized and exit")
+    parser.add_argument("--force", action="store_true", help="re-summarize everything, ignoring the build state")
+    args = parser.parse_args()
+
+    run_cfg = get_run_config(args.const_id)
+    run_cfg.use_llm_cache = not args.no_llm_cache
+    run_cfg.dry_run = args.dry_run
+    run_cfg.force = args.force
+    try:
+        if args.profile:
+            with telemetry.profiled(run_cfg.const_id, "stage2"):
+                main(run_cfg)
+        else:
+            main(run_cfg)
+    except FileNotFoundError as e:
+        raise SystemExit(f"❌ {e}")
\ No newline at end of file
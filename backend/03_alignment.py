@@ -0,0 +1,318 @@
+"""
+Stage 3: จับคู่มาตราข้ามฉบับล่วงหน้า (ผลเดียวกับ alignSections ใน utils/diffEngine.ts ตอน render)
+ฝั่งเว็บยังไม่ได้อ่านไฟล์เหล่านี้: components/DiffViewer.tsx ยังเรียก alignSections เอง (ดู README Step 3)
+
+อ่าน json_output/final/*_full_summary.json ทุกฉบับ แล้วเขียนผลของทุกคู่ (ซ้าย-ขวา) ไว้ที่
+json_output/alignment/<left>-vs-<right>.json (ชื่อเดียวกับ slug ของหน้าเว็บ)
+
+ขั้นตอนเหมือน alignSections ทุกอย่าง (คะแนน Dice bigram แบบ string-similarity, greedy, orphan ข้ามหมวด)
+ต่างกันแค่การหาคู่ที่คะแนน > 0.55: ใช้ inverted index ของ bigram + prefix filter
+-> เทียบจริงเฉพาะคู่ที่มีโอกาสผ่าน แทนการเทียบทุกมาตรา x ทุกมาตรา (ผลเท่ากันทุกคู่ ไม่ใช่การประมาณ)
+
+    python 03_alignment.py                      # ทุกฉบับที่มีผล Stage 2
+    python 03_alignment.py con2550 con2560      # เฉพาะคู่ระหว่างฉบับที่ระบุ
+"""
+import argparse
+import functools
+import json
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+from config import OUTPUT_DIR_ALIGNMENT, OUTPUT_DIR_FINAL, get_run_config
+from similarity import bigram_counts, dice_bigram
+
+# --- ค่าเดียวกับฝั่งเว็บ ---
+# types/index.ts: CATEGORY_ORDER
+SITE_CATEGORY_ORDER = [
+    ("preamble", "คำปรารภ"),
+    ("general", "บททั่วไป"),
+    ("monarchy", "พระมหากษัตริย์"),
+    ("rights_duties", "สิทธิเสรีภาพ"),
+    ("state_policies", "แนวนโยบายแห่งรัฐ"),
+    ("legislative", "นิติบัญญัติ (สภา)"),
+    ("executive", "บริหาร (ครม.)"),
+    ("judicial", "ตุลาการ (ศาล)"),
+    ("independent_orgs", "องค์กรอิสระ"),
+    ("local_admin", "ปกครองส่วนท้องถิ่น"),
+    ("amendment", "การแก้ไขรัฐธรรมนูญ"),
+    ("transitory", "บทเฉพาะกาล"),
+]
+# utils/diffEngine.ts
+MATCH_THRESHOLD = 0.55
+SAME_THRESHOLD = 0.85  # มากกว่านี้ = MATCH ไม่งั้น MODIFIED
+ORPHAN_FUZZY_LIMIT = 2000  # orphan ซ้าย x ขวา มากกว่านี้ -> จับคู่เฉพาะข้อความที่เหมือนกันทุกตัวอักษร
+
+_WHITESPACE = re.compile(r"\s+")
+_JS_FLOAT = re.compile(r"\s*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+
+def load_sections(const_id):
+    """แปลง full_summary เป็น list แบน (แบบ transformRichData ใน utils/dataLoader.ts)"""
+    path = get_run_config(const_id).file_final_summary
+    with open(path, "r", encoding="utf-8") as f:
+        categories = json.load(f)
+    return [
+        {
+            "id": str(sec["id"]),
+            "content": sec.get("content", ""),
+            "chapter_name": cat.get("category_name"),
+            "category_id": cat.get("category_id"),
+        }
+        for cat in categories
+        for sec in cat.get("sections") or []
+    ]
+
+
+def similar_pairs(left_texts, right_texts, threshold=MATCH_THRESHOLD):
+    """
+    {(i, j): คะแนน} ของทุกคู่ที่ dice_bigram(left[i], right[j]) > threshold
+
+    แต่ละข้อความเป็น multiset ของ bigram (bigram ซ้ำนับเป็น token แยก: (bigram, ครั้งที่))
+    -> intersection ของ multiset = intersection ของ set ของ token (frozenset & ทำใน C)
+    Dice > t  =>  ต้องมี bigram ร่วมกันอย่างน้อย o = t * n / (2 - t) ตัว
+    เรียง token จากหายากไปบ่อย แล้ว index เฉพาะ n - o + 1 ตัวแรก (prefix) -> คู่ที่ผ่านต้องมี prefix ร่วมกัน
+    """
+    token_ids = {}
+
+    def prepare(texts):
+        docs = []
+        for text in texts:
+            normalized = _WHITESPACE.sub("", text)
+            tokens = frozenset(
+                token_ids.setdefault((bigram, k), len(token_ids))
+                for bigram, n in bigram_counts(normalized).items() for k in range(n)
+            )
+            docs.append((normalized, tokens))
+        return docs
+
+    left_docs, right_docs = prepare(left_texts), prepare(right_texts)
+    frequency = Counter(token for _, tokens in left_docs + right_docs for token in tokens)
+    order = lambda token: (frequency[token], token)  # noqa: E731
+
+    def prefix(tokens):
+        n = len(tokens)
+        overlap = max(1, int(threshold * n / (2 - threshold) - 1e-9) + 1)
+        return sorted(tokens, key=order)[:max(1, n - overlap + 1)]
+
+    index = defaultdict(list)
+    same_text = defaultdict(list)
+    for j, (normalized, tokens) in enumerate(right_docs):
+        same_text[normalized].append(j)
+        for token in prefix(tokens) if tokens else ():
+            index[token].append(j)
+
+    scores = {}
+    min_ratio = threshold / (2 - threshold)
+    for i, (normalized, tokens) in enumerate(left_docs):
+        # ข้อความเหมือนกัน (รวมข้อความว่าง/สั้น) = 1.0 เสมอ
+        for j in same_text.get(normalized, ()):
+            scores[(i, j)] = 1.0
+        if not tokens: continue
+        n = len(tokens)
+        candidates = {j for token in prefix(tokens) for j in index.get(token, ())}
+        for j in candidates:
+            if (i, j) in scores: continue
+            other = right_docs[j][1]
+            m = len(other)
+            if m < n * min_ratio or n < m * min_ratio: continue  # ความยาวต่างกันเกินกว่าจะผ่าน
+            score = (2.0 * len(tokens & other)) / (n + m)
+            if score > threshold:
+                scores[(i, j)] = score
+    return scores
+
+
+def _js_parse_float(text):
+    match = _JS_FLOAT.match(str(text))
+    return float(match.group()) if match else None
+
+
+def _sort_value(row, left, right):
+    """getVal ใน diffEngine.ts: parseFloat(id) || 9999"""
+    section = left[row["l"]] if row["l"] is not None else right[row["r"]]
+    value = _js_parse_float(section["id"])
+    return value or 9999
+
+
+def _site_category_id(category_title, fallback):
+    best_id, best_score = None, None
+    for cat_id, name in SITE_CATEGORY_ORDER:
+        if name in category_title or category_title in name:
+            if best_score is None or best_score < 1.0:
+                best_id, best_score = cat_id, 1.0
+        else:
+            score = dice_bigram(category_title, name)
+            if score > 0.4 and (best_score is None or score > best_score):
+                best_id, best_score = cat_id, score
+    return best_id or fallback
+
+
+def align_sections(left, right, scores):
+    """port ของ alignSections: คืน row ตามลำดับเดียวกับหน้าเว็บ (l/r = index ใน left/right)"""
+    def chapter(section):
+        return (section.get("chapter_name") or "").strip() or "General"
+
+    def row(key, section_id, cat_id, title, l, r, status, score):
+        return {"key": key, "sectionId": section_id, "categoryId": cat_id, "categoryTitle": title,
+                "l": l, "r": r, "status": status, "score": score}
+
+    result_rows = []
+    for name in dict.fromkeys([chapter(s) for s in left] + [chapter(s) for s in right]):
+        left_pool = [i for i, s in enumerate(left) if chapter(s) == name]
+        right_pool = [j for j, s in enumerate(right) if chapter(s) == name]
+        meta_source = left[left_pool[0]] if left_pool else right[right_pool[0]]
+        cat_id = _site_category_id(name, meta_source.get("category_id") or "unknown_cat")
+
+        matches = [
+            (li, ri, scores[(l, r)])
+            for li, l in enumerate(left_pool)
+            for ri, r in enumerate(right_pool)
+            if (l, r) in scores
+        ]
+        matches.sort(key=lambda m: -m[2])
+
+        used_left, used_right, category_rows = set(), set(), []
+        for li, ri, score in matches:
+            if li in used_left or ri in used_right: continue
+            l, r = left_pool[li], right_pool[ri]
+            status = "MATCH" if score > SAME_THRESHOLD else "MODIFIED"
+            category_rows.append(row(f"{cat_id}::{left[l]['id']}::{right[r]['id']}", left[l]["id"],
+                                     cat_id, name, l, r, status, score))
+            used_left.add(li)
+            used_right.add(ri)
+        for li, l in enumerate(left_pool):
+            if li not in used_left:
+                category_rows.append(row(f"{cat_id}::{left[l]['id']}::REMOVE", left[l]["id"],
+                                         cat_id, name, l, None, "REMOVE", 0.0))
+        for ri, r in enumerate(right_pool):
+            if ri not in used_right:
+                category_rows.append(row(f"{cat_id}::ADD::{right[r]['id']}", right[r]["id"],
+                                         cat_id, name, None, r, "ADD", 0.0))
+
+        category_rows.sort(key=lambda x: _sort_value(x, left, right))
+        result_rows.extend(category_rows)
+
+    # --- Orphan ข้ามหมวด ---
+    orphans_left = [x for x in result_rows if x["status"] == "REMOVE"]
+    orphans_right = [x for x in result_rows if x["status"] == "ADD"]
+    stable_rows = [x for x in result_rows if x["status"] not in ("REMOVE", "ADD")]
+
+    potential = []
+    if len(orphans_left) * len(orphans_right) > ORPHAN_FUZZY_LIMIT:
+        right_map = {right[x["r"]]["content"].strip(): x for x in orphans_right}
+        for x in orphans_left:
+            content = left[x["l"]]["content"].strip()
+            if content in right_map:
+                potential.append((x, right_map[content], 1.0))
+    else:
+        for x in orphans_left:
+            for y in orphans_right:
+                if (x["l"], y["r"]) in scores:
+                    potential.append((x, y, scores[(x["l"], y["r"])]))
+    potential.sort(key=lambda m: -m[2])
+
+    used_left, used_right, matched = set(), set(), []
+    for x, y, score in potential:
+        if x["key"] in used_left or y["key"] in used_right: continue
+        status = "MATCH" if score > SAME_THRESHOLD else "MODIFIED"
+        matched.append(row(f"cross::{x['sectionId']}::{y['sectionId']}", x["sectionId"],
+                           y["categoryId"], y["categoryTitle"], x["l"], y["r"], status, score))
+        used_left.add(x["key"])
+        used_right.add(y["key"])
+
+    final_rows = (
+        stable_rows + matched
+        + [x for x in orphans_left if x["key"] not in used_left]
+        + [y for y in orphans_right if y["key"] not in used_right]
+    )
+
+    # comparator เดียวกับหน้าเว็บ (ต่างหมวด = 0) -> ต้องใช้ cmp ตรงๆ ให้ลำดับออกมาเหมือนกัน
+    def compare(a, b):
+        if a["categoryTitle"] != b["categoryTitle"]: return 0
+        return _sort_value(a, left, right) - _sort_value(b, left, right)
+
+    final_rows.sort(key=functools.cmp_to_key(compare))
+    return final_rows
+
+
+def compact_alignment(left_id, right_id, left, right, rows):
+    """artifact ที่หน้าเว็บ lookup ได้ทันที: [key, หมวด, id ซ้าย, id ขวา, status, score]"""
+    categories = list(dict.fromkeys((x["categoryId"], x["categoryTitle"]) for x in rows))
+    category_index = {c: i for i, c in enumerate(categories)}
+    return {
+        "left": left_id,
+        "right": right_id,
+        "categories": [list(c) for c in categories],
+        "rows": [
+            [
+                x["key"],
+                category_index[(x["categoryId"], x["categoryTitle"])],
+                left[x["l"]]["id"] if x["l"] is not None else None,
+                right[x["r"]]["id"] if x["r"] is not None else None,
+                x["status"],
+                round(x["score"], 4),
+            ]
+            for x in rows
+        ],
+    }
+
+
+def _write(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def align_pair(id_a, id_b):
+    """Worker: คำนวณคะแนนครั้งเดียวต่อคู่ แล้วเขียนทั้ง a-vs-b และ b-vs-a"""
+    a, b = load_sections(id_a), load_sections(id_b)
+    scores = similar_pairs([s["content"] for s in a], [s["content"] for s in b])
+    reverse = {(j, i): score for (i, j), score in scores.items()}
+
+    rows = 0
+    for left_id, right_id, left, right, pair_scores in (
+        (id_a, id_b, a, b, scores),
+        (id_b, id_a, b, a, reverse),
+    ):
+        aligned = align_sections(left, right, pair_scores)
+        path = os.path.join(OUTPUT_DIR_ALIGNMENT, f"{left_id}-vs-{right_id}.json")
+        _write(path, compact_alignment(left_id, right_id, left, right, aligned))
+        rows += len(aligned)
+    return id_a, id_b, rows, len(scores)
+
+
+def list_summarized_ids():
+    if not os.path.isdir(OUTPUT_DIR_FINAL): return []
+    suffix = "_full_summary.json"
+    return sorted(name[:-len(suffix)] for name in os.listdir(OUTPUT_DIR_FINAL) if name.endswith(suffix))
+
+
+def main(const_ids=None, workers=None):
+    const_ids = const_ids or list_summarized_ids()
+    if len(const_ids) < 2:
+        return print("❌ ต้องมีผล Stage 2 อย่างน้อย 2 ฉบับ")
+
+    os.makedirs(OUTPUT_DIR_ALIGNMENT, exist_ok=True)
+    pairs = list(combinations(const_ids, 2))
+    print(f"🔗 Aligning {len(pairs)} pairs ({len(pairs) * 2} files) of {len(const_ids)} constitutions...")
+    started_at = time.perf_counter()
+    total_rows = total_matches = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for id_a, id_b, rows, matches in pool.map(align_pair, *zip(*pairs)):
+            total_rows += rows
+            total_matches += matches
+    elapsed = time.perf_counter() - started_at
+    print(f"🎉 DONE! {total_rows} rows ({total_matches} scored pairs > {MATCH_THRESHOLD}) "
+          f"-> {OUTPUT_DIR_ALIGNMENT} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stage 3: cross-constitution section alignment")
+    parser.add_argument("ids", nargs="*", help="constitution IDs (default: every ID with a Stage 2 summary)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+    main(args.ids, args.workers)
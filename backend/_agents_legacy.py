@@ -3,6 +3,8 @@ import logging
 import re
 from zhipuai import ZhipuAI
 from config import ZAI_API_KEY, CATEGORIES
+from llm_scheduler import LLMRequestError, shared_scheduler
+import telemetry
 
 if not ZAI_API_KEY:
     logging.warning("ZAI_API_KEY is not set in environment variables.")
@@ -15,7 +17,7 @@ class Agent:
         self.model = model
 
     def query_ai(self, system_prompt, user_content, temperature=0.1):
-        try:
+        def call():
             response = client.chat.completions.create(
                 model=self.model,
                 messages=[
@@ -25,8 +27,17 @@ class Agent:
                 temperature=temperature,
                 max_tokens=4096,  # เผื่อเจอหน้ายาวๆ
             )
+            usage = getattr(response, "usage", None)
+            telemetry.annotate(
+                prompt_tokens=getattr(usage, "prompt_tokens", None),
+                output_tokens=getattr(usage, "completion_tokens", None),
+            )
             return response.choices[0].message.content
-        except Exception as e:
+
+        try:
+            # retry/backoff + โควต้าต่อโมเดล ร่วมกับ agent อื่นใน llm_scheduler.py
+            return shared_scheduler().request(self.model, call, validate=bool, label=type(self).__name__)
+        except LLMRequestError as e:
             logging.error(f"AI Query Error: {e}")
             raise e
 
@@ -1,58 +1,90 @@
 import logging
-import time
-import re
+import math
 import json
-from google import genai
-from google.genai import types
-from config import GOOGLE_API_KEY, CATEGORIES
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from config import GOOGLE_API_KEY, CATEGORIES, LLM_MAX_RETRIES, SUMMARY_CONCURRENCY, SUMMARY_TOKEN_BUDGET
+from llm_cache import shared_cache
+from llm_json import generate_json_text, salvage_object, summary_entry
+from llm_scheduler import PRIORITY_HIGH, PRIORITY_NORMAL, LLMRequestError, get_client, shared_scheduler
 
-# Set up Google API
+# Google client ตัวเดียวของทั้ง process อยู่ใน llm_scheduler.get_client()
 if not GOOGLE_API_KEY:
     logging.warning("GOOGLE_API_KEY is not set.")
-    client = None
-else:
-    client = genai.Client(api_key=GOOGLE_API_KEY)
 
 
-class AgentSummarizer:
-    def __init__(self):
-        self.model_name = "gemini-3-flash-preview" 
+CHARS_PER_TOKEN = 2  # ประมาณแบบเผื่อไว้ (ข้อความไทย ~2 ตัวอักษรต่อ token) ไม่ต้องเรียก count_tokens
 
-    def _clean_json_response(self, text):
-        """Helper: พยายามแกะ JSON ออกจากข้อความขยะ หรือ Markdown"""
-        clean_text = text.strip()
-        # 1. ถอด Markdown Code Block
-        if clean_text.startswith("```json"):
-            clean_text = clean_text[7:]
-        if clean_text.startswith("```"):
-            clean_text = clean_text[3:]
-        if clean_text.endswith("```"):
-            clean_text = clean_text[:-3]
-
-        # 2. ลอง Parse ตรงๆ
-        try:
-            return json.loads(clean_text.strip())
-        except json.JSONDecodeError:
-            pass
 
-        # 3. ใช้ Regex ค้นหา {...}
-        try:
-            match = re.search(r"\{.*\}", text, re.DOTALL)
-            if match:
-                return json.loads(match.group(0))
-        except Exception as e:
-            logging.warning(f"JSON Parsing failed: {e}")
+def estimate_tokens(text):
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
 
-        return {}
+def chunk_by_tokens(sections, token_budget=SUMMARY_TOKEN_BUDGET):
+    """
+    แบ่ง list ของมาตรา (string) เป็นก้อนตามลำดับเดิม แต่ละก้อนไม่เกิน token_budget
+    มาตราเดียวที่ยาวเกิน budget ได้ก้อนของตัวเอง (ไม่ตัดกลางมาตรา)
+    """
+    chunks, current, used = [], [], 0
+    for section in sections:
+        tokens = estimate_tokens(section)
+        if current and used + tokens > token_budget:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(section)
+        used += tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def concat_partials(partials):
+    """ผลสรุปหลายส่วนของหมวดเดียว -> ผลเดียวแบบต่อข้อความ (ใช้เมื่อ request รวมผลล้มเหลว)"""
+    summary = " ".join(p["summary"] for p in partials if p.get("summary"))
+    key_changes = [p["key_change"] for p in partials if p.get("key_change") and p["key_change"] != "-"]
+    return {"summary": summary, "key_change": " / ".join(dict.fromkeys(key_changes)) or "-"}
+
+
+class AgentSummarizer:
+    def __init__(self):
+        self.model_name = "gemini-3-flash-preview" 
+        self.unmerged = set()  # หมวดที่ได้ผลจากการต่อผลแต่ละส่วน (request รวมผลล้มเหลว) ในรอบล่าสุด
 
     def run_batch(self, grouped_content_dict):
-        if not client:
+        """
+        ทั้งฉบับใน request เดียว: เก็บทุกหมวดที่ผ่าน schema แล้วขอใหม่เฉพาะหมวดที่ขาด/เสีย
+        (ไม่ส่งทั้งฉบับซ้ำเพราะหมวดเดียวพัง) สูงสุด LLM_MAX_RETRIES รอบ
+        """
+        if get_client() is None:
             return {}
 
+        results = {}
+        remaining = dict(grouped_content_dict)
+        for _ in range(LLM_MAX_RETRIES):
+            try:
+                # เรียกใช้ Google GenAI (Gemini) ผ่าน cache + scheduler (retry/backoff อยู่ใน llm_scheduler.py)
+                got = self._cached_generate(
+                    self._batch_contents(remaining),
+                    lambda text, expected=tuple(remaining): self._parse_batch(text, expected),
+                    label=f"batch summary ({len(remaining)} categories)",
+                )
+            except LLMRequestError as e:
+                logging.error(f"❌ Failed to generate batch summary after retries: {e}")
+                break
+            results.update(got)
+            remaining = {k: v for k, v in remaining.items() if k not in results}
+            if not remaining:
+                break
+            logging.warning(f"🩹 Batch summary: kept {len(got)} categories, re-requesting {list(remaining)}")
+
+        if remaining:
+            logging.error(f"❌ Failed to summarize {list(remaining)} in batch mode.")
+        return results
+
+    def _batch_contents(self, grouped_content_dict):
         content_json_str = json.dumps(
             grouped_content_dict, ensure_ascii=False, indent=2
         )
-        target_cats = list(CATEGORIES.keys())
+        target_cats = list(grouped_content_dict.keys())
 
         system_prompt = f"""
         Role: Political Science Professor (Thai Constitution Specialist).
@@ -71,35 +103,130 @@ class AgentSummarizer:
         
         Constraint: Strictly Output valid JSON only. No markdown.
         """
+        return [system_prompt, f"[DATA START]\n{content_json_str}\n[DATA END]"]
 
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                # เรียกใช้ Google GenAI (Gemini)
-                response = client.models.generate_content(
-                    model=self.model_name,
-                    contents=[
-                        system_prompt,
-                        f"[DATA START]\n{content_json_str}\n[DATA END]",
-                    ],
-                    config=types.GenerateContentConfig(
-                        response_mime_type="application/json"
-                    ),
-                )
+    def _parse_batch(self, text, expected):
+        """{category_id: summary_entry} เฉพาะหมวดที่ขอและผ่าน schema (ว่าง = ใช้ไม่ได้ทั้ง response)"""
+        salvage = salvage_object(text, summary_entry)
+        return {cat_id: entry for cat_id, entry in salvage.valid.items() if cat_id in expected}
+
+    def _cached_generate(self, contents, parse, priority=PRIORITY_NORMAL, label=None):
+        """
+        generate (JSON mode, stream ถ้าทำได้) ผ่าน LLM cache -> parse(ข้อความ response)
+        cache miss -> ส่งผ่าน shared_scheduler (retry จนกว่า parse ผ่าน, ล้มเหลว = LLMRequestError)
+        """
+        def call():
+            return generate_json_text(self.model_name, contents, label=label)
+
+        def generate():
+            return shared_scheduler().request(self.model_name, call, validate=parse, priority=priority, label=label)
 
-                result = self._clean_json_response(response.text)
+        return shared_cache().fetch(self.model_name, contents, generate, parse)
 
-                if result:
-                    return result
-                else:
-                    logging.warning(
-                        f"⚠️ Empty/Invalid JSON from AI (Attempt {attempt+1})"
-                    )
-                    time.sleep(2)
+    def _parse_summary(self, text):
+        """{"summary", "key_change"} ของหมวดเดียว (key_change เสีย/ถูกตัด -> "-" ไม่ต้องขอใหม่ทั้ง request)"""
+        return summary_entry(salvage_object(text).valid)
 
-            except Exception as e:
-                logging.warning(f"⚠️ Batch Summary Error (Attempt {attempt+1}): {e}")
-                time.sleep(5)
+    def _generate_json(self, contents, priority, label):
+        """dict ที่มี summary/key_change หรือ None ถ้าล้มเหลวหลัง retry ครบ (request อื่นใน pool ทำงานต่อ)"""
+        try:
+            return self._cached_generate(contents, self._parse_summary, priority, label)
+        except LLMRequestError as e:
+            logging.warning(f"⚠️ Summary request {label} failed: {e}")
+            return None
+
+    def _summarize_chunk(self, cat_id, sections, part, parts):
+        part_note = f" (ส่วนที่ {part + 1}/{parts} ของหมวดนี้)" if parts > 1 else ""
+        prompt = f"""
+        Role: Political Science Professor (Thai Constitution Specialist).
+        Task: Summarize ONE category of a constitution{part_note}.
+
+        Category: {cat_id} ({CATEGORIES.get(cat_id, cat_id)})
+
+        Output Requirement: a JSON object with
+            - "summary": (String) Summary in Thai (neutral, academic, max 3 sentences).
+            - "key_change": (String) A short highlight of power dynamics or significant changes.
+
+        Constraint: Strictly Output valid JSON only. No markdown.
+        """
+        data = json.dumps(sections, ensure_ascii=False, separators=(",", ":"))
+        return self._generate_json([prompt, f"[DATA START]\n{data}\n[DATA END]"], PRIORITY_NORMAL,
+                                   f"{cat_id} part {part + 1}/{parts}")
+
+    def _merge_partials(self, cat_id, partials):
+        """รวมผลสรุปของแต่ละส่วนในหมวดเดียวกันเป็นผลเดียว (request เล็ก ส่งแค่ผลสรุป)"""
+        prompt = f"""
+        Role: Political Science Professor (Thai Constitution Specialist).
+        Task: The category below was summarized in {len(partials)} parts. Merge the partial results into ONE.
+
+        Category: {cat_id} ({CATEGORIES.get(cat_id, cat_id)})
 
-        logging.error("❌ Failed to generate batch summary after retries.")
-        return {}
\ No newline at end of file
+        Output Requirement: a JSON object with
+            - "summary": (String) Summary in Thai (neutral, academic, max 3 sentences).
+            - "key_change": (String) A short highlight of power dynamics or significant changes.
+
+        Constraint: Strictly Output valid JSON only. No markdown.
+        """
+        data = json.dumps(partials, ensure_ascii=False, separators=(",", ":"))
+        # หมวดนี้รอแค่ request นี้ -> ลัดคิวก่อนส่วนย่อยของหมวดอื่น
+        return self._generate_json([prompt, f"[PARTS START]\n{data}\n[PARTS END]"], PRIORITY_HIGH,
+                                   f"{cat_id} merge")
+
+    def run_concurrent(self, grouped_content_dict, workers=SUMMARY_CONCURRENCY,
+                       token_budget=SUMMARY_TOKEN_BUDGET):
+        """
+        สรุปทีละหมวดพร้อมกัน (แทน run_batch ที่ส่งทั้งฉบับใน request เดียว)
+        - หมวดที่ยาวเกิน token_budget แบ่งเป็นหลายส่วน สรุปแยกแล้วรวมด้วย request เล็กอีกครั้ง
+        - request ที่ล้มเหลว retry เฉพาะตัวเอง (ไม่ส่งหมวดอื่นซ้ำ) ผ่าน shared_scheduler
+        คืน dict รูปแบบเดียวกับ run_batch (หมวดที่ล้มเหลวทุกครั้งจะไม่มีใน dict)
+        request รวมผลล้มเหลว -> ใช้ผลแต่ละส่วนต่อกัน (concat_partials) และจดไว้ใน self.unmerged
+        """
+        if get_client() is None:
+            return {}
+
+        chunks = {
+            cat_id: chunk_by_tokens(sections, token_budget)
+            for cat_id, sections in grouped_content_dict.items() if sections
+        }
+        logging.info(
+            f"🧩 Summarizing {len(chunks)} categories in {sum(map(len, chunks.values()))} requests "
+            f"(workers={workers}, budget={token_budget} tokens)"
+        )
+        partials = {cat_id: [None] * len(parts) for cat_id, parts in chunks.items()}
+        results = {}
+        self.unmerged = set()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            # key = (cat_id, ส่วนที่) หรือ (cat_id, None) = request รวมผล
+            pending = {
+                pool.submit(self._summarize_chunk, cat_id, chunk, part, len(parts)): (cat_id, part)
+                for cat_id, parts in chunks.items()
+                for part, chunk in enumerate(parts)
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    cat_id, part = pending.pop(future)
+                    result = future.result()
+                    if result is None and part is None:
+                        # ทุกส่วนสรุปได้แล้ว แค่ request รวมผลล้มเหลว -> ต่อผลแต่ละส่วนแทนการทิ้งทั้งหมวด
+                        logging.warning(f"⚠️ Merge of {cat_id} failed: using its {len(partials[cat_id])} "
+                                        f"partial summaries as-is")
+                        result = concat_partials(partials[cat_id])
+                        self.unmerged.add(cat_id)
+                    if result is None: continue
+                    if part is None:
+                        results[cat_id] = result
+                        continue
+                    partials[cat_id][part] = result
+                    if any(p is None for p in partials[cat_id]): continue
+                    if len(partials[cat_id]) == 1:
+                        results[cat_id] = result
+                    else:
+                        # ได้ครบทุกส่วนแล้ว -> ส่ง request รวมผลทันที ไม่ต้องรอหมวดอื่น
+                        merge = pool.submit(self._merge_partials, cat_id, partials[cat_id])
+                        pending[merge] = (cat_id, None)
+
+        failed = [cat_id for cat_id in chunks if cat_id not in results]
+        if failed:
+            logging.error(f"❌ Failed to summarize {failed} after retries.")
+        return results
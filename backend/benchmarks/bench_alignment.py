@@ -0,0 +1,65 @@
+"""
+Benchmark: หาคู่มาตรา Dice > 0.55 ด้วย prefix-filter join (03_alignment.py) เทียบกับเทียบทุกคู่แบบหน้าเว็บ
+
+ทุกคู่ฉบับ (ไม่สนลำดับซ้าย/ขวา เพราะ Dice สมมาตร) จาก json_output/final:
+- brute : dice_bigram ทุกมาตรา x ทุกมาตรา (เท่ากับที่ alignSections ทำใน step 1 + step 2 รวมกันในกรณีแย่สุด)
+- join  : similar_pairs
+- same  : จำนวนคู่ฉบับที่ได้คู่มาตรา + คะแนนตรงกันทุกค่า
+
+    cd backend && python benchmarks/bench_alignment.py            # 10 คู่ฉบับแรก
+    cd backend && python benchmarks/bench_alignment.py --pairs 0  # ทุกคู่ (ช้า: brute force)
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+from itertools import combinations
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from similarity import dice_bigram  # noqa: E402
+
+stage3 = importlib.import_module("03_alignment")
+
+
+def brute_force(left_texts, right_texts, threshold=stage3.MATCH_THRESHOLD):
+    return {
+        (i, j): score
+        for i, a in enumerate(left_texts)
+        for j, b in enumerate(right_texts)
+        if (score := dice_bigram(a, b)) > threshold
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-constitution candidate generation")
+    parser.add_argument("--pairs", type=int, default=10, help="number of constitution pairs (0 = all)")
+    args = parser.parse_args()
+
+    const_ids = stage3.list_summarized_ids()
+    texts = {c: [s["content"] for s in stage3.load_sections(c)] for c in const_ids}
+    pairs = list(combinations(const_ids, 2))
+    if args.pairs: pairs = pairs[:args.pairs]
+
+    print(f"{'pair':<26}{'sections':>10}{'matches':>9}{'brute ms':>11}{'join ms':>10}{'speedup':>9}")
+    totals = [0.0, 0.0]
+    same = 0
+    for a, b in pairs:
+        started_at = time.perf_counter()
+        expected = brute_force(texts[a], texts[b])
+        brute_time = time.perf_counter() - started_at
+        started_at = time.perf_counter()
+        actual = stage3.similar_pairs(texts[a], texts[b])
+        join_time = time.perf_counter() - started_at
+        totals[0] += brute_time
+        totals[1] += join_time
+        same += expected == actual
+        print(f"{a + '-' + b:<26}{len(texts[a]):>5}x{len(texts[b]):<4}{len(actual):>9}"
+              f"{brute_time * 1000:>11.0f}{join_time * 1000:>10.0f}{brute_time / join_time:>8.1f}x")
+    print(f"{'TOTAL':<48}{totals[0] * 1000:>11.0f}{totals[1] * 1000:>10.0f}{totals[0] / totals[1]:>8.1f}x")
+    print(f"identical matches: {same}/{len(pairs)} pairs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark: header resolver ในเครื่อง (ใช้ตั้งค่า HEADER_MATCH_THRESHOLD)
+
+1. leave-one-out: เอาชื่อออกจากตารางทีละชื่อ แล้ว resolve ด้วยความใกล้เคียงอย่างเดียว
+   -> ความแม่นยำของ "similar" ที่แต่ละ threshold (ชื่อใหม่ที่ไม่เคยเห็น)
+2. header ทั้งหมดใน json_output/clean: ตัดสินได้จากตาราง / ความใกล้เคียง / ต้องถาม LLM + เวลาที่ใช้
+
+    cd backend && python benchmarks/bench_header_resolver.py
+"""
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import HEADER_MATCH_THRESHOLD, OUTPUT_DIR_CLEAN  # noqa: E402
+from header_resolver import HeaderResolver, is_header, load_table  # noqa: E402
+
+
+def main():
+    table = load_table()
+    results = []
+    for title, expected in table.items():
+        resolver = HeaderResolver({k: v for k, v in table.items() if k != title}, threshold=0.0)
+        cat_id, score, _ = resolver.resolve(title)
+        results.append((score, cat_id == expected))
+
+    print(f"Leave-one-out over {len(table)} table titles:")
+    print(f"{'threshold':>10}{'resolved':>10}{'correct':>9}{'precision':>11}")
+    for threshold in (0.5, 0.6, 0.7, 0.75, 0.8, 0.9):
+        selected = [ok for score, ok in results if score >= threshold]
+        precision = sum(selected) / len(selected) if selected else 1.0
+        marker = "  <- HEADER_MATCH_THRESHOLD" if threshold == HEADER_MATCH_THRESHOLD else ""
+        print(f"{threshold:>10.2f}{len(selected):>10}{sum(selected):>9}{precision:>10.1%}{marker}")
+
+    headers = set()
+    for path in glob.glob(os.path.join(OUTPUT_DIR_CLEAN, "*_clean.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            headers.update(item["content"] for item in json.load(f) if is_header(item))
+    started_at = time.perf_counter()
+    _, unresolved, sources = HeaderResolver().resolve_all(sorted(headers))
+    elapsed = time.perf_counter() - started_at
+    print(f"\n{len(headers)} unique headers in {OUTPUT_DIR_CLEAN}: {sources['table']} table, "
+          f"{sources['similar']} similar, {len(unresolved)} -> LLM ({elapsed * 1000:.1f} ms)")
+    for header in unresolved:
+        print(f"   LLM: {header[:70]!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Benchmark: smart_heal_sequence (LIS, sequence_repair) เทียบกับวิธีเดิม
+
+1. checkpoint จริงทุกฉบับ (เวลา heal + รวม ID ซ้ำ)
+2. ข้อมูลสังเคราะห์ 10k มาตรา ที่ใส่ noise แบบ OCR (เลขไทยที่สับสนกัน, หน้าหาย, continuation, มาตราย่อย)
+   วัดทั้งเวลาและความแม่น (เลขมาตราที่ถูกต้องหลังซ่อม)
+3. --stream ต้องได้ clean output เหมือนโหมดปกติทุก byte กับ checkpoint ทุกฉบับ (run_streaming vs heal + merge_and_compare)
+4. กรณีที่ต้องไม่ซ่อม/ต้องซ่อม: หน้าสลับลำดับ (เลขไม่ซ้ำ, อยู่ในช่วง) ต้องคงเลขเดิม,
+   เลขที่อ่านผิดแต่ช่องว่างเติมได้แบบเดียว หรือเลขชนกับมาตราที่มีอยู่แล้ว ต้องถูกซ่อม -> ไม่ตรง = exit 1
+
+    cd backend && python benchmarks/bench_heal.py
+    cd backend && python benchmarks/bench_heal.py --sections 10000 --seed 7
+"""
+import argparse
+import contextlib
+import copy
+import glob
+import importlib
+import io
+import os
+import json
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint import load_checkpoint  # noqa: E402
+from config import LEGACY_JSON  # noqa: E402
+from section_model import Section, to_dicts  # noqa: E402
+from sequence_repair import merge_duplicates, repair_section_ids  # noqa: E402
+
+stage1 = importlib.import_module("01_ocr_extraction")
+
+# ตัวเลขที่ OCR อ่านสลับกันบ่อย (๕/๙, ๓/๘, ๑/๗, ...)
+CONFUSIONS = {"5": "9", "9": "5", "4": "9", "3": "8", "8": "3", "1": "7", "7": "1", "0": "6", "6": "0"}
+
+
+def legacy_heal(items):
+    """smart_heal_sequence + รวม ID ซ้ำแบบเดิม (list.remove, content +=) เก็บไว้เทียบ"""
+    healed_items = []
+    all_numeric_ids = [nid for nid in (stage1.get_numeric_id(i["id"]) for i in items) if nid]
+    missing_ids = []
+    if all_numeric_ids:
+        missing_ids = sorted(set(range(min(all_numeric_ids), max(all_numeric_ids) + 1)) - set(all_numeric_ids))
+
+    first_intro_processed = False
+    for i in range(len(items)):
+        curr = items[i]
+        curr_id_str = str(curr.get("id", "")).strip()
+        curr_nid = stage1.get_numeric_id(curr_id_str)
+        if curr_id_str.lower() == "intro" or not curr_id_str:
+            if healed_items and first_intro_processed:
+                healed_items[-1]["content"] += " " + curr.get("content", "")
+            else:
+                healed_items.append(curr)
+                first_intro_processed = True
+            continue
+        if i + 1 < len(items):
+            next_nid = stage1.get_numeric_id(items[i + 1].get("id", ""))
+            if curr_nid and next_nid and curr_nid > next_nid:
+                candidate_fix = next_nid - 1
+                if candidate_fix in missing_ids:
+                    curr["id"] = str(candidate_fix)
+                    missing_ids.remove(candidate_fix)
+        healed_items.append(curr)
+
+    final_dict = {}
+    for item in healed_items:
+        sec_id = str(item["id"])
+        if sec_id in final_dict:
+            if not sec_id.startswith("header_"):
+                final_dict[sec_id]["content"] += " " + item["content"]
+        else:
+            final_dict[sec_id] = item
+    return list(final_dict.values())
+
+
+def new_heal(items):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return merge_duplicates(stage1.smart_heal_sequence(items))
+
+
+def synthetic(n_sections, seed, noise=0.02, drop=0.01, continuation=0.3):
+    """
+    มาตรา 1..n (ทุก 50 มาตรามีมาตราย่อย /1, ทุก 40 มาตรามีหมวด) + noise
+    คืน (items, truth) truth[i] = เลขที่ถูกต้องของ items[i] (None = ไม่ใช่มาตรา)
+    """
+    rnd = random.Random(seed)
+    items, truth = [{"id": "intro", "content": "ราชกิจจานุเบกษา", "type": "intro"}], [None]
+
+    def add(sec_id, true_id, content, kind="section"):
+        items.append({"id": sec_id, "content": content, "type": kind})
+        truth.append(true_id)
+
+    for n in range(1, n_sections + 1):
+        if rnd.random() < drop: continue  # หน้าหาย / OCR ตกหล่น
+        true_id = str(n)
+        sec_id = true_id
+        if rnd.random() < noise:
+            digits = [i for i, d in enumerate(true_id) if d in CONFUSIONS]
+            if digits:
+                i = rnd.choice(digits)
+                sec_id = true_id[:i] + CONFUSIONS[true_id[i]] + true_id[i + 1:]
+        add(sec_id, true_id, " ".join(["ข้อความ"] * rnd.randint(5, 40)))
+        # มาตรายาวข้ามหน้า -> หน้าถัดไปขึ้นต้นด้วย intro (continuation)
+        if rnd.random() < continuation:
+            for _ in range(rnd.randint(1, 3)):
+                add("intro", None, " ".join(["ต่อ"] * 20), "intro")
+        if n % 50 == 0:
+            add(f"{n}/1", f"{n}/1", "มาตราย่อย")
+        if n % 40 == 0:
+            add(f"header_after_{sec_id}", None, f"หมวด {n // 40}", "header")
+    return items, truth
+
+
+def accuracy(items, truth):
+    """(มาตราที่เลขถูก, มาตราทั้งหมด) นับจาก object เดิมที่ถูกแก้ในที่"""
+    sections = [(item, t) for item, t in zip(items, truth) if t is not None]
+    return sum(str(item["id"]) == t for item, t in sections), len(sections)
+
+
+def stream_matches_batch(const_id, batches, legacy_index, tmp_dir):
+    """Stage 1 ทั้ง 2 โหมดกับ checkpoint เดียวกัน (ไม่ OCR) -> clean output เหมือนกันไหม"""
+    legacy_map = legacy_index.section_map(const_id) if legacy_index else {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        raw = [Section.from_dict(item) for b in sorted(batches) for item in copy.deepcopy(batches[b])]
+        batch = stage1.merge_and_compare(stage1.smart_heal_sequence(raw), legacy_map, legacy_index, const_id)
+        stream = stage1.run_streaming(iter(copy.deepcopy(batches[b]) for b in sorted(batches)), legacy_map,
+                                      os.path.join(tmp_dir, f"{const_id}_clean.json"), legacy_index, const_id)
+    return json.dumps(to_dicts(batch), ensure_ascii=False) == json.dumps(to_dicts(stream), ensure_ascii=False)
+
+
+def repair_cases():
+    """[(ชื่อ, เลขที่ OCR อ่านได้, เลขที่ต้องได้หลัง repair_section_ids)]"""
+    # หน้าสลับลำดับแบบ con2495: 5-8 อยู่หลัง 38-44 แต่เป็นเลขจริง ไม่ซ้ำใคร (45-59 หายไป 15 เลข ไม่ใช่ 4)
+    scrambled = ["1", "2", "3", "4", "38", "39", "40", "41", "42", "43", "44", "5", "6", "7", "8", "60", "61", "62"]
+    return [
+        ("unique scrambled run", scrambled, scrambled),
+        ("misread in a one-number gap", ["1", "2", "8", "4", "5"], ["1", "2", "3", "4", "5"]),
+        ("misread clashing with a section", ["10", "11", "17", "13", "14", "15", "16", "17", "18"],
+         ["10", "11", "12", "13", "14", "15", "16", "17", "18"]),
+    ]
+
+
+def timed(fn, items, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        data = copy.deepcopy(items)
+        started_at = time.perf_counter()
+        result = fn(data)
+        best = min(best, time.perf_counter() - started_at)
+    return best, data, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sequence repair")
+    parser.add_argument("--sections", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    failed = False
+    legacy_index = stage1.open_legacy_index(LEGACY_JSON)
+    print(f"{'corpus':<14}{'items':>7}{'old ms':>9}{'new ms':>9}{'old out':>9}{'new out':>9}  stream == batch")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for path in sorted(glob.glob("con*_checkpoint.json")):
+            const_id = path.split("_checkpoint")[0]
+            batches = load_checkpoint(path, f"{const_id}_checkpoint.jsonl")
+            items = [item for b in sorted(batches) for item in batches[b]]
+            old_time, _, old_out = timed(legacy_heal, items)
+            new_time, _, new_out = timed(new_heal, items)
+            same = stream_matches_batch(const_id, batches, legacy_index, tmp_dir)
+            failed |= not same
+            print(f"{const_id:<14}{len(items):>7}{old_time * 1000:>9.1f}{new_time * 1000:>9.1f}"
+                  f"{len(old_out):>9}{len(new_out):>9}  {'✅' if same else '❌'}")
+    if legacy_index is not None:
+        legacy_index.close()
+
+    items, truth = synthetic(args.sections, args.seed)
+    noisy = sum(str(item["id"]) != t for item, t in zip(items, truth) if t is not None)
+    print(f"\nSynthetic: {args.sections} sections, {len(items)} items, {noisy} misread IDs (seed={args.seed})")
+    for label, fn in (("old", legacy_heal), ("new", new_heal)):
+        elapsed, data, _ = timed(fn, items, repeat=1)
+        correct, total = accuracy(data, truth)
+        print(f"   {label}: {elapsed * 1000:>8.1f} ms, correct IDs {correct}/{total} ({100 * correct / total:.2f}%)")
+
+    # ผลต้องเหมือนเดิมทุกครั้ง
+    first = new_heal(copy.deepcopy(items))
+    assert first == new_heal(copy.deepcopy(items)), "sequence repair is not deterministic"
+
+    for name, read, expected in repair_cases():
+        cases = [{"id": sec_id, "content": "", "type": "section"} for sec_id in read]
+        repair_section_ids(cases)
+        got = [item["id"] for item in cases]
+        failed |= got != expected
+        print(f"{'✅' if got == expected else '❌'} {name}: {' '.join(read)} -> {' '.join(got)}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: parse ทั้งก้อน (แบบเดิม: พังที่เดียว = ขอทั้งฉบับใหม่) เทียบกับ salvage ทีละหมวด (llm_json.py)
+
+run_batch กับ client ปลอม (ไม่เรียก API) ข้อมูลจริงจาก json_output/final:
+แต่ละหมวดใน response เสีย (quote ไม่ escape) ด้วยความน่าจะเป็น --corrupt-rate
+และ response ถูกตัดกลางทาง (max output tokens) ด้วยความน่าจะเป็น --truncate-rate
+- strict  : json.loads ทั้ง response ต้องผ่าน ไม่งั้นส่งทุกหมวดใหม่
+- salvage : เก็บหมวดที่ผ่าน schema ส่งใหม่เฉพาะหมวดที่ขาด/เสีย
+- requests / tokens (ขาเข้า ประมาณ) / done (หมวดที่ได้ผล) รวมทุกรอบ (--trials, seed ต่างกัน)
+ท้ายสุด: เวลา parse response ใหญ่ทั้งก้อน vs feed ทีละ chunk (แบบ stream)
+
+    cd backend && python benchmarks/bench_json_salvage.py con2560
+    cd backend && python benchmarks/bench_json_salvage.py con2550 --corrupt-rate 0.1
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_cache  # noqa: E402
+import llm_scheduler  # noqa: E402
+from agents import AgentSummarizer, estimate_tokens  # noqa: E402
+from benchmarks.bench_summarizer import load_groups  # noqa: E402
+from llm_json import ObjectStreamParser, summary_entry  # noqa: E402
+
+
+class FlakyJSONModels:
+    def __init__(self, corrupt_rate, truncate_rate, seed=0):
+        self.corrupt_rate = corrupt_rate
+        self.truncate_rate = truncate_rate
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.tokens = 0
+
+    def generate_content(self, model, contents, config=None):
+        data = json.loads(contents[-1].split("\n", 1)[1].rsplit("\n", 1)[0])
+        with self.lock:
+            self.requests += 1
+            self.tokens += sum(estimate_tokens(c) for c in contents)
+            corrupt = [self.rnd.random() < self.corrupt_rate for _ in data]
+            truncate = self.rnd.random() < self.truncate_rate
+        entries = []
+        for cat_id, bad in zip(data, corrupt):
+            quoted = '"อำนาจ"' if bad else '\\"อำนาจ\\"'
+            summary = f"สรุปหมวด {cat_id} ที่มีคำว่า {quoted} อยู่ในเนื้อหา"
+            entries.append(f'  "{cat_id}": {{"summary": "{summary}", "key_change": "-"}}')
+        text = "{\n" + ",\n".join(entries) + "\n}"
+        if truncate:
+            text = text[:len(text) * 2 // 3]
+        return type("Response", (), {"text": text})()
+
+
+class StrictSummarizer(AgentSummarizer):
+    def _parse_batch(self, text, expected):
+        """แบบเดิม: response ต้องเป็น JSON ที่ถูกต้องทั้งก้อน"""
+        try:
+            result = json.loads(text.strip().removeprefix("```json").removesuffix("```"))
+        except ValueError:
+            return {}
+        entries = {k: summary_entry(v) for k, v in result.items() if k in expected}
+        return {k: v for k, v in entries.items() if v}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON salvage vs whole-response parsing")
+    parser.add_argument("const_id", nargs="?", default="con2560")
+    parser.add_argument("--corrupt-rate", type=float, default=0.05, help="chance that one category entry is broken")
+    parser.add_argument("--truncate-rate", type=float, default=0.1, help="chance that a response is cut off")
+    parser.add_argument("--trials", type=int, default=20, help="runs with different seeds (totals are summed)")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.CRITICAL)
+    groups = load_groups(args.const_id)
+    print(f"{args.const_id}: {len(groups)} categories, corrupt rate {args.corrupt_rate:.0%}/category, "
+          f"truncate rate {args.truncate_rate:.0%}, {args.trials} trials\n")
+    print(f"{'mode':<10}{'requests':>10}{'tokens':>12}{'done':>10}")
+    llm_cache._shared = llm_cache.LLMCache(enabled=False)
+    for name, summarizer in (("strict", StrictSummarizer()), ("salvage", AgentSummarizer())):
+        requests = tokens = done = 0
+        for seed in range(args.trials):
+            models = FlakyJSONModels(args.corrupt_rate, args.truncate_rate, seed)
+            llm_scheduler.set_client(type("FakeClient", (), {"models": models})())
+            llm_scheduler._shared = llm_scheduler.LLMScheduler(
+                {summarizer.model_name: (1, 0)}, max_retries=10, backoff_base=0, seed=seed)
+            done += len(summarizer.run_batch(groups))
+            requests += models.requests
+            tokens += models.tokens
+        print(f"{name:<10}{requests:>10}{tokens:>12}{done:>5}/{len(groups) * args.trials}")
+
+    big = json.dumps({f"cat{i}": {"summary": "ข้อความ " * 200, "key_change": "-"} for i in range(200)},
+                     ensure_ascii=False)
+    started_at = time.perf_counter()
+    json.loads(big)
+    whole = time.perf_counter() - started_at
+    started_at = time.perf_counter()
+    stream = ObjectStreamParser()
+    count = sum(len(stream.feed(big[i:i + 64])) for i in range(0, len(big), 64))
+    streamed = time.perf_counter() - started_at
+    print(f"\nparse {len(big) / 1e6:.1f} MB response: json.loads {whole * 1000:.1f} ms, "
+          f"stream parser (64-char chunks, {count} entries) {streamed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: legacy index (SQLite + MinHash LSH) เทียบกับการ parse constitutions.json ทุกครั้ง
+
+1. โหลด section map ของทุกฉบับ: json.load + scan (แบบเดิม) vs query จาก index
+2. fuzzy lookup: ใส่ noise แบบ OCR ให้ทุก legacy section แล้วค้นด้วย MinHash
+   วัด recall (section จริงอยู่ใน candidate) และจำนวน candidate ที่ต้องเทียบจริงเทียบกับ scan ทั้งฉบับ
+
+    cd backend && python benchmarks/bench_legacy_index.py
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import LEGACY_JSON  # noqa: E402
+from legacy_index import LegacyIndex, build_index  # noqa: E402
+
+
+def legacy_load(json_path, target_id):
+    """load_legacy_data แบบเดิม (parse ทั้งไฟล์ + หา ID แบบ linear)"""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    target = next((c for c in data if c.get("id") == target_id), None)
+    return {str(sec["id"]): sec["content"] for sec in (target or {}).get("sections", [])}
+
+
+def ocr_noise(text, rnd, rate=0.03):
+    chars = list(text)
+    for i in range(len(chars)):
+        if rnd.random() < rate:
+            chars[i] = rnd.choice("กขคงจดตทนบปมรลวสอะาิีุู่้")
+    return "".join(chars)
+
+
+def main():
+    with open(LEGACY_JSON, "r", encoding="utf-8") as f:
+        const_ids = sorted({c["id"] for c in json.load(f)})
+
+    started_at = time.perf_counter()
+    build_index()
+    print(f"Index build: {(time.perf_counter() - started_at) * 1000:.0f} ms (once per JSON change)")
+
+    started_at = time.perf_counter()
+    old_maps = {const_id: legacy_load(LEGACY_JSON, const_id) for const_id in const_ids}
+    old_time = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    index = LegacyIndex()
+    new_maps = {const_id: index.section_map(const_id) for const_id in const_ids}
+    new_time = time.perf_counter() - started_at
+    same = sum(old_maps[c] == new_maps[c] for c in const_ids)
+    print(f"Load {len(const_ids)} section maps: json {old_time * 1000:.0f} ms, index {new_time * 1000:.1f} ms "
+          f"({old_time / new_time:.0f}x), identical {same}/{len(const_ids)}")
+
+    rnd = random.Random(0)
+    queries = hits = top1 = compared = scanned = 0
+    started_at = time.perf_counter()
+    for const_id, section_map in new_maps.items():
+        for section_id, content in section_map.items():
+            if len(content) < 40: continue
+            candidates = index.candidates(const_id, ocr_noise(content, rnd))
+            queries += 1
+            hits += section_id in candidates
+            top1 += bool(candidates) and candidates[0] == section_id
+            compared += len(candidates)
+            scanned += len(section_map)
+    elapsed = time.perf_counter() - started_at
+    print(f"Fuzzy lookup ({queries} noisy sections, 3% char noise): recall {hits / queries:.1%}, "
+          f"top-1 {top1 / queries:.1%}, {compared / queries:.1f} candidates vs {scanned / queries:.1f} per full scan, "
+          f"{elapsed / queries * 1000:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
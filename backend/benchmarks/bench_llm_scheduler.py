@@ -0,0 +1,115 @@
+"""
+Benchmark: retry แบบเดิม (sleep ตายตัว) เทียบกับ llm_scheduler.LLMScheduler ภายใต้โควต้า API
+
+server ปลอม (ไม่เรียก API): รับได้ --quota request ต่อ "นาที" (หน้าต่างเลื่อนยาว --minute วินาที)
+เกินโควต้า = 429 พร้อม retryDelay, นอกนั้นสุ่ม 503 ด้วยความน่าจะเป็น --error-rate, latency = --latency
+--jobs งาน จาก --threads thread พร้อมกัน (เหมือนหลายหมวด/หลายฉบับยิงพร้อมกัน)
+- fixed sleep : ลอง 3 ครั้ง, ล้มเหลว -> sleep 5 "วินาที" (แบบ run_batch เดิม, ย่อเวลาตาม --minute)
+- scheduler   : LLMScheduler ตั้ง RPM = --quota (ต่อนาทีจำลอง), concurrency = --concurrency
+- wall / sent (request ที่ส่งจริง) / 429 / done (งานที่ได้ผล)
+
+    cd backend && python benchmarks/bench_llm_scheduler.py
+    cd backend && python benchmarks/bench_llm_scheduler.py --jobs 120 --error-rate 0.2
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_scheduler import LLMRequestError, LLMScheduler  # noqa: E402
+
+
+class QuotaError(Exception):
+    code = 429
+
+
+class FakeQuotaServer:
+    def __init__(self, quota, minute, latency, error_rate, seed=0):
+        self.quota = quota
+        self.minute = minute
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = deque()
+        self.sent = 0
+        self.rejected = 0
+
+    def generate(self):
+        with self.lock:
+            now = time.monotonic()
+            self.sent += 1
+            while self.window and now - self.window[0] >= self.minute:
+                self.window.popleft()
+            if len(self.window) >= self.quota:
+                self.rejected += 1
+                retry = self.window[0] + self.minute - now
+                raise QuotaError(f"429 RESOURCE_EXHAUSTED. {{'retryDelay': '{retry:.2f}s'}}")
+            self.window.append(now)
+            failed = self.rnd.random() < self.error_rate
+        time.sleep(self.latency)
+        if failed:
+            raise RuntimeError("503 UNAVAILABLE (injected)")
+        return "{}"
+
+
+def fixed_sleep(server, scale):
+    """แบบเดิม: 3 attempt, sleep 5 วินาทีหลัง error (ไม่สน retry-after, ไม่ jitter)"""
+    for _ in range(3):
+        try:
+            return server.generate()
+        except Exception:
+            time.sleep(5 * scale)
+    return None
+
+
+def scheduled(scheduler, server):
+    try:
+        return scheduler.request("model", server.generate)
+    except LLMRequestError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the shared LLM request scheduler")
+    parser.add_argument("--jobs", type=int, default=60)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--quota", type=int, default=30, help="requests allowed per minute")
+    parser.add_argument("--minute", type=float, default=6.0, help="simulated length of one minute (s)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    scale = args.minute / 60  # sleep แบบเดิม (วินาทีจริง) ย่อตามนาทีจำลอง
+    print(f"{args.jobs} jobs from {args.threads} threads, quota {args.quota}/min (1 min = {args.minute:g}s), "
+          f"error rate {args.error_rate:.0%}\n")
+    print(f"{'mode':<14}{'wall s':>8}{'sent':>7}{'429':>6}{'done':>9}")
+
+    for name in ("fixed sleep", "scheduler"):
+        server = FakeQuotaServer(args.quota, args.minute, args.latency, args.error_rate, args.seed)
+        if name == "scheduler":
+            scheduler = LLMScheduler({"model": (args.concurrency, args.quota / scale)}, backoff_base=scale,
+                                     backoff_max=args.minute, breaker_cooldown=args.minute, seed=args.seed)
+            job = lambda: scheduled(scheduler, server)  # noqa: E731
+        else:
+            job = lambda: fixed_sleep(server, scale)  # noqa: E731
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(lambda _: job(), range(args.jobs)))
+        elapsed = time.perf_counter() - started_at
+        done = sum(r is not None for r in results)
+        print(f"{name:<14}{elapsed:>8.1f}{server.sent:>7}{server.rejected:>6}{done:>5}/{args.jobs}")
+
+
+if __name__ == "__main__":
+    main()
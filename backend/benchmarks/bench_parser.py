@@ -0,0 +1,90 @@
+"""
+Benchmark: section_lexer (ConstitutionMerger._parse_markdown_to_json) เทียบกับ parser แบบ regex เดิม
+
+markdown ของแต่ละหน้าสร้างจาก con*_checkpoint.json (แบบเดียวกับ ReplayBackend)
+
+    cd backend && python benchmarks/bench_parser.py
+"""
+import glob
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint import load_checkpoint  # noqa: E402
+from merger import ConstitutionMerger  # noqa: E402
+from ocr_backends import ReplayBackend, sections_to_markdown  # noqa: E402
+
+
+def legacy_parse(merger, markdown_text):
+    """parser เดิม (split ด้วย regex + regex หา หมวด/ส่วน ท้าย section) เก็บไว้เทียบ"""
+    sections = []
+    text = merger._clean_text(markdown_text.replace("**", ""))
+    chunks = re.split(r"(?:^|\n)มาตรา\s*([๐-๙0-9]+)", text)
+    if chunks[0].strip():
+        sections.append({"id": "intro", "content": chunks[0].strip(), "type": "intro", "status": "OCR"})
+    for i in range(1, len(chunks), 2):
+        sec_id = chunks[i].strip().translate(str.maketrans("๐๑๒๓๔๕๖๗๘๙", "0123456789"))
+        clean_content = re.sub(r'\n+', ' ', chunks[i + 1].strip()).strip()
+        match = re.search(r"(.*?)\s+(หมวด\s*[๐-๙0-9]+.*?|ส่วนที่\s*[๐-๙0-9]+.*?)$", clean_content)
+        if match:
+            sections.append({"id": sec_id, "content": match.group(1).strip(), "type": "section", "status": "OCR"})
+            sections.append({"id": f"header_after_{sec_id}", "content": match.group(2).strip(),
+                             "type": "header", "status": "OCR"})
+        else:
+            sections.append({"id": sec_id, "content": clean_content, "type": "section", "status": "OCR"})
+    return sections
+
+
+def corpus_pages(const_id):
+    replay = ReplayBackend()
+    batches = load_checkpoint(f"{const_id}_checkpoint.json", f"{const_id}_checkpoint.jsonl")
+    return [
+        sections_to_markdown(chunk)
+        for batch_num in sorted(batches)
+        for chunk in replay._split_pages(batches[batch_num])
+    ]
+
+
+def timed(fn, pages, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = [fn(page) for page in pages]
+        best = min(best, time.perf_counter() - started_at)
+    return best, result
+
+
+def main():
+    merger = ConstitutionMerger(use_cache=False, backend=ReplayBackend())
+    const_ids = sorted(p.split("_checkpoint")[0] for p in glob.glob("con*_checkpoint.json"))
+
+    print(f"{'corpus':<14}{'pages':>6}{'KB':>8}{'regex ms':>10}{'lexer ms':>10}{'speedup':>9}  same output")
+    total_old = total_new = 0.0
+    for const_id in const_ids:
+        pages = corpus_pages(const_id)
+        size_kb = sum(len(p.encode("utf-8")) for p in pages) / 1024
+        old_time, old_result = timed(lambda p: legacy_parse(merger, p), pages)
+        new_time, new_result = timed(merger._parse_markdown_to_json, pages)
+        total_old += old_time
+        total_new += new_time
+        # offset (provenance) มีแต่ parser ใหม่ -> ไม่นับตอนเทียบ
+        without_offset = [[{k: v for k, v in item.items() if k != "offset"} for item in page] for page in new_result]
+        same = sum(a == b for a, b in zip(old_result, without_offset))
+        print(f"{const_id:<14}{len(pages):>6}{size_kb:>8.0f}{old_time * 1000:>10.1f}{new_time * 1000:>10.1f}"
+              f"{old_time / new_time:>8.1f}x  {same}/{len(pages)} pages")
+    print(f"{'TOTAL':<28}{total_old * 1000:>10.1f}{total_new * 1000:>10.1f}{total_old / total_new:>8.1f}x")
+
+    # มาตรายาวมากที่ไม่มีหมวดต่อท้าย: regex เดิมเป็น O(n^2)
+    print("\nLong section without trailing header:")
+    for words in (250, 500, 1_000, 2_000):
+        page = "มาตรา ๑ " + " ".join(["ข้อความ"] * words)
+        old_time, _ = timed(lambda p: legacy_parse(merger, p), [page], repeat=1)
+        new_time, _ = timed(merger._parse_markdown_to_json, [page], repeat=1)
+        print(f"   {words:>6} words: regex {old_time * 1000:>9.1f} ms, lexer {new_time * 1000:>6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark search_index: เวลาค้นวลีด้วย n-gram index เทียบกับการไล่หาในทุก *_full_summary.json (ไม่เรียก API)
+
+- scan       : โหลดทุก full_summary + normalize + หาวลีทุกมาตรา (วิธีเดิม)
+- index_cold : SearchIndex.load + search (รวมเวลาโหลด shard/ข้อความที่ต้องใช้จาก json_output/search)
+- index_warm : search ซ้ำกับ index ที่โหลดไว้แล้ว
+- phrase     : query ที่มีช่องว่าง ("มาตรา 7") ต้องได้เฉพาะมาตราที่มีวลีนั้นติดกันทั้งวลี (เทียบ substring ตรงๆ)
++ corpus สังเคราะห์ x10 (ทุกฉบับซ้ำ 10 ชุด) เทียบ scan กับ index_warm ใน memory -> latency ของ index ต้องไม่โตตาม corpus
+
+    cd backend && python search_index.py build && python benchmarks/bench_search.py
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import OUTPUT_DIR_FINAL, OUTPUT_DIR_SEARCH  # noqa: E402
+from search_index import SearchIndex, iter_documents, normalize_text, query_phrases  # noqa: E402
+
+PHRASE_QUERIES = ("มาตรา 7", "พระมหากษัตริย์ทรง แต่งตั้ง", "สภาผู้แทนราษฎร ประกอบด้วย")
+QUERIES = ("สิทธิเสรีภาพ", "ศาลรัฐธรรมนูญ", "พระมหากษัตริย์ + ทรงแต่งตั้ง", "สภาผู้แทนราษฎร", "มาตรา ๑๒", "มาตรา 7")
+
+
+def best_ms(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started_at = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started_at)
+        finally:
+            gc.enable()
+    return best * 1000
+
+
+def scan_files(query):
+    """วิธีเดิม: โหลดทุกไฟล์แล้วไล่หาทุกวลีในทุกมาตรา"""
+    phrases = query_phrases(query)
+    return [(const_id, sec_id) for const_id, sec_id, _, content in iter_documents(OUTPUT_DIR_FINAL)
+            if all(p in normalize_text(content) for p in phrases)]
+
+
+def scan_texts(texts, query):
+    phrases = query_phrases(query)
+    return [i for i, text in enumerate(texts) if all(p in text for p in phrases)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search index vs full scan")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=int, default=10, help="synthetic corpus multiple")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(OUTPUT_DIR_SEARCH, "manifest.json")):
+        sys.exit(f"❌ No index at {OUTPUT_DIR_SEARCH} (run: python search_index.py build)")
+    documents = list(iter_documents(OUTPUT_DIR_FINAL))
+    scaled = [(f"{const_id}_{n}", sec_id, cat_id, content)
+              for n in range(args.scale) for const_id, sec_id, cat_id, content in documents]
+    started_at = time.perf_counter()
+    big = SearchIndex.build(scaled)
+    build_ms = (time.perf_counter() - started_at) * 1000
+    big_texts = [big._text(doc_id) for doc_id in range(len(big.docs))]
+    warm = SearchIndex.load(OUTPUT_DIR_SEARCH)
+
+    print(f"corpus: {len(documents)} sections, x{args.scale} = {len(scaled)} sections "
+          f"(in-memory build {build_ms:.0f} ms)")
+    print(f"{'query':<30}{'hits':>6}{'scan':>10}{'cold':>10}{'warm':>10}"
+          f"{'scan x' + str(args.scale):>12}{'warm x' + str(args.scale):>12}   (ms)")
+    for query in QUERIES:
+        expected = scan_files(query)
+        hits = warm.search(query, limit=len(documents))
+        if sorted((h.const_id, h.section_id) for h in hits) != sorted(expected):
+            sys.exit(f"❌ Index and scan disagree on {query!r}: {len(hits)} vs {len(expected)} hits")
+        timings = [
+            best_ms(lambda: scan_files(query), args.repeat),
+            best_ms(lambda: SearchIndex.load(OUTPUT_DIR_SEARCH).search(query), args.repeat),
+            best_ms(lambda: warm.search(query), args.repeat),
+            best_ms(lambda: scan_texts(big_texts, query), args.repeat),
+            best_ms(lambda: big.search(query), args.repeat),
+        ]
+        print(f"{query:<30}{len(expected):>6}" + "".join(f"{t:>10.1f}" for t in timings[:3])
+              + "".join(f"{t:>12.1f}" for t in timings[3:]))
+
+    for query in PHRASE_QUERIES:
+        phrase = normalize_text(query)
+        expected = sorted((const_id, sec_id) for const_id, sec_id, _, content in documents
+                          if phrase in normalize_text(content))
+        hits = warm.search(query, limit=len(documents))
+        if sorted((h.const_id, h.section_id) for h in hits) != expected:
+            sys.exit(f"❌ Phrase {query!r}: {len(hits)} hits, {len(expected)} sections contain it")
+        print(f"✅ {query!r}: {len(hits)} hits, all contain the whole phrase")
+
+    sizes = {}
+    for root, _, names in os.walk(OUTPUT_DIR_SEARCH):
+        for name in names:
+            kind = name.rsplit(".", 1)[-1]
+            sizes[kind] = sizes.get(kind, 0) + os.path.getsize(os.path.join(root, name))
+    print("\n📦 " + ", ".join(f"{kind} {size / 1024:.0f}K" for kind, size in sorted(sizes.items())))
+    print(f"🔎 x{args.scale}: {len(big._postings)} grams, {sum(len(p) for p in big._postings.values())} postings")
+
+
+if __name__ == "__main__":
+    main()
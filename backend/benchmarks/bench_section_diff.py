@@ -0,0 +1,94 @@
+"""
+Benchmark section_diff: diff ทุกแถวที่จับคู่แล้วแบบตรงๆ เทียบกับ hash skip + cache (ไม่เรียก API)
+
+ทุกคู่ฉบับที่มีผล Stage 3 (ทั้ง 2 ทิศทาง, 1 process):
+- naive : diff_texts ทุกแถวที่มีทั้ง 2 ฝั่ง (ข้อความเหมือนกันก็ tokenize + diff)
+- cached: DiffCache (ข้ามข้อความเหมือนกันด้วย hash, คู่ข้อความซ้ำ/กลับด้านใช้ผลเดิม) แบบที่ section_diff.py ใช้
+- char  : diff ทีละตัวอักษรแทน character cluster (เทียบจำนวน opcode / ขนาด)
+- ok    : ใช้ opcode ประกอบข้อความขวาจากข้อความซ้ายได้ตรงทุกแถว
+
+    cd backend && python benchmarks/bench_section_diff.py             # 20 คู่ฉบับแรก
+    cd backend && python benchmarks/bench_section_diff.py --pairs 0   # ทุกคู่
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from difflib import SequenceMatcher
+from itertools import combinations
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import section_diff  # noqa: E402
+from config import OUTPUT_DIR_ALIGNMENT  # noqa: E402
+
+stage3 = section_diff.stage3
+
+
+def char_ops(left, right):
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, left, right, autojunk=False).get_opcodes():
+        if tag != "equal":
+            ops += [section_diff._OPCODES[tag], i1, i2, j1, j2]
+    return ops
+
+
+def apply_ops(left, right, ops):
+    parts, pos = [], 0
+    for k in range(0, len(ops), 5):
+        _, l1, l2, r1, r2 = ops[k:k + 5]
+        parts += [left[pos:l1], right[r1:r2]]
+        pos = l2
+    parts.append(left[pos:])
+    return "".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark precomputed section diffs")
+    parser.add_argument("--pairs", type=int, default=20, help="number of constitution pairs (0 = all)")
+    args = parser.parse_args()
+
+    pairs = [
+        (id_a, id_b) for id_a, id_b in combinations(stage3.list_summarized_ids(), 2)
+        if os.path.exists(os.path.join(OUTPUT_DIR_ALIGNMENT, f"{id_a}-vs-{id_b}.json"))
+    ]
+    pairs = pairs[:args.pairs] if args.pairs else pairs
+    sections = {}
+    text_pairs = []
+    for id_a, id_b in pairs:
+        for left_id, right_id in ((id_a, id_b), (id_b, id_a)):
+            for const_id in (left_id, right_id):
+                if const_id not in sections:
+                    sections[const_id] = {s["id"]: s["content"] for s in stage3.load_sections(const_id)}
+            with open(os.path.join(OUTPUT_DIR_ALIGNMENT, f"{left_id}-vs-{right_id}.json"), encoding="utf-8") as f:
+                rows = json.load(f)["rows"]
+            text_pairs += [(sections[left_id][r[2]], sections[right_id][r[3]])
+                           for r in rows if r[2] is not None and r[3] is not None]
+
+    started_at = time.perf_counter()
+    naive = [section_diff.diff_texts(left, right) for left, right in text_pairs]
+    naive_s = time.perf_counter() - started_at
+
+    cache = section_diff.DiffCache()
+    started_at = time.perf_counter()
+    cached = [cache.get(left, right) or [] for left, right in text_pairs]
+    cached_s = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    chars = [char_ops(left, right) for left, right in text_pairs]
+    char_s = time.perf_counter() - started_at
+
+    ok = all(apply_ops(left, right, ops) == right for (left, right), ops in zip(text_pairs, cached))
+    print(f"📦 {len(pairs)} constitution pairs, {len(text_pairs)} aligned rows "
+          f"({cache.computed} diffed, {cache.reused} reused, {cache.identical} identical)")
+    print(f"{'mode':<8}{'time':>10}{'ops':>10}{'JSON KB':>10}")
+    for name, seconds, result in (("naive", naive_s, naive), ("cached", cached_s, cached), ("char", char_s, chars)):
+        n_ops = sum(len(ops) // 5 for ops in result)
+        size = len(json.dumps(result, separators=(",", ":"))) / 1024
+        print(f"{name:<8}{seconds * 1000:>8.0f}ms{n_ops:>10}{size:>10.0f}")
+    print(f"{'✅' if ok else '❌'} opcodes rebuild the right-hand text for every row")
+
+
+if __name__ == "__main__":
+    main()
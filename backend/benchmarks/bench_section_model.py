@@ -0,0 +1,121 @@
+"""
+Benchmark section_model: dict เทียบกับ Section (__slots__) ต่อ corpus (ไม่เรียก API)
+
+ต่อฉบับ (json_output/clean/<id>_clean.json + con*_checkpoint.json) + corpus สังเคราะห์ x10 (ทุกฉบับต่อกัน 10 ชุด):
+- memory   : หน่วยความจำที่ถือไว้หลังโหลดทั้งไฟล์ (tracemalloc, รวมข้อความ) ต่อ section
+             Section ใช้ string ซ้ำร่วมกัน (type/status, diff_versions.ai_ocr == content)
+- load     : json.load -> dict / -> Section (รวม from_dict)
+- sort     : sort ด้วย section_sort_key (dict parse id ทุกครั้ง, Section ใช้ sid.key ที่คำนวณไว้)
+- pipeline : smart_heal_sequence + merge_duplicates + sort กับ section จาก checkpoint (แบบ Stage 1)
+
+    cd backend && python benchmarks/bench_section_model.py
+"""
+import argparse
+import contextlib
+import copy
+import gc
+import glob
+import importlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint import load_checkpoint  # noqa: E402
+from config import OUTPUT_DIR_CLEAN  # noqa: E402
+from section_model import Section  # noqa: E402
+from sequence_repair import merge_duplicates  # noqa: E402
+
+stage1 = importlib.import_module("01_ocr_extraction")
+
+
+def best_ms(fn, prepare=None, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        data = prepare() if prepare else None
+        gc.collect()
+        gc.disable()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                started_at = time.perf_counter()
+                fn(data)
+                best = min(best, time.perf_counter() - started_at)
+        finally:
+            gc.enable()
+    return best * 1000
+
+
+def allocated(build):
+    """bytes ที่ build() จองเพิ่ม (ผลลัพธ์ยังถืออยู่ตอนวัด)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def measure(text, raw_batches, repeat):
+    items = json.loads(text)
+    dict_bytes = allocated(lambda: json.loads(text))
+    section_bytes = allocated(lambda: [Section.from_dict(item) for item in json.loads(text)])
+    sections = [Section.from_dict(item) for item in items]
+
+    def pipeline(batch):
+        healed = stage1.smart_heal_sequence(batch)
+        final_list = merge_duplicates(healed)
+        final_list.sort(key=stage1.section_sort_key)
+
+    raw = [item for batch in raw_batches for item in batch]
+    return {
+        "sections": len(items),
+        "dict_bytes": dict_bytes,
+        "section_bytes": section_bytes,
+        "saved": 1 - section_bytes / dict_bytes if dict_bytes else 0.0,
+        "load_dict": best_ms(lambda _: json.loads(text), repeat=repeat),
+        "load_section": best_ms(lambda _: [Section.from_dict(i) for i in json.loads(text)], repeat=repeat),
+        "sort_dict": best_ms(lambda data: data.sort(key=stage1.section_sort_key), lambda: list(items), repeat),
+        "sort_section": best_ms(lambda data: data.sort(key=stage1.section_sort_key), lambda: list(sections), repeat),
+        "pipeline_dict": best_ms(pipeline, lambda: copy.deepcopy(raw), repeat),
+        "pipeline_section": best_ms(pipeline, lambda: [Section.from_dict(i) for i in copy.deepcopy(raw)], repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="dict vs slotted Section: memory and time per corpus")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=int, default=10)
+    args = parser.parse_args()
+
+    suffix = "_clean.json"
+    corpora = []
+    for path in sorted(glob.glob(os.path.join(OUTPUT_DIR_CLEAN, f"*{suffix}"))):
+        const_id = os.path.basename(path)[:-len(suffix)]
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        batches = load_checkpoint(f"{const_id}_checkpoint.json", f"{const_id}_checkpoint.jsonl")
+        corpora.append((const_id, text, [batches[n] for n in sorted(batches)]))
+    every_item = [item for _, text, _ in corpora for item in json.loads(text)]
+    every_batch = [batch for _, _, batches in corpora for batch in batches]
+    corpora.append((f"all x{args.scale}", json.dumps(every_item * args.scale, ensure_ascii=False),
+                    every_batch * args.scale))
+
+    print(f"{'corpus':<14}{'sections':>9}{'dict B/sec':>11}{'slot B/sec':>11}{'saved':>7}"
+          f"{'load dict':>11}{'slot':>8}{'sort dict':>11}{'slot':>8}{'heal dict':>11}{'slot':>8}   (ms)")
+    for name, text, batches in corpora:
+        r = measure(text, batches, args.repeat if not name.startswith("all") else 1)
+        n = max(r["sections"], 1)
+        print(f"{name:<14}{r['sections']:>9}{r['dict_bytes'] / n:>11.0f}{r['section_bytes'] / n:>11.0f}"
+              f"{r['saved']:>7.0%}{r['load_dict']:>11.1f}{r['load_section']:>8.1f}"
+              f"{r['sort_dict']:>11.2f}{r['sort_section']:>8.2f}"
+              f"{r['pipeline_dict']:>11.1f}{r['pipeline_section']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark: similarity engine (levenshtein bit-parallel) เทียบกับ difflib แบบเดิม
+
+คู่ข้อความ (OCR, legacy) สร้างจาก con*_checkpoint.json ผ่าน heal + merge แบบเดียวกับ Stage 1
+- exact     : คะแนนเต็ม (ที่ Stage 1 เก็บใน "similarity")
+- threshold : ตัดสิน > SIMILARITY_THRESHOLD อย่างเดียว (ตัวกรอง + หยุดก่อน)
+- agree     : จำนวนคู่ที่ difflib กับ levenshtein ตัดสิน VERIFIED เหมือนกัน
+- baseline  : finalize_section / finalize_sections (ทีละคู่ + process pool) ให้ similarity + status
+              ตรงกับ json_output/clean ที่ commit ไว้ทุกมาตรา (รวมคะแนนจริงของ REVIEW_NEEDED) -> ไม่ตรง = exit 1
+
+    cd backend && python benchmarks/bench_similarity.py
+    cd backend && python benchmarks/bench_similarity.py --workers 4
+"""
+import argparse
+import contextlib
+import copy
+import glob
+import importlib
+import io
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from checkpoint import load_checkpoint  # noqa: E402
+from config import LEGACY_JSON, OUTPUT_DIR_CLEAN, SIMILARITY_THRESHOLD  # noqa: E402
+from sequence_repair import merge_duplicates  # noqa: E402
+import similarity  # noqa: E402
+from similarity import SimilarityEngine  # noqa: E402
+
+stage1 = importlib.import_module("01_ocr_extraction")
+
+
+def corpus_pairs(const_id):
+    batches = load_checkpoint(f"{const_id}_checkpoint.json", f"{const_id}_checkpoint.jsonl")
+    items = [item for b in sorted(batches) for item in batches[b]]
+    with contextlib.redirect_stdout(io.StringIO()):
+        sections = merge_duplicates(stage1.smart_heal_sequence(items))
+    legacy_map = stage1.load_legacy_data(LEGACY_JSON, const_id)
+    return [
+        (stage1.convert_thai_numerals(item["content"]), legacy_map[str(item["id"])])
+        for item in sections if str(item["id"]) in legacy_map
+    ]
+
+
+def baseline_mismatches(workers):
+    """
+    มาตราใน json_output/clean ที่เทียบ legacy ด้วยเลขตรงกัน (ไม่นับ legacy_id จาก match_misnumbered)
+    -> คำนวณใหม่จาก diff_versions แล้วนับตัวที่ similarity/status ไม่ตรงกับไฟล์
+    """
+    checked, mismatches = 0, []
+    for path in sorted(glob.glob(os.path.join(OUTPUT_DIR_CLEAN, "*_clean.json"))):
+        with open(path, "r", encoding="utf-8") as f:
+            expected = [item for item in json.load(f) if "diff_versions" in item and "legacy_id" not in item]
+        legacy_map = {str(item["id"]): item["diff_versions"]["legacy_json"] for item in expected}
+        fresh = [dict(copy.deepcopy(item), content=item["diff_versions"]["ai_ocr"]) for item in expected]
+        single = [stage1.finalize_section(copy.deepcopy(item), legacy_map) for item in fresh]
+        pooled = stage1.finalize_sections(fresh, legacy_map, workers)
+        for old, new_single, new_pooled in zip(expected, single, pooled):
+            checked += 1
+            for new in (new_single, new_pooled):
+                if (new["similarity"], new["status"]) != (old["similarity"], old["status"]):
+                    mismatches.append((os.path.basename(path), old["id"], old["similarity"], new["similarity"]))
+                    break
+    return checked, mismatches
+
+
+def timed(fn, pairs):
+    started_at = time.perf_counter()
+    result = [fn(a, b) for a, b in pairs]
+    return time.perf_counter() - started_at, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark legacy similarity")
+    parser.add_argument("--workers", type=int, default=4, help="process pool size for the whole-corpus run")
+    args = parser.parse_args()
+
+    difflib = SimilarityEngine("difflib")
+    lev = SimilarityEngine("levenshtein")
+    threshold = SIMILARITY_THRESHOLD
+    impl = "rapidfuzz" if similarity._rapidfuzz_levenshtein is not None else "pure Python bit-parallel"
+    print(f"levenshtein implementation: {impl}\n")
+
+    print(f"{'corpus':<14}{'pairs':>6}{'difflib ms':>12}{'exact ms':>10}{'thresh ms':>11}{'speedup':>9}"
+          f"{'agree':>9}{'mean |d|':>10}")
+    all_pairs = []
+    totals = [0.0, 0.0, 0.0]
+    for path in sorted(glob.glob("con*_checkpoint.json")):
+        const_id = path.split("_checkpoint")[0]
+        pairs = corpus_pairs(const_id)
+        if not pairs: continue
+        all_pairs.extend(pairs)
+        old_time, old_scores = timed(difflib.score, pairs)
+        new_time, new_scores = timed(lev.score, pairs)
+        dec_time, _ = timed(lev.is_verified, pairs)
+        for i, t in enumerate((old_time, new_time, dec_time)):
+            totals[i] += t
+        agree = sum((o > threshold) == (n > threshold) for o, n in zip(old_scores, new_scores))
+        mean_diff = sum(abs(o - n) for o, n in zip(old_scores, new_scores)) / len(pairs)
+        print(f"{const_id:<14}{len(pairs):>6}{old_time * 1000:>12.1f}{new_time * 1000:>10.1f}"
+              f"{dec_time * 1000:>11.1f}{old_time / new_time:>8.1f}x{agree:>5}/{len(pairs):<3}{mean_diff:>10.4f}")
+    print(f"{'TOTAL':<20}{totals[0] * 1000:>12.1f}{totals[1] * 1000:>10.1f}{totals[2] * 1000:>11.1f}"
+          f"{totals[0] / totals[1]:>8.1f}x")
+
+    started_at = time.perf_counter()
+    lev.score_pairs(all_pairs, workers=args.workers)
+    print(f"\nProcess pool ({args.workers} workers, {len(all_pairs)} pairs): "
+          f"{(time.perf_counter() - started_at) * 1000:.1f} ms (includes pool start-up)")
+
+    checked, mismatches = baseline_mismatches(args.workers)
+    review = sum(1 for path in glob.glob(os.path.join(OUTPUT_DIR_CLEAN, "*_clean.json"))
+                 for item in json.load(open(path, encoding="utf-8")) if item.get("status") == "REVIEW_NEEDED")
+    print(f"\n{'✅' if not mismatches else '❌'} Stage 1 scores vs committed clean output: "
+          f"{checked - len(mismatches)}/{checked} match ({review} REVIEW_NEEDED)")
+    for name, sec_id, old, new in mismatches[:10]:
+        print(f"   {name} มาตรา {sec_id}: {old} -> {new}")
+
+    # มาตรายาวไม่มีเว้นวรรค + OCR ผิด 3%
+    print("\nLong Thai section without spaces:")
+    rnd = random.Random(0)
+    alphabet = "กขคงจฉชซญดตถทธนบปผพฟภมยรลวศสหอฮะาิีึืุูเแโใไ่้๊๋็์ั"
+    for length in (1_000, 4_000, 16_000):
+        a = "".join(rnd.choice(alphabet) for _ in range(length))
+        b = "".join(ch if rnd.random() > 0.03 else rnd.choice(alphabet) for ch in a)
+        old_time, (old,) = timed(difflib.score, [(a, b)])
+        new_time, (new,) = timed(lev.score, [(a, b)])
+        print(f"   {length:>6} chars: difflib {old_time * 1000:>8.1f} ms ({old:.3f}), "
+              f"levenshtein {new_time * 1000:>7.1f} ms ({new:.3f})")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
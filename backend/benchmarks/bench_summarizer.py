@@ -0,0 +1,126 @@
+"""
+Benchmark: สรุปทั้งฉบับใน request เดียว (run_batch) เทียบกับแยกหมวดพร้อมกัน (run_concurrent)
+
+ใช้ client ปลอม (ไม่เรียก API):
+latency = --base + token ขาเข้า / --tokens-per-sec + token ขาออก / --output-tokens-per-sec
+(ขาออก ~--summary-tokens ต่อหมวด) และแต่ละ request ล้มเหลวด้วยความน่าจะเป็น --error-rate
+ข้อมูลจริงจาก json_output/final (จัดกลุ่มแบบเดียวกับ Stage 2)
+- wall     : เวลาทั้งหมด (รวม backoff ตอน retry ใน llm_scheduler, ไม่จำกัด RPM)
+- requests : จำนวน request ที่ส่ง
+- tokens   : token ขาเข้าทั้งหมด (ประมาณ) = ต้นทุนรวม retry
+- done     : จำนวนหมวดที่ได้ผลสรุป
+แถว "re-run" = รันซ้ำด้วยข้อมูลเดิม ผ่าน LLM cache (SQLite ชั่วคราว) ของรอบ per-category
+
+    cd backend && python benchmarks/bench_summarizer.py con2560
+    cd backend && python benchmarks/bench_summarizer.py con2550 --error-rate 0.2
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_cache  # noqa: E402
+import llm_scheduler  # noqa: E402
+from agents import AgentSummarizer, estimate_tokens  # noqa: E402
+from config import get_run_config  # noqa: E402
+
+
+class FakeModels:
+    def __init__(self, base, tokens_per_sec, output_tokens_per_sec, summary_tokens, error_rate, seed=0):
+        self.base = base
+        self.tokens_per_sec = tokens_per_sec
+        self.output_tokens_per_sec = output_tokens_per_sec
+        self.summary_tokens = summary_tokens
+        self.error_rate = error_rate
+        self.rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.tokens = 0
+
+    def generate_content(self, model, contents, config=None):
+        tokens = sum(estimate_tokens(c) for c in contents)
+        with self.lock:
+            self.requests += 1
+            self.tokens += tokens
+            failed = self.rnd.random() < self.error_rate
+        data = contents[-1].split("\n", 1)[1].rsplit("\n", 1)[0]
+        payload = json.loads(data)
+        outputs = len(payload) if isinstance(payload, dict) else 1  # run_batch: ทุกหมวดใน response เดียว
+        time.sleep(self.base + tokens / self.tokens_per_sec + outputs * self.summary_tokens / self.output_tokens_per_sec)
+        if failed:
+            raise RuntimeError("503 UNAVAILABLE (injected)")
+
+        result = {"summary": "สรุป", "key_change": "-"}
+        if isinstance(payload, dict):
+            result = {cat_id: dict(result) for cat_id in payload}
+        return type("Response", (), {"text": json.dumps(result, ensure_ascii=False)})()
+
+
+class FakeClient:
+    def __init__(self, *args, **kwargs):
+        self.models = FakeModels(*args, **kwargs)
+
+
+def load_groups(const_id):
+    """summary_groups ของ Stage 2 จากไฟล์ final: {category_id: ["[ม.x] ...", ...]}"""
+    with open(get_run_config(const_id).file_final_summary, "r", encoding="utf-8") as f:
+        categories = json.load(f)
+    return {
+        cat["category_id"]: [f"[ม.{sec['id']}] {sec['content']}" for sec in cat["sections"]]
+        for cat in categories if cat["sections"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stage-2 summarization modes")
+    parser.add_argument("const_id", nargs="?", default="con2560")
+    parser.add_argument("--base", type=float, default=0.5, help="fixed latency per request (s)")
+    parser.add_argument("--tokens-per-sec", type=float, default=20000, help="simulated prompt processing speed")
+    parser.add_argument("--output-tokens-per-sec", type=float, default=100, help="simulated generation speed")
+    parser.add_argument("--summary-tokens", type=int, default=150, help="output tokens per category summary")
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    groups = load_groups(args.const_id)
+    print(f"{args.const_id}: {len(groups)} categories, ~{sum(estimate_tokens(s) for v in groups.values() for s in v)} "
+          f"tokens, error rate {args.error_rate:.0%}\n")
+    print(f"{'mode':<22}{'wall s':>8}{'requests':>10}{'tokens':>10}{'done':>8}")
+
+    summarizer = AgentSummarizer()
+    concurrent = f"per-category x{args.workers}"
+    modes = [
+        ("batch (old)", "batch", lambda: summarizer.run_batch(groups)),
+        (concurrent, concurrent, lambda: summarizer.run_concurrent(groups, workers=args.workers)),
+        ("  re-run (LLM cache)", concurrent, lambda: summarizer.run_concurrent(groups, workers=args.workers)),
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        caches = {}
+        for name, cache_name, run in modes:
+            if cache_name not in caches:
+                caches[cache_name] = llm_cache.LLMCache(os.path.join(tmp_dir, f"{len(caches)}.sqlite"), enabled=True)
+            llm_cache._shared = caches[cache_name]
+            client = FakeClient(args.base, args.tokens_per_sec, args.output_tokens_per_sec,
+                                args.summary_tokens, args.error_rate, args.seed)
+            llm_scheduler.set_client(client)
+            llm_scheduler._shared = llm_scheduler.LLMScheduler(
+                {summarizer.model_name: (args.workers, 0)}, seed=args.seed)
+            started_at = time.perf_counter()
+            results = run()
+            elapsed = time.perf_counter() - started_at
+            models = client.models
+            print(f"{name:<22}{elapsed:>8.1f}{models.requests:>10}{models.tokens:>10}{len(results):>5}/{len(groups)}")
+        for cache in caches.values():
+            cache.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Benchmark suite: รันทุกขั้นที่ใช้ CPU ของ Stage 1-2 กับ con*_checkpoint.json ทุกฉบับ (ไม่เรียก API)
+
+ต่อ corpus (markdown รายหน้าสร้างจาก checkpoint แบบเดียวกับ ReplayBackend):
+- clean      : ConstitutionMerger._clean_text ทุกหน้า
+- parse      : ConstitutionMerger._parse_markdown_to_json ทุกหน้า (รวม _clean_text)
+- heal       : smart_heal_sequence
+- merge_sort : merge_duplicates + sort(section_sort_key) (แบบใน main)
+- numerals   : convert_thai_numerals ทุกมาตรา
+- similarity : calculate_similarity กับ legacy_json (มาตราที่มีใน legacy)
+- group      : group_sections_with_smart_mapping (header map จาก HeaderResolver เท่านั้น ไม่ถาม LLM)
++ corpus สังเคราะห์ x10 / x100 (ต่อ con2560 ซ้ำ เลขมาตราเลื่อนไปทีละชุด)
+
+เวลา = ดีที่สุดจาก --repeat รอบ (ms) -> JSON (--output) และเทียบกับ benchmarks/baseline.json:
+ขั้นไหนช้ากว่า baseline เกิน --threshold (และเกิน --min-ms) = REGRESSION, exit code 1
+
+    cd backend && python benchmarks/suite.py
+    cd backend && python benchmarks/suite.py --corpus con2560 --scale 10 --output /tmp/bench.json
+    cd backend && python benchmarks/suite.py --update-baseline   # หลังตั้งใจเปลี่ยนประสิทธิภาพ
+"""
+import argparse
+import contextlib
+import copy
+import gc
+import glob
+import importlib
+import io
+import json
+import logging
+import os
+import platform
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")  # 02_ai_analysis สร้าง client ตอน import
+
+from checkpoint import load_checkpoint  # noqa: E402
+from config import LEGACY_JSON  # noqa: E402
+from header_resolver import HeaderResolver  # noqa: E402
+from merger import ConstitutionMerger  # noqa: E402
+from ocr_backends import ReplayBackend, sections_to_markdown  # noqa: E402
+from sequence_repair import merge_duplicates  # noqa: E402
+
+stage1 = importlib.import_module("01_ocr_extraction")
+stage2 = importlib.import_module("02_ai_analysis")
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+STAGES = ("clean", "parse", "heal", "merge_sort", "numerals", "similarity", "group")
+
+_NUMBERED = re.compile(r"^(header_after_)?(\d+)(/\d+)?$")
+
+
+def offline_header_mapping(headers_list):
+    """แทน get_header_mapping: ตาราง + ความใกล้เคียงในเครื่อง, ที่เหลือ = general (group จะ fallback เอง)"""
+    mapping, _, _ = HeaderResolver().resolve_all(headers_list)
+    return mapping
+
+
+def shifted(sections, offset):
+    """สำเนา sections ที่เลขมาตราเลื่อนไป offset ("7" -> "507", "44/1" -> "544/1", header_after_7 -> ..._507)"""
+    out = []
+    for item in sections:
+        item = dict(item)
+        match = _NUMBERED.match(str(item.get("id", "")))
+        if match and offset:
+            prefix, number, minor = match.groups()
+            item["id"] = f"{prefix or ''}{int(number) + offset}{minor or ''}"
+        out.append(item)
+    return out
+
+
+def load_corpus(const_id, legacy_index, scale=1):
+    """(markdown รายหน้า, legacy_map) ของ checkpoint 1 ฉบับ ต่อซ้ำ scale ชุด"""
+    batches = load_checkpoint(f"{const_id}_checkpoint.json", f"{const_id}_checkpoint.jsonl")
+    legacy_map = legacy_index.section_map(const_id) if legacy_index else {}
+    numbers = [int(m.group(2)) for b in batches.values() for item in b
+               if (m := _NUMBERED.match(str(item.get("id", ""))))]
+    step = max(numbers, default=0) + 1
+    replay = ReplayBackend()
+    pages, scaled_legacy = [], {}
+    for copy_num in range(scale):
+        offset = copy_num * step
+        for batch_num in sorted(batches):
+            for chunk in replay._split_pages(shifted(batches[batch_num], offset)):
+                pages.append(sections_to_markdown(chunk))
+        for item in shifted([{"id": k, "content": v} for k, v in legacy_map.items()], offset):
+            scaled_legacy[item["id"]] = item["content"]
+    return pages, scaled_legacy
+
+
+def run_stages(pages, legacy_map):
+    """{stage: (fn, เตรียม input ใหม่ทุกรอบ)} ตามลำดับ pipeline -> ผลของขั้นก่อนเป็น input ขั้นถัดไป"""
+    merger = ConstitutionMerger(use_cache=False)
+    parsed = [s for page in pages for s in merger._parse_markdown_to_json(page)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        healed = stage1.smart_heal_sequence(copy.deepcopy(parsed))
+    final_list = merge_duplicates(copy.deepcopy(healed))
+    final_list.sort(key=stage1.section_sort_key)
+    contents = [item["content"] for item in final_list]
+    pairs = [(stage1.convert_thai_numerals(item["content"]), legacy_map[str(item["id"])])
+             for item in final_list if str(item["id"]) in legacy_map]
+
+    def merge_sort(items):
+        items = merge_duplicates(items)
+        items.sort(key=stage1.section_sort_key)
+        return items
+
+    return {
+        "clean": (lambda _: [merger._clean_text(page) for page in pages], None),
+        "parse": (lambda _: [merger._parse_markdown_to_json(page) for page in pages], None),
+        "heal": (stage1.smart_heal_sequence, lambda: copy.deepcopy(parsed)),
+        "merge_sort": (merge_sort, lambda: copy.deepcopy(healed)),
+        "numerals": (lambda _: [stage1.convert_thai_numerals(c) for c in contents], None),
+        "similarity": (lambda _: [stage1.calculate_similarity(a, b) for a, b in pairs], None),
+        "group": (stage2.group_sections_with_smart_mapping, lambda: copy.deepcopy(final_list)),
+    }, {"pages": len(pages), "sections": len(final_list), "legacy_pairs": len(pairs)}
+
+
+def best_of(fn, prepare, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        data = prepare() if prepare else None
+        gc.collect()
+        gc.disable()  # เหมือน timeit: GC ไม่มาแทรกกลางการจับเวลา
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                started_at = time.perf_counter()
+                fn(data)
+                best = min(best, time.perf_counter() - started_at)
+        finally:
+            gc.enable()
+    return best * 1000
+
+
+def compare(results, baseline, threshold, min_ms):
+    """[(corpus, stage, baseline ms, ms)] ที่ช้ากว่า baseline เกินเกณฑ์"""
+    regressions = []
+    for corpus, result in results.items():
+        base = baseline.get(corpus, {}).get("stages_ms", {})
+        for stage, ms in result["stages_ms"].items():
+            if stage in base and ms > base[stage] * (1 + threshold) and ms - base[stage] > min_ms:
+                regressions.append((corpus, stage, base[stage], ms))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark suite for the CPU stages")
+    parser.add_argument("--corpus", action="append", help="const_id to run (repeatable, default: all checkpoints)")
+    parser.add_argument("--scale", type=int, action="append",
+                        help="synthetic corpus size as a multiple of --scale-from (default: 10 and 100)")
+    parser.add_argument("--scale-from", default="con2560")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per stage, best time is kept")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="save these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = +25%%)")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="ignore slowdowns smaller than this (timer noise)")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    stage2.get_header_mapping = offline_header_mapping
+    const_ids = args.corpus or sorted(p.split("_checkpoint")[0] for p in glob.glob("con*_checkpoint.json"))
+    corpora = [(const_id, const_id, 1) for const_id in const_ids]
+    corpora += [(f"{args.scale_from}x{n}", args.scale_from, n) for n in (args.scale or [10, 100])]
+
+    legacy_index = stage1.open_legacy_index(LEGACY_JSON)
+    results = {}
+    print(f"{'corpus':<16}{'sections':>9}" + "".join(f"{s:>12}" for s in STAGES) + "   (ms)")
+    try:
+        for name, const_id, scale in corpora:
+            pages, legacy_map = load_corpus(const_id, legacy_index, scale)
+            stages, sizes = run_stages(pages, legacy_map)
+            repeat = args.repeat if scale < 100 else 1  # x100 รอบเดียวพอ (นานพอที่ noise ไม่มีผล)
+            timings = {stage: round(best_of(fn, prepare, repeat), 3) for stage, (fn, prepare) in stages.items()}
+            results[name] = dict(sizes, stages_ms=timings)
+            print(f"{name:<16}{sizes['sections']:>9}" + "".join(f"{timings[s]:>12.1f}" for s in STAGES))
+    finally:
+        if legacy_index is not None:
+            legacy_index.close()
+
+    report = {"python": platform.python_version(), "machine": platform.machine(),
+              "repeat": args.repeat, "corpora": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Results saved to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Baseline updated: {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️ No baseline at {args.baseline} (run with --update-baseline)")
+        return
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["corpora"]
+    regressions = compare(results, baseline, args.threshold, args.min_ms)
+    for corpus, stage, base_ms, ms in regressions:
+        print(f"❌ REGRESSION {corpus} {stage}: {base_ms:.1f} -> {ms:.1f} ms ({ms / base_ms - 1:+.0%})")
+    if regressions:
+        sys.exit(1)
+    print(f"\n✅ No stage slower than baseline by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
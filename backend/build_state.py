@@ -0,0 +1,113 @@
+"""
+Build State: รันใหม่เฉพาะขั้นที่ input เปลี่ยน (เทียบ hash ของเนื้อหา ไม่ใช่แค่เลข batch / มีไฟล์แล้วหรือยัง)
+
+build_state/<id>.json เก็บ key (hash ของทุก input) ของแต่ละ node ใน DAG ของ 1 ฉบับ:
+
+    รูปใน batch N ─────> stage1/batch/N ──┐
+    legacy sections, โค้ด heal/compare ───┴─> stage1/clean ──┐
+    header ที่พบ, header_categories.json, CATEGORIES,        ├─> stage2/header_map ─┐
+    prompt + โมเดล header mapping ───────────────────────────┘                      │
+    มาตราในหมวด X, ชื่อหมวด, prompt + โมเดลสรุป ────────────────────────────────────┴─> stage2/category/X
+
+- node ที่ key ตรงกับที่บันทึกไว้ = up to date -> ใช้ผลเดิม (checkpoint, clean.json, header map, ผลสรุป)
+- prompt template = hash ของ source ฟังก์ชันที่สร้าง prompt (แก้ prompt -> สรุปใหม่เองโดยไม่ต้องจำ bump version)
+- dry_run: คำนวณ key แล้วพิมพ์ว่า node ไหนจะถูก rebuild เพราะอะไร ไม่เรียก API ไม่เขียนไฟล์
+- force: ถือว่าทุก node ต้อง rebuild (แต่ยังบันทึก key ใหม่)
+"""
+import hashlib
+import inspect
+import json
+import logging
+import os
+
+from config import BUILD_STATE_DIR
+
+
+def digest(*parts):
+    """hash ของค่าที่ serialize เป็น JSON ได้ (dict เรียง key ก่อน -> ลำดับไม่มีผล)"""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(json.dumps(part, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:20]
+
+
+def file_digest(path):
+    """hash ของ bytes ในไฟล์ (None ถ้าไม่มีไฟล์)"""
+    if not os.path.exists(path): return None
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:20]
+
+
+def source_digest(*objects):
+    """hash ของ source code (ฟังก์ชัน/คลาส/โมดูล) ที่มีผลต่อผลลัพธ์ของ node"""
+    return digest(*(inspect.getsource(obj) for obj in objects))
+
+
+class BuildState:
+    def __init__(self, const_id, state_dir=BUILD_STATE_DIR, dry_run=False, force=False):
+        self.const_id = const_id
+        self.path = os.path.join(state_dir, f"{const_id}.json")
+        self.dry_run = dry_run
+        self.force = force
+        self.nodes = {}
+        self.plan = []  # [(node, เหตุผล)] ที่ต้อง rebuild ในการรันนี้
+        self.up_to_date = []
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.nodes = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"⚠️ Cannot read build state {self.path}, rebuilding everything: {e}")
+
+    def check(self, node, key, reason=None, output=None):
+        """
+        True = node นี้ up to date ไม่งั้นจดลง plan (reason ระบุเหตุผลเองได้ เช่น "images changed")
+        output: hash ของไฟล์ผลลัพธ์ตอนนี้ -> ไม่ตรงกับที่บันทึกไว้ (ถูกลบ/แก้มือ) = ต้อง rebuild
+        """
+        record = self.nodes.get(node)
+        if self.force:
+            reason = "forced"
+        elif record is None:
+            reason = reason or "new"
+        elif record.get("key") != key:
+            reason = reason or "inputs changed"
+        elif output is not None and record.get("output") != output:
+            reason = "output missing or modified"
+        else:
+            self.up_to_date.append(node)
+            return True
+        self.plan.append((node, reason))
+        return False
+
+    def get(self, node, field, default=None):
+        return self.nodes.get(node, {}).get(field, default)
+
+    def record(self, node, key, **data):
+        self.nodes[node] = dict(data, key=key)
+
+    def drop(self, prefix, keep=()):
+        """ลบ node ที่ขึ้นต้นด้วย prefix ที่ไม่อยู่ใน keep (เช่น batch/หมวดที่ไม่มีแล้ว)"""
+        for node in [n for n in self.nodes if n.startswith(prefix) and n not in keep]:
+            del self.nodes[node]
+
+    def save(self):
+        if self.dry_run: return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.nodes, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def report(self, stage):
+        """พิมพ์ plan ของ stage นี้ (node ที่ขึ้นต้นด้วย "<stage>/")"""
+        prefix = f"{stage}/"
+        plan = [(node, reason) for node, reason in self.plan if node.startswith(prefix)]
+        fresh = sum(node.startswith(prefix) for node in self.up_to_date)
+        verb = "would rebuild" if self.dry_run else "rebuilding"
+        print(f"📋 [{self.const_id}] {stage}: {verb} {len(plan)}, up to date {fresh}")
+        for node, reason in plan:
+            print(f"   🔁 {node}: {reason}")
@@ -0,0 +1,112 @@
+"""
+Checkpoint ของ Stage 1 แบบ append-only journal (JSONL)
+
+แต่ละบรรทัด = 1 batch: {"batch": 3, "sections": [...]}
+- append ทีละบรรทัด + fsync -> เขียนเท่ากับขนาด batch ไม่ใช่ทั้งไฟล์
+- ถ้า crash ระหว่างเขียน บรรทัดสุดท้ายที่ไม่สมบูรณ์จะถูกข้ามตอนโหลด
+- ยังอ่านไฟล์ con*_checkpoint.json แบบเก่า ({"1": [...], ...}) ได้
+
+    python checkpoint.py compact con2560
+    python checkpoint.py compact all
+"""
+import json
+import logging
+import os
+import sys
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _load_legacy_json(json_path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {int(k): v for k, v in data.items()}
+
+
+def _read_journal(journal_path):
+    batches = {}
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip(): continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"⚠️ Skipping corrupt checkpoint line {line_no} in {journal_path}")
+                continue
+            # บรรทัดหลังทับบรรทัดก่อน (batch เดิมถูก OCR ใหม่)
+            batches[int(record["batch"])] = record["sections"]
+    return batches
+
+
+def load_checkpoint(json_path, journal_path):
+    """รวม checkpoint แบบเก่า (.json) + journal (.jsonl) -> {batch_num: sections}"""
+    batches = {}
+    if os.path.exists(json_path):
+        try:
+            batches.update(_load_legacy_json(json_path))
+        except (OSError, ValueError) as e:
+            logging.warning(f"⚠️ Cannot read legacy checkpoint {json_path}: {e}")
+    if os.path.exists(journal_path):
+        batches.update(_read_journal(journal_path))
+    return batches
+
+
+def append_batch(journal_path, batch_num, sections):
+    """เขียนผล 1 batch ต่อท้าย journal แล้ว fsync"""
+    line = json.dumps({"batch": batch_num, "sections": sections}, ensure_ascii=False) + "\n"
+    is_new = not os.path.exists(journal_path)
+    with open(journal_path, "ab") as f:
+        # ถ้าบรรทัดสุดท้ายถูกตัดกลางคัน (crash) ให้ขึ้นบรรทัดใหม่ก่อน
+        if not is_new and f.tell() > 0:
+            with open(journal_path, "rb") as r:
+                r.seek(-1, os.SEEK_END)
+                if r.read(1) != b"\n":
+                    f.write(b"\n")
+        f.write(line.encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+    if is_new:
+        _fsync_dir(journal_path)
+
+
+def compact_checkpoint(json_path, journal_path):
+    """
+    เขียน journal ใหม่ให้เหลือ 1 บรรทัดต่อ batch (รวม checkpoint .json แบบเก่าเข้ามาด้วย)
+    เขียนลงไฟล์ชั่วคราวแล้ว os.replace -> ไฟล์เดิมไม่มีทางเสียครึ่งๆ กลางๆ
+    """
+    batches = load_checkpoint(json_path, journal_path)
+    if not batches: return 0
+
+    tmp_path = journal_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for batch_num in sorted(batches):
+            f.write(json.dumps({"batch": batch_num, "sections": batches[batch_num]}, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, journal_path)
+    _fsync_dir(journal_path)
+    return len(batches)
+
+
+if __name__ == "__main__":
+    from config import get_run_config, list_constitution_ids
+
+    if len(sys.argv) < 3 or sys.argv[1] != "compact":
+        sys.exit("Usage: python checkpoint.py compact <const_id ...|all>")
+
+    const_ids = list_constitution_ids() if sys.argv[2:] == ["all"] else sys.argv[2:]
+    for const_id in const_ids:
+        run_cfg = get_run_config(const_id)
+        count = compact_checkpoint(run_cfg.checkpoint_file, run_cfg.checkpoint_journal)
+        print(f"🗜️ {const_id}: {count} batches -> {run_cfg.checkpoint_journal}")
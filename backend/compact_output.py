@@ -0,0 +1,190 @@
+"""
+Compact Output: ผล Stage 2 แบบไม่ซ้ำซ้อน แยก shard ตามหมวด + ไฟล์บีบอัดล่วงหน้า (แทน *_full_summary.json indent=2)
+
+json_output/compact/<id>/
+    manifest.json        ข้อมูลฉบับ + ทุกหมวด (ชื่อ, ai_summary, key_change, จำนวนมาตรา, ชื่อ shard, ขนาด, hash)
+    <category_id>.json   มาตราของหมวดนั้น: {"category_id", "strings": [...], "sections": [[...], ...]}
+    *.json.gz / *.json.br  บีบอัดไว้แล้ว (brotli ต้องติดตั้งแพ็กเกจ brotli ถ้าไม่มีจะข้าม .br)
+
+section 1 แถว = [id, type, status, similarity, content, diff, extra] (ตัด null ท้ายแถวออก)
+- content / ข้อความใน diff = index ใน strings ของ shard (ข้อความเดียวกันเก็บครั้งเดียว)
+- diff = [ai_ocr, legacy_json]: null = เหมือน content (ไม่เก็บซ้ำ) ไม่มี diff = ไม่มี diff_versions
+- status / similarity = null -> ไม่มี key นั้น, extra = key อื่นๆ ของ section (เช่น legacy_id)
+- category_id ของ section = หมวดของ shard เสมอ
+หน้าเว็บโหลด manifest (เล็ก) ก่อน แล้ว fetch เฉพาะ shard ของหมวดที่แสดง
+
+    python compact_output.py                  # แปลง json_output/final ทุกฉบับ + ตรวจว่าอ่านกลับได้ตรงกัน
+    python compact_output.py con2550 con2560
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+try:
+    import brotli
+except ImportError:  # brotli เป็น optional dependency
+    brotli = None
+
+from config import OUTPUT_DIR_COMPACT, OUTPUT_DIR_FINAL, get_run_config
+
+FORMAT_VERSION = 1
+_COLUMNS = ("id", "type", "status", "similarity")
+_KNOWN_KEYS = set(_COLUMNS) | {"content", "diff_versions", "category_id"}
+_CATEGORY_KEYS = ("constitution_year", "category_id", "category_name", "ai_summary", "key_change", "section_count")
+
+
+class _StringTable:
+    def __init__(self):
+        self.strings = []
+        self.index = {}
+
+    def ref(self, text):
+        i = self.index.get(text)
+        if i is None:
+            i = self.index[text] = len(self.strings)
+            self.strings.append(text)
+        return i
+
+
+def encode_category(category):
+    """1 หมวดของ full_summary -> shard"""
+    table = _StringTable()
+    rows = []
+    for sec in category["sections"]:
+        content = sec.get("content", "")
+        row = [sec.get(key) for key in _COLUMNS] + [table.ref(content), None, None]
+        diff = sec.get("diff_versions")
+        if diff is not None:
+            row[5] = [
+                None if diff.get(key) == content else table.ref(diff.get(key) or "")
+                for key in ("ai_ocr", "legacy_json")
+            ]
+        extra = {k: v for k, v in sec.items() if k not in _KNOWN_KEYS}
+        if extra:
+            row[6] = extra
+        while row[-1] is None:
+            row.pop()
+        rows.append(row)
+    return {"category_id": category["category_id"], "strings": table.strings, "sections": rows}
+
+
+def decode_shard(shard, meta=None):
+    """shard (+ ข้อมูลหมวดจาก manifest) -> หมวดแบบ full_summary"""
+    strings, cat_id = shard["strings"], shard["category_id"]
+    sections = []
+    for row in shard["sections"]:
+        row = row + [None] * (7 - len(row))
+        sec_id, sec_type, status, similarity, content_ref, diff, extra = row
+        content = strings[content_ref]
+        sec = {"id": sec_id, "content": content, "type": sec_type}
+        if status is not None:
+            sec["status"] = status
+        if similarity is not None:
+            sec["similarity"] = similarity
+        if diff is not None:
+            ai_ocr, legacy = (content if ref is None else strings[ref] for ref in diff)
+            sec["diff_versions"] = {"ai_ocr": ai_ocr, "legacy_json": legacy}
+        sec["category_id"] = cat_id
+        if extra:
+            sec.update(extra)
+        sections.append(sec)
+    category = {key: meta[key] for key in _CATEGORY_KEYS} if meta else {"category_id": cat_id}
+    category["sections"] = sections
+    return category
+
+
+def write_precompressed(path, data):
+    """<path> + .gz + .br (ถ้ามี brotli) เขียนไฟล์ชั่วคราวแล้ว rename -> {ชนิด: bytes}, sha256 ของ JSON"""
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    variants = {"json": (path, raw), "gz": (path + ".gz", gzip.compress(raw, compresslevel=9, mtime=0))}
+    if brotli is not None:
+        variants["br"] = (path + ".br", brotli.compress(raw, quality=11))
+    for file_path, payload in variants.values():
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, file_path)
+    return {kind: len(payload) for kind, (_, payload) in variants.items()}, hashlib.sha256(raw).hexdigest()[:16]
+
+
+def write_compact(final_output, out_dir, const_id):
+    """เขียน shard ทุกหมวด + manifest ของ 1 ฉบับ -> manifest"""
+    os.makedirs(out_dir, exist_ok=True)
+    categories = []
+    for category in final_output:
+        shard_name = f"{category['category_id']}.json"
+        sizes, digest = write_precompressed(os.path.join(out_dir, shard_name), encode_category(category))
+        categories.append(dict({key: category[key] for key in _CATEGORY_KEYS}, shard=shard_name,
+                               bytes=sizes, sha256=digest))
+    manifest = {
+        "format": FORMAT_VERSION,
+        "const_id": const_id,
+        "constitution_year": final_output[0]["constitution_year"] if final_output else None,
+        "section_count": sum(c["section_count"] for c in categories),
+        "categories": categories,
+    }
+    # shard ของหมวดที่ไม่มีแล้ว (รันรอบก่อน) ไม่อยู่ใน manifest -> ลบทิ้ง
+    keep = {c["shard"] for c in categories} | {"manifest.json"}
+    for name in os.listdir(out_dir):
+        if name.split(".json")[0] + ".json" not in keep:
+            os.remove(os.path.join(out_dir, name))
+    write_precompressed(os.path.join(out_dir, "manifest.json"), manifest)
+    if brotli is None:
+        logging.info("ℹ️ brotli not installed: wrote .json/.gz only (pip install brotli for .br)")
+    return manifest
+
+
+def read_compact(out_dir):
+    """อ่านกลับเป็น list ของหมวดแบบ full_summary"""
+    with open(os.path.join(out_dir, "manifest.json"), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    categories = []
+    for meta in manifest["categories"]:
+        with open(os.path.join(out_dir, meta["shard"]), "r", encoding="utf-8") as f:
+            categories.append(decode_shard(json.load(f), meta))
+    return categories
+
+
+def _normalized(final_output):
+    """full_summary ที่ทุก section มี category_id = หมวดของตัวเอง (แบบที่ decode_shard คืน)"""
+    return [
+        dict(cat, sections=[dict(sec, category_id=cat["category_id"]) for sec in cat["sections"]])
+        for cat in final_output
+    ]
+
+
+def main(const_ids=None):
+    suffix = "_full_summary.json"
+    const_ids = const_ids or sorted(
+        name[:-len(suffix)] for name in os.listdir(OUTPUT_DIR_FINAL) if name.endswith(suffix)
+    )
+    print(f"{'id':<14}{'full':>10}{'compact':>10}{'gzip':>9}{'brotli':>9}{'largest shard':>15}")
+    totals = [0, 0, 0, 0]
+    for const_id in const_ids:
+        run_cfg = get_run_config(const_id)
+        path, out_dir = run_cfg.file_final_summary, run_cfg.dir_compact
+        with open(path, "r", encoding="utf-8") as f:
+            final_output = json.load(f)
+        manifest = write_compact(final_output, out_dir, const_id)
+        if read_compact(out_dir) != _normalized(final_output):
+            raise ValueError(f"compact output of {const_id} does not read back to {path}")
+
+        shards = [c["bytes"] for c in manifest["categories"]]
+        sizes = [os.path.getsize(path)] + [sum(s.get(kind, 0) for s in shards) for kind in ("json", "gz", "br")]
+        largest = max((s.get("br", s["gz"]) for s in shards), default=0)
+        totals = [t + s for t, s in zip(totals, sizes)]
+        print(f"{const_id:<14}" + "".join(f"{s / 1024:>9.0f}K" if i < 2 else f"{s / 1024:>8.0f}K"
+                                         for i, s in enumerate(sizes)) + f"{largest / 1024:>14.1f}K")
+    print(f"{'total':<14}" + "".join(f"{s / 1024:>9.0f}K" if i < 2 else f"{s / 1024:>8.0f}K"
+                                    for i, s in enumerate(totals)))
+    print(f"🎉 DONE! -> {OUTPUT_DIR_COMPACT}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write deduplicated, sharded, precompressed Stage 2 output")
+    parser.add_argument("ids", nargs="*", help="constitution IDs (default: every ID with a Stage 2 summary)")
+    args = parser.parse_args()
+    main(args.ids)
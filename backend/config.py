@@ -9,7 +9,7 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 TYPHOON_OCR_API_KEY = os.getenv("TYPHOON_OCR_API_KEY")
 
 # --- ⚙️ PROJECT SETTINGS ---
-TARGET_CONST_ID = "con2560"  #
+TARGET_CONST_ID = os.getenv("TARGET_CONST_ID", "con2560")  #
 
 # --- 📂 PATH CONFIGURATION ---
 # โฟลเดอร์ต้นทาง
@@ -19,14 +19,121 @@ LEGACY_JSON = os.path.join("legacy_json", "constitutions.json")
 # โฟลเดอร์ปลายทาง
 OUTPUT_DIR_CLEAN = os.path.join("json_output", "clean")
 OUTPUT_DIR_FINAL = os.path.join("json_output", "final")
-
-# ชื่อไฟล์ต่างๆ (สร้างอัตโนมัติตาม ID)
-CHECKPOINT_FILE = f"{TARGET_CONST_ID}_checkpoint.json"
-FILE_CLEAN = os.path.join(OUTPUT_DIR_CLEAN, f"{TARGET_CONST_ID}_clean.json")
-FILE_FINAL_SUMMARY = os.path.join(OUTPUT_DIR_FINAL, f"{TARGET_CONST_ID}_full_summary.json")
+OUTPUT_DIR_ALIGNMENT = os.path.join("json_output", "alignment")
+OUTPUT_DIR_COMPACT = os.path.join("json_output", "compact")  # <id>/manifest.json + shard ต่อหมวด (ดู compact_output.py)
+OUTPUT_DIR_SEARCH = os.path.join("json_output", "search")  # n-gram index ทุกฉบับ (ดู search_index.py)
+OUTPUT_DIR_PAGES = os.path.join("json_output", "pages")  # section -> หน้า PDF ต่อฉบับ (ดู page_index.py)
+OUTPUT_DIR_DIFF = os.path.join("json_output", "diff")  # opcode ของแถวที่จับคู่แล้ว ต่อหน้าเปรียบเทียบ (ดู section_diff.py)
 
 # OCR Settings
 IMAGES_PER_BATCH = 3
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", "4"))  # จำนวนหน้าที่ส่ง OCR พร้อมกัน
+OCR_RATE_LIMIT = float(os.getenv("OCR_RATE_LIMIT", "2"))  # หน้า/วินาที (0 = ไม่จำกัด)
+OCR_BACKEND = os.getenv("OCR_BACKEND", "typhoon")  # typhoon | replay | fake (ดู ocr_backends.py)
+OCR_RECORD = os.getenv("OCR_RECORD", "0") == "1"  # บันทึก markdown จาก API ไว้ replay
+OCR_RECORDINGS_DIR = "ocr_recordings"
+OCR_FAKE_LATENCY = float(os.getenv("OCR_FAKE_LATENCY", "1.0"))  # วินาที/หน้า สำหรับ backend "fake"
+OCR_FAKE_ERROR_RATE = float(os.getenv("OCR_FAKE_ERROR_RATE", "0"))
+OCR_CACHE_DIR = "ocr_cache"  # cache ผล OCR ต่อหน้า (key = hash ของรูป)
+OCR_CACHE_MAX_MB = int(os.getenv("OCR_CACHE_MAX_MB", "500"))
+
+# Image Preprocessing (ต้องมี Pillow) -> ดู preprocess.py
+PREPROCESS_IMAGES = os.getenv("PREPROCESS_IMAGES", "0") == "1"
+PREPROCESS_DIR = "images_preprocessed"
+PREPROCESS_MAX_DIM = 1400  # px ด้านยาวสุด
+PREPROCESS_MAX_DPI = 200
+PREPROCESS_TRIM = True  # ตัดขอบขาว
+PREPROCESS_GRAY_LEVELS = 16  # PNG 4-bit (0 = เก็บ 256 ระดับ)
+
+# Legacy Verification (ดู similarity.py)
+SIMILARITY_METRIC = os.getenv("SIMILARITY_METRIC", "difflib")  # difflib (ผลเดิม) | levenshtein (ผลตัดสินต่างจากเดิม)
+SIMILARITY_THRESHOLD = 0.85  # มากกว่านี้ = VERIFIED
+SIMILARITY_WORKERS = int(os.getenv("SIMILARITY_WORKERS", "0"))  # >1 = คำนวณทั้งเอกสารด้วย process pool
+
+# AI Summary (Stage 2, ดู agents.AgentSummarizer)
+SUMMARY_MODE = os.getenv("SUMMARY_MODE", "category")  # category (แยกหมวดพร้อมกัน) | batch (request เดียวแบบเดิม)
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))  # จำนวน request สรุปที่ส่งพร้อมกัน
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "8000"))  # token (ประมาณ) ของข้อมูลต่อ request
+COMPACT_OUTPUT = os.getenv("COMPACT_OUTPUT", "1") == "1"  # เขียน json_output/compact/<id>/ คู่กับ full_summary
+
+# Header -> Category (ดู header_resolver.py)
+HEADER_MATCH_THRESHOLD = float(os.getenv("HEADER_MATCH_THRESHOLD", "0.75"))  # ต่ำกว่านี้ = ถาม LLM
+
+# LLM Response Cache (ดู llm_cache.py)
+LLM_CACHE_PATH = "llm_cache.sqlite"
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "30"))  # 0 = ไม่หมดอายุ
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "100"))
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "0") == "1"  # 1 = เรียก API ทุกครั้ง ไม่อ่าน/เขียน cache
+
+# LLM Request Scheduler (ดู llm_scheduler.py)
+LLM_MODEL_LIMITS = {  # model: (request พร้อมกันสูงสุด, request ต่อนาที) ต่อทั้ง batch (run_all แบ่งให้แต่ละ worker)
+    "gemini-3-flash-preview": (4, 60),
+    "gemma-3-27b-it": (2, 30),
+    "glm-4-plus": (4, 60),
+}
+LLM_DEFAULT_LIMITS = (2, 30)  # โมเดลที่ไม่อยู่ในตาราง
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))  # attempt ต่อ request (รวมครั้งแรก)
+LLM_BACKOFF_BASE = 1.0  # วินาที: รอสุ่ม 0..base*2^attempt
+LLM_BACKOFF_MAX = 60.0
+LLM_BREAKER_THRESHOLD = 5  # ล้มเหลวติดกันกี่ครั้งถึงหยุดส่ง
+LLM_BREAKER_COOLDOWN = 60.0  # วินาทีก่อนลองใหม่
+LLM_STREAM = os.getenv("LLM_STREAM", "1") == "1"  # ใช้ generate_content_stream (stream ขาด = เก็บ entry ที่ได้แล้ว)
+LLM_PRICES_PER_MTOK = {  # model: (USD ต่อ 1M prompt tokens, USD ต่อ 1M output tokens) สำหรับประมาณค่าใช้จ่าย
+    "gemini-3-flash-preview": (0.50, 3.00),
+    "gemma-3-27b-it": (0.0, 0.0),
+}
+
+# Telemetry (ดู telemetry.py)
+TELEMETRY_ENABLED = os.getenv("TELEMETRY", "1") == "1"  # 0 = ไม่เขียน trace/metrics
+TELEMETRY_DIR = "telemetry"  # <id>_<stage>.trace.jsonl, <id>_<stage>.prom, <id>_<stage>.prof
+
+# Incremental build (ดู build_state.py)
+BUILD_STATE_DIR = "build_state"  # <id>.json: hash ของ input ทุกขั้น -> รันใหม่เฉพาะส่วนที่เปลี่ยน
+
+
+class RunConfig:
+    """Path ทั้งหมดของการรัน 1 ฉบับ (แต่ละ worker ได้ object ของตัวเอง)"""
+
+    def __init__(self, const_id):
+        self.const_id = const_id
+        self.image_folder = os.path.join(IMAGE_FOLDER, const_id)
+        self.checkpoint_file = f"{const_id}_checkpoint.json"  # แบบเก่า (อ่านอย่างเดียว)
+        self.checkpoint_journal = f"{const_id}_checkpoint.jsonl"
+        self.file_clean = os.path.join(OUTPUT_DIR_CLEAN, f"{const_id}_clean.json")
+        self.file_final_summary = os.path.join(OUTPUT_DIR_FINAL, f"{const_id}_full_summary.json")
+        self.dir_compact = os.path.join(OUTPUT_DIR_COMPACT, const_id)
+        self.file_pages = os.path.join(OUTPUT_DIR_PAGES, f"{const_id}.json")
+        self.ocr_concurrency = OCR_CONCURRENCY
+        self.ocr_rate_limit = OCR_RATE_LIMIT
+        self.stream = False  # Stage 1 แบบ streaming (ดู 01_ocr_extraction.run_streaming)
+        self.use_checkpoint = True  # False = ไม่อ่าน/เขียน checkpoint (ใช้ตอน benchmark)
+        self.use_llm_cache = not LLM_CACHE_BYPASS  # False = Stage 2 เรียก API ทุกครั้ง
+        self.llm_quota_share = 1.0  # ส่วนของ LLM_MODEL_LIMITS (RPM) ที่ run นี้ใช้ได้
+        self.dry_run = False  # แสดงว่าขั้นไหนจะถูกรันใหม่ (build_state.py) โดยไม่รันจริง
+        self.force = False  # รันใหม่ทุกขั้นไม่สน build state
+
+    def __repr__(self):
+        return f"RunConfig({self.const_id!r})"
+
+
+def get_run_config(const_id=None):
+    return RunConfig(const_id or TARGET_CONST_ID)
+
+
+def list_constitution_ids():
+    """ID ทุกฉบับที่มีโฟลเดอร์รูปใน images_raw/"""
+    if not os.path.isdir(IMAGE_FOLDER): return []
+    return sorted(
+        name for name in os.listdir(IMAGE_FOLDER)
+        if os.path.isdir(os.path.join(IMAGE_FOLDER, name))
+    )
+
+
+# ชื่อไฟล์ต่างๆ (สร้างอัตโนมัติตาม ID)
+_DEFAULT_RUN = get_run_config()
+CHECKPOINT_FILE = _DEFAULT_RUN.checkpoint_file
+FILE_CLEAN = _DEFAULT_RUN.file_clean
+FILE_FINAL_SUMMARY = _DEFAULT_RUN.file_final_summary
 
 # --- 📚 CATEGORIES ---
 CATEGORIES = {
@@ -0,0 +1,125 @@
+"""
+OCR Correction Rules: แก้คำที่ OCR อ่านผิดบ่อย (กฎอยู่ใน ocr_corrections.json)
+
+กฎทั้งหมดถูก compile เป็น regex ตัวเดียวแบบ trie (prefix ร่วมกันถูกรวมเป็นกิ่งเดียว)
+-> แทนที่ทั้งหน้าในรอบเดียว ต่อให้มีกฎหลายพันคำก็ไม่ช้าลงตามจำนวนกฎ
+
+    python corrections.py mine               # หาคู่คำที่ OCR สับสน จาก REVIEW_NEEDED sections
+    python corrections.py mine --min-count 1
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+
+CORRECTIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_corrections.json")
+
+# tag เลขหน้าที่ Typhoon OCR ใส่มา
+PAGE_NUMBER_PATTERN = r"<page_number>.*?</page_number>"
+
+
+def load_rules(path=CORRECTIONS_FILE):
+    if not os.path.exists(path): return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def rules_version(path=CORRECTIONS_FILE):
+    """hash ของไฟล์กฎ (ใช้เป็นส่วนหนึ่งของ key ใน OCR cache)"""
+    if not os.path.exists(path): return "none"
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def _trie_pattern(words):
+    """สร้าง regex จาก trie: ["ไขว้", "ไขว"] -> "ไขว(?:้)?" (greedy = เลือกคำที่ยาวที่สุด)"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        is_end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches: return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if is_end:
+            body = f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+def compile_corrector(rules):
+    """คืนฟังก์ชัน text -> text ที่ลบ tag เลขหน้าแล้วแก้คำตามกฎทั้งหมดในรอบเดียว"""
+    page_number = re.compile(PAGE_NUMBER_PATTERN)
+    words = [w for w in rules if w]
+    if not words:
+        return lambda text: page_number.sub("", text)
+    pattern = re.compile(_trie_pattern(words))
+
+    def replace(match):
+        return rules[match.group(0)]
+
+    # ลบเลขหน้าก่อน เผื่อ tag แทรกกลางคำที่ต้องแก้
+    return lambda text: pattern.sub(replace, page_number.sub("", text))
+
+
+def mine_confusions(clean_paths, max_len=12, min_count=2, known=None, context=2):
+    """
+    หาคู่ (ข้อความ OCR, ข้อความ legacy) ที่ต่างกันบ่อยใน diff_versions ของ REVIEW_NEEDED sections
+    แต่ละคู่ติดตัวอักษรรอบข้างมา `context` ตัว (แก้ทีละตัวอักษรโดยไม่มีบริบทจะผิดมากกว่าถูก)
+    คืน list ของ (ocr_text, legacy_text, count) เรียงจากพบบ่อยสุด
+    """
+    known = known or {}
+    pairs = Counter()
+    for path in clean_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            sections = json.load(f)
+        for item in sections:
+            if item.get("status") != "REVIEW_NEEDED": continue
+            versions = item.get("diff_versions") or {}
+            ocr, legacy = versions.get("ai_ocr", ""), versions.get("legacy_json", "")
+            matcher = SequenceMatcher(None, ocr, legacy, autojunk=False)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                if tag != "replace": continue
+                if (ocr[i1:i2] + legacy[j1:j2]).strip().isdigit(): continue  # เลขมาตราต่างกัน ไม่ใช่คำผิด
+                before = ocr[max(0, i1 - context):i1]
+                after = ocr[i2:i2 + context]
+                wrong = (before + ocr[i1:i2] + after).strip()
+                right = (before + legacy[j1:j2] + after).strip()
+                if not wrong or not right or wrong == right: continue
+                if len(wrong) > max_len or len(right) > max_len: continue
+                if " " in wrong or " " in right: continue
+                if known.get(wrong) == right: continue
+                pairs[(wrong, right)] += 1
+    return [(w, r, n) for (w, r), n in pairs.most_common() if n >= min_count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR correction rule tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    mine = sub.add_parser("mine", help="suggest confusion pairs from REVIEW_NEEDED sections")
+    mine.add_argument("--clean-dir", default=os.path.join("json_output", "clean"))
+    mine.add_argument("--min-count", type=int, default=2)
+    mine.add_argument("--max-len", type=int, default=12)
+    mine.add_argument("--context", type=int, default=2, help="characters of context kept around each edit")
+    args = parser.parse_args()
+
+    if args.command == "mine":
+        paths = sorted(glob.glob(os.path.join(args.clean_dir, "*_clean.json")))
+        candidates = mine_confusions(paths, args.max_len, args.min_count, load_rules(), args.context)
+        print(f"🔎 {len(candidates)} candidate pairs (review before adding to {CORRECTIONS_FILE}):")
+        print(json.dumps({w: r for w, r, _ in candidates}, ensure_ascii=False, indent=2))
+        for w, r, n in candidates:
+            print(f"   {n:>4}x  {w!r} -> {r!r}")
+
+
+if __name__ == "__main__":
+    main()
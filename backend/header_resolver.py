@@ -0,0 +1,150 @@
+"""
+Header Resolver: map หัวหมวด/หัวส่วน -> category_id ในเครื่อง (Stage 2) ไม่ต้องถาม LLM ทุกหัวข้อ
+
+1. normalize : เลขไทย -> อารบิก, ตัด "หมวด ๓" / "ส่วนที่ ๒", markdown, ข้อความขยะที่ OCR ติดมา
+2. ตาราง     : header_categories.json (ชื่อที่ normalize แล้ว -> category_id) สะสมจากทุกฉบับ
+3. ใกล้เคียง : Dice ของ bigram (similarity.dice_bigram) กับชื่อในตาราง + ชื่อใน config.CATEGORIES
+เฉพาะหัวข้อที่คะแนนต่ำกว่า HEADER_MATCH_THRESHOLD ที่ส่งให้ LLM (รวมใน request เดียว)
+
+    python header_resolver.py resolve "หมวด ๓ สิทธิและเสรีภาพของปวงชนชาวไทย"
+    python header_resolver.py learn     # เสนอชื่อใหม่จากผลที่ผ่านมา (json_output/clean + final)
+"""
+import argparse
+import glob
+import json
+import os
+import re
+from collections import Counter, defaultdict
+
+from config import CATEGORIES, HEADER_MATCH_THRESHOLD, OUTPUT_DIR_CLEAN, OUTPUT_DIR_FINAL
+from similarity import dice_bigram
+
+HEADER_TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "header_categories.json")
+
+_THAI_DIGITS = str.maketrans("๐๑๒๓๔๕๖๗๘๙", "0123456789")
+# ทุกอย่างหลังจากนี้ไม่ใช่ชื่อหมวด (HTML ตาราง, เนื้อหามาตรา, หัวราชกิจจานุเบกษา)
+_TRAILING_JUNK = re.compile(r"<|มาตรา\s*\d|เล่ม\s*\d+\s*ตอน|หน้า\s*\d+\s*ราชกิจจานุเบกษา")
+_MARKUP = re.compile(r"#+|-{3,}|\*+|\|")
+_PREFIX = re.compile(r"(?:หมวด|ส่วนที่)\s*\d*|(?:บทที่|ภาค)\s*\d+")
+_NUMBERING = re.compile(r"^\d+\s*[.)]?\s*")
+# ชื่อที่จบด้วยคำเชื่อม = ประโยคในเนื้อหามาตราที่ถูกตัดเป็น header ผิด ("...หมวด ๒ พระมหากษัตริย์ หรือหมวด ๑๕")
+_FRAGMENT = re.compile(r"(?:หรือ|และ|ของ|แห่ง|ตาม)$")
+
+
+def is_header(item):
+    return item.get("type") == "header" or str(item["id"]).startswith("header_")
+
+
+def normalize_header(text):
+    """"หมวด ๓ สิทธิและเสรีภาพ ---\\nส่วนที่ ๑ บททั่วไป" -> "สิทธิและเสรีภาพ" (ชื่อแรกที่ไม่ว่าง)"""
+    text = str(text).translate(_THAI_DIGITS)
+    junk = _TRAILING_JUNK.search(text)
+    if junk:
+        text = text[:junk.start()]
+    text = _MARKUP.sub(" ", text)
+    for segment in _PREFIX.split(text):
+        title = _NUMBERING.sub("", " ".join(segment.split()))
+        if title:
+            return title
+    return ""
+
+
+def load_table(path=HEADER_TABLE_FILE):
+    if not os.path.exists(path): return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {normalize_header(k): v for k, v in json.load(f).items()}
+
+
+def _category_labels():
+    """ชื่อใน CATEGORIES แยกเป็นส่วนๆ: "อำนาจบริหาร (ครม., นายกฯ)" -> อำนาจบริหาร, ครม., นายกฯ"""
+    for cat_id, label in CATEGORIES.items():
+        for part in re.split(r"[()/,]", label):
+            part = part.strip()
+            if len(part) >= 3:
+                yield part, cat_id
+
+
+class HeaderResolver:
+    def __init__(self, table=None, threshold=HEADER_MATCH_THRESHOLD):
+        self.table = load_table() if table is None else table
+        self.threshold = threshold
+        self.references = list(self.table.items()) + list(_category_labels())
+
+    def resolve(self, header):
+        """(category_id หรือ None, คะแนน, ที่มา: "table" | "similar" | None)"""
+        title = normalize_header(header)
+        if not title or _FRAGMENT.search(title):
+            return None, 0.0, None
+        if title in self.table:
+            return self.table[title], 1.0, "table"
+        best_cat, best_score = None, 0.0
+        for reference, cat_id in self.references:
+            score = dice_bigram(title, reference)
+            if score > best_score:
+                best_cat, best_score = cat_id, score
+        if best_score >= self.threshold:
+            return best_cat, best_score, "similar"
+        return None, best_score, None
+
+    def resolve_all(self, headers):
+        """({header: category_id} ที่ตัดสินได้, [header ที่ต้องถาม LLM], Counter ของที่มา)"""
+        mapping, unresolved, sources = {}, [], Counter()
+        for header in headers:
+            cat_id, _, source = self.resolve(header)
+            if cat_id is None:
+                unresolved.append(header)
+                sources["llm"] += 1
+            else:
+                mapping[header] = cat_id
+                sources[source] += 1
+        return mapping, unresolved, sources
+
+
+def past_decisions(clean_dir=OUTPUT_DIR_CLEAN, final_dir=OUTPUT_DIR_FINAL):
+    """(ชื่อที่ normalize แล้ว, category_id ที่ Stage 2 ใช้กับมาตราแรกหลังหัวข้อนั้น) จากทุกฉบับที่รันแล้ว"""
+    for clean_path in sorted(glob.glob(os.path.join(clean_dir, "*_clean.json"))):
+        const_id = os.path.basename(clean_path)[:-len("_clean.json")]
+        final_path = os.path.join(final_dir, f"{const_id}_full_summary.json")
+        if not os.path.exists(final_path): continue
+        with open(final_path, "r", encoding="utf-8") as f:
+            category_of = {}
+            for cat in json.load(f):
+                for sec in cat.get("sections") or []:
+                    category_of.setdefault(str(sec["id"]), cat["category_id"])
+        with open(clean_path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        for i, item in enumerate(items):
+            if not is_header(item): continue
+            following = next((x for x in items[i + 1:] if not is_header(x)), None)
+            if following is None or following.get("type") == "intro" or following["id"] == "intro": continue
+            cat_id = category_of.get(str(following["id"]))
+            title = normalize_header(item["content"])
+            if cat_id and title:
+                yield title, cat_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local header -> category resolver")
+    sub = parser.add_subparsers(dest="command", required=True)
+    resolve = sub.add_parser("resolve", help="resolve header texts")
+    resolve.add_argument("headers", nargs="+")
+    sub.add_parser("learn", help="suggest table entries from previous stage-2 outputs")
+    args = parser.parse_args()
+
+    resolver = HeaderResolver()
+    if args.command == "resolve":
+        for header in args.headers:
+            cat_id, score, source = resolver.resolve(header)
+            print(f"   {normalize_header(header)!r} -> {cat_id or '(LLM)'} ({source or 'unresolved'}, {score:.2f})")
+    elif args.command == "learn":
+        votes = defaultdict(Counter)
+        for title, cat_id in past_decisions():
+            if title not in resolver.table:
+                votes[title][cat_id] += 1
+        suggestions = {title: counts.most_common(1)[0][0] for title, counts in sorted(votes.items())}
+        print(f"🔎 {len(suggestions)} new titles (review before adding to {HEADER_TABLE_FILE}):")
+        print(json.dumps(suggestions, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Legacy Index: index ของ legacy_json/constitutions.json ใน SQLite (สร้างครั้งเดียว ใช้ซ้ำทุกรัน)
+
+- sections : (const_id, section_id) -> content  แทนการ parse JSON ทั้งไฟล์ทุกครั้ง
+- lsh      : MinHash ของ character shingle แบ่งเป็น band -> หา legacy section ที่ข้อความใกล้เคียง
+             โดยไม่ต้องเทียบกับทุก section (ใช้กับ section ที่ OCR ได้เลขผิด / ไม่มีเลขตรงใน legacy)
+
+index ถูกสร้างใหม่อัตโนมัติเมื่อไฟล์ JSON เปลี่ยน (เทียบขนาด + mtime)
+ถ้า ID ซ้ำกันใน JSON ใช้ฉบับแรกที่เจอ (เหมือน load_legacy_data เดิม)
+
+    python legacy_index.py build
+    python legacy_index.py query con2560 "ข้อความมาตรา..."
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import zlib
+from contextlib import closing
+
+from config import LEGACY_JSON
+
+SCHEMA_VERSION = "2"
+
+SHINGLE_SIZE = 4
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4  # Jaccard ~0.5 ขึ้นไปมีโอกาสเป็น candidate สูง
+MINHASH_SIZE = MINHASH_BANDS * MINHASH_ROWS
+_EMPTY_BIN = 1 << 64
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    text = "".join(str(text).split())  # ไม่สนช่องว่าง (OCR เว้นวรรคไม่ตรงกับ legacy)
+    if len(text) <= k: return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def minhash(text):
+    """
+    signature ยาว BANDS x ROWS แบบ one-permutation hashing (None ถ้าข้อความว่าง)
+    hash แต่ละ shingle ครั้งเดียว (blake2b -> เหมือนกันทุก process) แล้วแบ่งลง bin เก็บค่าน้อยสุดของแต่ละ bin
+    -> O(จำนวน shingle) แทน O(shingle x จำนวน hash function)
+    """
+    signature = [_EMPTY_BIN] * MINHASH_SIZE
+    empty = True
+    for s in shingles(text):
+        h = int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+        b, value = h % MINHASH_SIZE, h // MINHASH_SIZE
+        if value < signature[b]:
+            signature[b] = value
+        empty = False
+    return None if empty else signature
+
+
+def band_keys(signature):
+    """1 key ต่อ band (section ที่ band ใด band หนึ่งตรงกัน = candidate)"""
+    rows = MINHASH_ROWS
+    return [
+        f"{band}:{zlib.crc32(repr(signature[band * rows:(band + 1) * rows]).encode())}"
+        for band in range(MINHASH_BANDS)
+    ]
+
+
+def index_path_for(json_path):
+    """legacy_json/constitutions.json -> legacy_json/constitutions.sqlite"""
+    return os.path.splitext(json_path)[0] + ".sqlite"
+
+
+def _source_stamp(json_path):
+    stat = os.stat(json_path)
+    return f"{SCHEMA_VERSION}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def build_index(json_path=LEGACY_JSON, index_path=None):
+    """parse JSON ครั้งเดียว -> เขียน SQLite ไฟล์ใหม่แล้ว os.replace (worker อื่นไม่เห็นไฟล์ครึ่งๆ)"""
+    index_path = index_path or index_path_for(json_path)
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"{json_path}: expected a list of constitutions")
+
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path): os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("""
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE sections (
+                const_id TEXT, section_id TEXT, content TEXT,
+                PRIMARY KEY (const_id, section_id)
+            );
+            CREATE TABLE lsh (const_id TEXT, bucket TEXT, section_id TEXT);
+        """)
+        seen_consts = set()
+        section_rows, lsh_rows = [], []
+        for const in data:
+            const_id = const.get("id")
+            if const_id in seen_consts: continue
+            seen_consts.add(const_id)
+            if "sections" not in const: continue
+            contents = {}
+            for sec in const["sections"]:
+                contents[str(sec["id"])] = sec["content"]  # ID ซ้ำในฉบับเดียวกัน: ตัวหลังทับ (เหมือน dict เดิม)
+            for section_id, content in contents.items():
+                section_rows.append((const_id, section_id, content))
+                signature = minhash(content)
+                if signature:
+                    lsh_rows.extend((const_id, key, section_id) for key in band_keys(signature))
+        conn.executemany("INSERT INTO sections VALUES (?, ?, ?)", section_rows)
+        conn.executemany("INSERT INTO lsh VALUES (?, ?, ?)", lsh_rows)
+        conn.execute("CREATE INDEX lsh_bucket ON lsh (const_id, bucket)")
+        conn.execute("INSERT INTO meta VALUES ('source', ?)", (_source_stamp(json_path),))
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, index_path)
+    logging.info(f"📇 Built legacy index: {len(section_rows)} sections of {len(seen_consts)} constitutions")
+
+
+def _is_stale(json_path, index_path):
+    if not os.path.exists(index_path): return True
+    try:
+        with closing(sqlite3.connect(index_path)) as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+    except sqlite3.Error:
+        return True
+    return row is None or row[0] != _source_stamp(json_path)
+
+
+class LegacyIndex:
+    def __init__(self, json_path=LEGACY_JSON, index_path=None):
+        index_path = index_path or index_path_for(json_path)
+        self.json_path = json_path
+        self.index_path = index_path
+        if _is_stale(json_path, index_path):
+            build_index(json_path, index_path)
+        self.conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.execute("PRAGMA mmap_size = 268435456")
+
+    def close(self):
+        self.conn.close()
+
+    def section_map(self, const_id):
+        """{section_id: content} ของ 1 ฉบับ"""
+        rows = self.conn.execute(
+            "SELECT section_id, content FROM sections WHERE const_id = ?", (const_id,)
+        )
+        return dict(rows)
+
+    def candidates(self, const_id, text):
+        """section_id ที่ MinHash ตรงกับ text อย่างน้อย 1 band (เรียงตามจำนวน band ที่ตรง)"""
+        signature = minhash(text)
+        if not signature: return []
+        keys = band_keys(signature)
+        rows = self.conn.execute(
+            f"SELECT section_id, COUNT(*) AS hits FROM lsh WHERE const_id = ? "
+            f"AND bucket IN ({', '.join('?' * len(keys))}) GROUP BY section_id ORDER BY hits DESC, section_id",
+            [const_id] + keys,
+        )
+        return [section_id for section_id, _ in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Legacy corpus index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="(re)build the SQLite index from legacy JSON")
+    query = sub.add_parser("query", help="find legacy sections similar to a text")
+    query.add_argument("const_id")
+    query.add_argument("text")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    if args.command == "build":
+        build_index()
+    elif args.command == "query":
+        index = LegacyIndex()
+        section_map = index.section_map(args.const_id)
+        for section_id in index.candidates(args.const_id, args.text)[:10]:
+            print(f"   มาตรา {section_id}: {section_map[section_id][:80]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+LLM Cache: เก็บ response ของ Gemini/Gemma ไว้ใน SQLite (WAL) ใช้ซ้ำข้ามรัน
+
+key = sha256(ชื่อโมเดล + prompt ทุกส่วน) -> prompt template หรือข้อมูลเปลี่ยน = key ใหม่อัตโนมัติ
+- เก็บเฉพาะ response ที่ parse ผ่าน (ไม่ cache ข้อความขยะ)
+- หมดอายุตาม TTL และลบตัวที่ใช้น้อยที่สุด (LRU) เมื่อขนาดรวมเกิน max_bytes
+- bypass: LLM_CACHE_BYPASS=1 หรือ --no-llm-cache -> ไม่อ่าน/ไม่เขียน cache
+
+    python llm_cache.py stats
+    python llm_cache.py clear
+"""
+import argparse
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+import telemetry
+from config import LLM_CACHE_BYPASS, LLM_CACHE_MAX_MB, LLM_CACHE_PATH, LLM_CACHE_TTL_DAYS
+
+
+class LLMCache:
+    def __init__(self, path=LLM_CACHE_PATH, ttl_seconds=LLM_CACHE_TTL_DAYS * 86400,
+                 max_bytes=LLM_CACHE_MAX_MB * 1_000_000, enabled=not LLM_CACHE_BYPASS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")  # หลาย process (run_all) อ่าน/เขียนพร้อมกันได้
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY, model TEXT, response TEXT,
+                    created_at REAL, last_used REAL, size INTEGER
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def key(model, contents):
+        h = hashlib.sha256(model.encode("utf-8"))
+        for part in [contents] if isinstance(contents, str) else contents:
+            h.update(b"\0")
+            h.update(str(part).encode("utf-8"))
+        return h.hexdigest()
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self.lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds):
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+        return row[0]
+
+    def put(self, key, model, response):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self.lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, now, now, len(response.encode("utf-8"))),
+            )
+            conn.commit()
+            self.writes += 1
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        expired = 0
+        if self.ttl_seconds > 0:
+            expired = conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        removed = 0
+        if total > self.max_bytes:
+            for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+                if total <= self.max_bytes: break
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+                removed += 1
+        conn.commit()
+        if expired or removed:
+            logging.info(f"🧹 LLM cache evicted {expired} expired + {removed} LRU entries ({total / 1e6:.1f} MB kept)")
+
+    def fetch(self, model, contents, generate, parse):
+        """
+        ผลจาก cache ถ้ามี ไม่งั้นเรียก generate() (-> ข้อความ response) แล้วเก็บ
+        parse(ข้อความ) -> ผลที่ใช้ได้ (ค่า falsy = ใช้ไม่ได้ ไม่เก็บลง cache)
+        """
+        started_at = time.perf_counter()
+        key = self.key(model, contents)
+        cached = self.get(key)
+        if cached is not None:
+            try:
+                result = parse(cached)
+            except ValueError:
+                result = None
+            if result:
+                telemetry.record_call("llm", model, time.perf_counter() - started_at, cache_hit=True,
+                                      bytes_out=len(cached.encode("utf-8")))
+                return result
+        text = generate()
+        result = parse(text)
+        if result:
+            self.put(key, model, text)
+        return result
+
+    def stats(self):
+        if not self.enabled:
+            return "LLM cache: bypassed"
+        with self.lock:
+            entries, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return (f"LLM cache: {self.hits} hits / {self.misses} misses / {self.writes} writes "
+                f"({entries} entries, {total / 1e6:.1f} MB)")
+
+    def clear(self):
+        with self.lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+            conn.execute("VACUUM")
+
+    def close(self):
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """cache เดียวของทั้ง process (agents.py และ 02_ai_analysis.py ใช้ร่วมกัน)"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = LLMCache()
+        return _shared
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent LLM response cache")
+    parser.add_argument("command", choices=["stats", "clear"])
+    args = parser.parse_args()
+
+    cache = LLMCache(enabled=True)
+    if args.command == "clear":
+        cache.clear()
+        print(f"🧹 Cleared {cache.path}")
+    else:
+        print(cache.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+LLM JSON: แกะ JSON object จาก response ของ LLM ทีละ entry (แทน _clean_json_text / _clean_json_response)
+
+response ที่คาดหวังเป็น object ชั้นเดียว {key: value, ...} (หมวด -> ผลสรุป, header -> category_id)
+- ข้ามทุกอย่างก่อน "{" ตัวแรก (```json, คำอธิบาย) และหลัง "}" ที่ปิด object
+- แยก entry ที่ระดับบนสุด: entry ไหนเสียก็เสียแค่ entry นั้น entry อื่นยังใช้ได้
+- ข้อความถูกตัดกลางทาง (max tokens / stream ขาด) -> ได้ทุก entry ที่ครบก่อนจุดตัด
+- ObjectStreamParser.feed() รับทีละ chunk จาก generate_content_stream ได้ (ไม่ parse ซ้ำตั้งแต่ต้น)
+ผู้เรียกตรวจแต่ละ entry ด้วย validator (summary_entry, category_id) แล้วขอใหม่เฉพาะ key ที่ขาด/ไม่ผ่าน
+"""
+import json
+import logging
+import re
+from collections import namedtuple
+
+from google.genai import types
+
+from config import CATEGORIES, LLM_STREAM
+from llm_scheduler import get_client
+import telemetry
+
+MALFORMED = object()  # ค่าของ entry ที่ parse ไม่ได้
+
+Salvage = namedtuple("Salvage", "valid invalid complete")  # {key: ค่าที่ผ่าน}, [key ที่เสีย], เจอ "}" ปิดหรือไม่
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_STRUCTURAL = re.compile(r'["\[\]{},]')
+_IN_STRING = re.compile(r'["\\]')
+
+
+class ObjectStreamParser:
+    """
+    feed(chunk) -> [(key, value)] ของ entry ที่ครบแล้ว (value = MALFORMED ถ้า JSON ของ entry นั้นเสีย)
+    close()     -> entry สุดท้ายที่ค้างอยู่ (ถูกตัด -> (key, MALFORMED) ถ้าอ่าน key ได้)
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0  # จุดเริ่มของ entry ถัดไป
+        self.started = False
+        self.complete = False
+        # สถานะการสแกนหาจุดจบของ entry ปัจจุบัน (ทำต่อจากเดิมเมื่อได้ chunk ใหม่)
+        self._scan_at = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        return self._drain()
+
+    def close(self):
+        entries = self._drain()
+        if self.started and not self.complete:
+            rest = self.buffer[self.pos:].strip(_WHITESPACE + ",")
+            if rest:
+                key = _read_key(rest)
+                if key is not None:
+                    entries.append((key, MALFORMED))
+        return entries
+
+    def _find_entry_end(self):
+        """index ของ "," หรือ "}" ที่ปิด entry ปัจจุบัน หรือ None ถ้ายังมาไม่ถึง"""
+        i = self.pos if self._scan_at is None else self._scan_at
+        buffer, depth, in_string, escape = self.buffer, self._depth, self._in_string, self._escape
+        while True:
+            if escape:
+                if i >= len(buffer):
+                    break
+                i, escape = i + 1, False
+            # กระโดดไปตัวอักษรที่มีความหมายถัดไป (ไม่วนทีละตัวใน Python)
+            match = (_IN_STRING if in_string else _STRUCTURAL).search(buffer, i)
+            if match is None:
+                i = len(buffer)
+                break
+            i = match.start()
+            ch = buffer[i]
+            if in_string:
+                if ch == "\\":
+                    escape = True
+                else:
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch in "[{":
+                depth += 1
+            elif ch in "]}":
+                if depth == 0:
+                    self._scan_at, self._depth, self._in_string, self._escape = None, 0, False, False
+                    return i
+                depth -= 1
+            elif depth == 0:  # ","
+                self._scan_at, self._depth, self._in_string, self._escape = None, 0, False, False
+                return i
+            i += 1
+        self._scan_at, self._depth, self._in_string, self._escape = i, depth, in_string, escape
+        return None
+
+    def _drain(self):
+        entries = []
+        while not self.complete:
+            if not self.started:
+                start = self.buffer.find("{", self.pos)
+                if start == -1:
+                    self.pos = len(self.buffer)
+                    break
+                self.pos, self.started = start + 1, True
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE + ",":
+                self.pos += 1
+            if self.pos >= len(self.buffer):
+                break
+            if self.buffer[self.pos] == "}":
+                self.complete = True
+                break
+            end = self._find_entry_end()
+            if end is None:
+                break
+            entries.append(_parse_entry(self.buffer[self.pos:end]))
+            self.pos = end
+            if self.buffer[end] in "]}":
+                self.complete = True
+        if self.pos > 4096:  # ทิ้งส่วนที่ parse แล้ว -> feed ทีละ chunk ไม่ต้อง copy ทั้ง response ทุกครั้ง
+            if self._scan_at is not None:
+                self._scan_at -= self.pos
+            self.buffer, self.pos = self.buffer[self.pos:], 0
+        return [entry for entry in entries if entry[0] is not None]
+
+
+def _read_key(text):
+    try:
+        key, _ = _DECODER.raw_decode(text)
+    except json.JSONDecodeError:
+        return None
+    return key if isinstance(key, str) else None
+
+
+def _parse_entry(text):
+    """'"key": value' -> (key, value) / (key, MALFORMED) / (None, MALFORMED) ถ้าอ่าน key ไม่ได้"""
+    text = text.strip(_WHITESPACE)
+    try:
+        key, i = _DECODER.raw_decode(text)
+    except json.JSONDecodeError:
+        return None, MALFORMED
+    if not isinstance(key, str):
+        return None, MALFORMED
+    rest = text[i:].lstrip(_WHITESPACE)
+    if not rest.startswith(":"):
+        return key, MALFORMED
+    rest = rest[1:].lstrip(_WHITESPACE)
+    try:
+        value, i = _DECODER.raw_decode(rest)
+    except json.JSONDecodeError:
+        return key, MALFORMED
+    if rest[i:].strip(_WHITESPACE):
+        return key, MALFORMED
+    return key, value
+
+
+def salvage_object(text, validate=None):
+    """
+    Salvage(valid, invalid, complete) จากข้อความทั้งก้อน
+    validate(value) -> ค่าที่ใช้ได้ หรือ None (= นับเป็น invalid)
+    """
+    parser = ObjectStreamParser()
+    entries = parser.feed(text or "") + parser.close()
+    valid, invalid = {}, []
+    for key, value in entries:
+        if value is not MALFORMED and validate is not None:
+            value = validate(value)
+        if value is MALFORMED or value is None:
+            invalid.append(key)
+        else:
+            valid[key] = value
+    return Salvage(valid, invalid, parser.complete)
+
+
+def summary_entry(value):
+    """{"summary": str ไม่ว่าง, "key_change": str (ไม่มี = "-")} หรือ None"""
+    if not isinstance(value, dict):
+        return None
+    summary = value.get("summary")
+    if not isinstance(summary, str) or not summary.strip():
+        return None
+    key_change = value.get("key_change")
+    return {"summary": summary, "key_change": key_change if isinstance(key_change, str) and key_change else "-"}
+
+
+def category_id(value):
+    return value if isinstance(value, str) and value in CATEGORIES else None
+
+
+def generate_json_text(model, contents, json_mode=True, stream=LLM_STREAM, label=None):
+    """
+    1 request -> ข้อความ response (ใช้ใน call ที่ส่งให้ llm_scheduler)
+    stream: ใช้ generate_content_stream ถ้า client มี -> stream ขาดกลางทางแต่ได้ entry ครบแล้วบางส่วน
+    ก็คืนข้อความเท่าที่ได้ (ผู้เรียก salvage แล้วขอใหม่เฉพาะ key ที่ขาด) แทนที่จะทิ้งทั้ง request
+    """
+    models = get_client().models
+    config = types.GenerateContentConfig(response_mime_type="application/json") if json_mode else None
+    parts = [contents] if isinstance(contents, str) else contents
+    telemetry.annotate(bytes_in=sum(len(str(part).encode("utf-8")) for part in parts))
+    if not stream or not hasattr(models, "generate_content_stream"):
+        response = models.generate_content(model=model, contents=contents, config=config)
+        _annotate_usage(response, response.text)
+        return response.text
+
+    parser = ObjectStreamParser()
+    parts, received, last = [], 0, None
+    try:
+        for chunk in models.generate_content_stream(model=model, contents=contents, config=config):
+            text = chunk.text or ""
+            parts.append(text)
+            received += len(parser.feed(text))
+            last = chunk
+    except Exception as e:
+        if not received:
+            raise
+        logging.warning(f"🩹 Stream for {label or model} broke after {received} entries, keeping them: {e}")
+    text = "".join(parts)
+    _annotate_usage(last, text)  # usage_metadata ของ chunk สุดท้าย = ยอดรวมทั้ง response
+    return text
+
+
+def _annotate_usage(response, text):
+    usage = getattr(response, "usage_metadata", None)
+    telemetry.annotate(
+        bytes_out=len((text or "").encode("utf-8")),
+        prompt_tokens=getattr(usage, "prompt_token_count", None),
+        output_tokens=getattr(usage, "candidates_token_count", None),
+    )
@@ -0,0 +1,309 @@
+"""
+LLM Scheduler: ทุก request ไป Gemini/Gemma/GLM ผ่านที่นี่ที่เดียว (agents.py, 02_ai_analysis.py, _agents_legacy.py)
+
+- client เดียวทั้ง process (get_client) -> ใช้ connection pool ร่วมกัน ไม่สร้าง genai.Client ทุกโมดูล
+- ต่อโมเดล: จำกัด request พร้อมกัน + request ต่อนาที (config.LLM_MODEL_LIMITS, TokenBucket)
+- คิวตามลำดับความสำคัญ: slot ว่าง -> request ที่ priority ต่ำสุด (สำคัญสุด) ได้ก่อน, เท่ากัน = มาก่อนได้ก่อน
+- 429: หยุดทั้งโมเดลตาม retry-after (ไม่ใช่ทุก thread ยิงซ้ำพร้อมกัน) + ลด concurrency ลงครึ่ง
+  แล้วค่อยๆ เพิ่มกลับเมื่อสำเร็จ (AIMD)
+- error อื่น: exponential backoff + full jitter (สุ่ม 0..base*2^n) ต่อ request
+- circuit breaker: ล้มเหลวติดกัน LLM_BREAKER_THRESHOLD ครั้ง -> ปฏิเสธทันที (CircuitOpenError)
+  จนครบ LLM_BREAKER_COOLDOWN แล้วปล่อย request ทดลอง 1 ตัว (สำเร็จ = เปิดใช้ปกติ)
+- 400/401/403/404 ไม่ retry (แก้ที่ prompt/key ไม่ใช่รอ)
+"""
+import email.utils
+import heapq
+import itertools
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter
+
+from config import (
+    GOOGLE_API_KEY,
+    LLM_BACKOFF_BASE,
+    LLM_BACKOFF_MAX,
+    LLM_BREAKER_COOLDOWN,
+    LLM_BREAKER_THRESHOLD,
+    LLM_DEFAULT_LIMITS,
+    LLM_MAX_RETRIES,
+    LLM_MODEL_LIMITS,
+)
+from rate_limit import TokenBucket
+import telemetry
+
+PRIORITY_HIGH = 0  # งานที่มีคนรออยู่ (header mapping, รวมผลสรุปของหมวดที่ทำส่วนย่อยครบแล้ว)
+PRIORITY_NORMAL = 1
+
+NON_RETRYABLE = {400, 401, 403, 404}
+RATE_LIMITED = 429
+# Gemini: "retryDelay": "17s" ใน details / "Please retry in 17.39s." ในข้อความ
+_RETRY_DELAY = re.compile(r"retry_?delay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s|retry in (\d+(?:\.\d+)?)\s*s", re.I)
+_STATUS_PREFIX = re.compile(r"^\s*(\d{3})\b")
+
+
+class LLMRequestError(RuntimeError):
+    """request ล้มเหลวหลัง retry ครบ (หรือ error ที่ไม่ควร retry)"""
+
+
+class CircuitOpenError(LLMRequestError):
+    """โมเดลนี้ล้มเหลวติดกันหลายครั้ง -> ไม่ส่ง request จนกว่าจะพ้นช่วง cooldown"""
+
+
+class InvalidResponseError(ValueError):
+    """API ตอบกลับแต่ validate ไม่ผ่าน (JSON เสีย/ว่าง)"""
+
+
+def error_info(exc):
+    """(HTTP status หรือ None, retry-after วินาที หรือ None) จาก exception ของ google-genai / zhipuai / httpx"""
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "code", None)
+    if not isinstance(status, int):
+        status = getattr(exc, "status_code", None)
+    if not isinstance(status, int):
+        status = getattr(response, "status_code", None)
+    if not isinstance(status, int):
+        match = _STATUS_PREFIX.match(str(exc))
+        status = int(match.group(1)) if match else None
+
+    retry_after = None
+    headers = getattr(response, "headers", None)
+    value = headers.get("retry-after") if headers is not None else None
+    if value:
+        try:
+            retry_after = float(value)
+        except ValueError:
+            try:
+                retry_after = email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                pass
+    if retry_after is None:
+        match = _RETRY_DELAY.search(f"{getattr(exc, 'details', '')} {exc}")
+        if match:
+            retry_after = float(match.group(1) or match.group(2))
+    return status, (max(0.0, retry_after) if retry_after is not None else None)
+
+
+class _ModelGate:
+    """slot + คิว priority + rate limit + circuit breaker ของโมเดลเดียว"""
+
+    def __init__(self, model, concurrency, rpm, breaker_threshold, breaker_cooldown, quota_share=1.0):
+        self.model = model
+        self.max_concurrency = max(1, int(concurrency))
+        self.limit = float(self.max_concurrency)  # ลดลงเมื่อโดน 429, เพิ่มกลับเมื่อสำเร็จ
+        self.rpm = rpm
+        self.set_quota_share(quota_share)
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.cond = threading.Condition()
+        self.active = 0
+        self.waiting = []  # heap ของ (priority, ลำดับที่มา)
+        self.paused_until = 0.0
+        self.failures = 0  # ล้มเหลวติดกัน
+        self.opened_at = None  # breaker เปิดอยู่ตั้งแต่เวลานี้
+        self.probing = False  # ช่วง half-open: มี request ทดลองอยู่แล้ว 1 ตัว
+
+    def set_quota_share(self, share):
+        self.bucket = TokenBucket(self.rpm * share / 60.0, burst=self.max_concurrency)
+
+    def _breaker_blocks(self, now):
+        """True = ต้องรอ request ทดลอง, raise = breaker เปิดอยู่"""
+        if self.opened_at is None:
+            return False
+        remaining = self.opened_at + self.breaker_cooldown - now
+        if remaining > 0:
+            raise CircuitOpenError(
+                f"{self.model}: circuit open after {self.failures} consecutive failures "
+                f"(retry in {remaining:.0f}s)"
+            )
+        return self.probing
+
+    def acquire(self, ticket):
+        with self.cond:
+            heapq.heappush(self.waiting, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    blocked = self._breaker_blocks(now)
+                    if (not blocked and self.waiting[0] == ticket and self.active < int(self.limit)
+                            and now >= self.paused_until):
+                        break
+                    self.cond.wait(self.paused_until - now if self.paused_until > now else None)
+            except BaseException:
+                self.waiting.remove(ticket)
+                heapq.heapify(self.waiting)
+                self.cond.notify_all()
+                raise
+            heapq.heappop(self.waiting)
+            self.active += 1
+            if self.opened_at is not None:
+                self.probing = True
+            self.cond.notify_all()
+        return self.bucket.acquire()
+
+    def release(self, outcome, retry_after=0.0):
+        """outcome: "ok" | "rate_limited" | "failed" | "neutral" (error ฝั่งเรา ไม่นับเป็นความผิดของ API)"""
+        with self.cond:
+            self.active -= 1
+            now = time.monotonic()
+            if outcome == "ok":
+                self.failures = 0
+                self.opened_at = None
+                self.probing = False
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            elif outcome == "rate_limited":
+                self.limit = max(1.0, self.limit / 2)
+                self.paused_until = max(self.paused_until, now + retry_after)
+                self.probing = False
+            elif outcome == "failed":
+                self.failures += 1
+                if self.probing or self.failures >= self.breaker_threshold:
+                    if self.opened_at is None or self.probing:
+                        logging.warning(f"🔌 {self.model}: circuit open for {self.breaker_cooldown:.0f}s "
+                                        f"({self.failures} consecutive failures)")
+                    self.opened_at = now
+                self.probing = False
+            else:
+                self.probing = False
+            self.cond.notify_all()
+
+
+class LLMScheduler:
+    def __init__(self, model_limits=None, default_limits=LLM_DEFAULT_LIMITS, max_retries=LLM_MAX_RETRIES,
+                 backoff_base=LLM_BACKOFF_BASE, backoff_max=LLM_BACKOFF_MAX,
+                 breaker_threshold=LLM_BREAKER_THRESHOLD, breaker_cooldown=LLM_BREAKER_COOLDOWN, seed=None):
+        self.model_limits = dict(LLM_MODEL_LIMITS if model_limits is None else model_limits)
+        self.default_limits = default_limits
+        self.max_retries = max(1, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.quota_share = 1.0
+        self._random = random.Random(seed)
+        self._gates = {}
+        self._lock = threading.Lock()
+        self._order = itertools.count()
+        self.counts = Counter()
+
+    def set_quota_share(self, share):
+        """ส่วนของโควต้า RPM ที่ process นี้ใช้ได้ (run_all.py: 1 / จำนวน worker)"""
+        with self._lock:
+            self.quota_share = max(0.0, float(share))
+            for gate in self._gates.values():
+                gate.set_quota_share(self.quota_share)
+
+    def gate(self, model):
+        with self._lock:
+            if model not in self._gates:
+                concurrency, rpm = self.model_limits.get(model, self.default_limits)
+                self._gates[model] = _ModelGate(model, concurrency, rpm, self.breaker_threshold,
+                                                self.breaker_cooldown, self.quota_share)
+            return self._gates[model]
+
+    def _count(self, key):
+        with self._lock:
+            self.counts[key] += 1
+
+    def _backoff(self, attempt):
+        with self._lock:
+            return self._random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, model, call, validate=None, priority=PRIORITY_NORMAL, label=None, max_retries=None):
+        """
+        เรียก call() (1 request ไป API) ภายใต้ข้อจำกัดของโมเดล แล้วคืนผล
+        validate(ผล) -> falsy หรือ raise = ใช้ไม่ได้ ขอใหม่ (นับ attempt แต่ไม่นับเป็นความผิดของ API)
+        ล้มเหลวครบทุก attempt -> LLMRequestError
+        """
+        gate = self.gate(model)
+        label = label or model
+        attempts = max(1, int(max_retries or self.max_retries))
+        last_error = None
+        with telemetry.call("llm", model, label=label, retries=0, queue_seconds=0.0) as rec:
+            for attempt in range(attempts):
+                if attempt:
+                    self._count(f"{model}:retries")
+                    rec["retries"] = attempt
+                ticket = (priority, next(self._order))
+                waited_at = time.perf_counter()
+                gate.acquire(ticket)
+                rec["queue_seconds"] = round(rec["queue_seconds"] + time.perf_counter() - waited_at, 6)
+                self._count(f"{model}:requests")
+                try:
+                    result = call()
+                except Exception as e:
+                    status, retry_after = error_info(e)
+                    last_error = e
+                    if status in NON_RETRYABLE:
+                        gate.release("neutral")
+                        raise LLMRequestError(f"{label}: {e}") from e
+                    if status == RATE_LIMITED:
+                        self._count(f"{model}:rate_limited")
+                        gate.release("rate_limited", retry_after or self.backoff_base)
+                        delay = self._backoff(0)  # กระจายจังหวะหลังพ้นช่วงหยุด (gate รอ retry-after ให้แล้ว)
+                    else:
+                        self._count(f"{model}:errors")
+                        gate.release("failed")
+                        delay = max(retry_after or 0.0, self._backoff(attempt))
+                    logging.warning(f"⚠️ {label} failed (Attempt {attempt + 1}/{attempts}): {e}")
+                else:
+                    gate.release("ok")
+                    try:
+                        valid = validate is None or validate(result)
+                    except Exception as e:
+                        valid, last_error = False, e
+                    if valid:
+                        return result
+                    self._count(f"{model}:invalid")
+                    last_error = InvalidResponseError(f"{last_error or 'empty/invalid response'}")
+                    logging.warning(f"⚠️ Empty/Invalid response for {label} (Attempt {attempt + 1}/{attempts})")
+                    delay = self._backoff(attempt)
+                if attempt + 1 < attempts:
+                    time.sleep(delay)
+            raise LLMRequestError(f"{label}: failed after {attempts} attempts: {last_error}") from last_error
+
+    def stats(self):
+        models = sorted({key.split(":", 1)[0] for key in self.counts})
+        if not models:
+            return "LLM scheduler: no requests"
+        parts = []
+        for model in models:
+            c = {name: self.counts[f"{model}:{name}"]
+                 for name in ("requests", "retries", "rate_limited", "errors", "invalid")}
+            parts.append(f"{model} {c['requests']} requests ({c['retries']} retries, {c['rate_limited']} x 429, "
+                         f"{c['errors']} errors, {c['invalid']} invalid)")
+        return "LLM scheduler: " + "; ".join(parts)
+
+
+_client = None
+_client_lock = threading.Lock()
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_client():
+    """genai.Client เดียวของทั้ง process (None ถ้าไม่มี GOOGLE_API_KEY)"""
+    global _client
+    with _client_lock:
+        if _client is None and GOOGLE_API_KEY:
+            from google import genai
+            _client = genai.Client(api_key=GOOGLE_API_KEY)
+        return _client
+
+
+def set_client(client):
+    """แทน client (benchmark ใช้ client ปลอม)"""
+    global _client
+    with _client_lock:
+        _client = client
+
+
+def shared_scheduler():
+    """scheduler เดียวของทั้ง process (ทุก agent ใช้ร่วมกัน -> นับโควต้ารวมกัน)"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = LLMScheduler()
+        return _shared
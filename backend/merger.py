@@ -1,99 +1,181 @@
+import os
 import re
 import logging
 import time
-from typhoon_ocr import ocr_document 
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate
 from tqdm import tqdm
 
+from config import OCR_CONCURRENCY, OCR_RATE_LIMIT, OCR_CACHE_DIR, OCR_CACHE_MAX_MB, PREPROCESS_IMAGES
+from corrections import compile_corrector, load_rules, rules_version
+from ocr_backends import get_backend
+from ocr_cache import OCRCache
+from preprocess import preprocess_images, target_dim_for
+from rate_limit import TokenBucket
+import telemetry
+from section_lexer import CHAPTER, INTRO, PART, tokenize
+
 logging.basicConfig(level=logging.INFO)
 
+# เพิ่มเลขข้างหน้าทุกครั้งที่แก้ _clean_text / _parse_markdown_to_json (ทำให้ OCR cache เดิมหมดอายุ)
+# ส่วนหลังเปลี่ยนเองเมื่อแก้ ocr_corrections.json
+CLEAN_RULES_VERSION = f"3-{rules_version()}"
+
 class ConstitutionMerger:
-    def __init__(self):
-        self.model_name = "typhoon-ocr" 
+    def __init__(self, concurrency=OCR_CONCURRENCY, rate_limit=OCR_RATE_LIMIT, use_cache=True,
+                 preprocess=PREPROCESS_IMAGES, backend=None):
+        self.backend = backend or get_backend()
+        self._correct = compile_corrector(load_rules())
+        self.model_name = self.backend.name
+        self.preprocess = preprocess
+        self.concurrency = max(1, int(concurrency))
+        # Token bucket แทน time.sleep(1) แบบตายตัว
+        self.limiter = TokenBucket(rate_limit, burst=self.concurrency)
+        self.cache = None
+        if use_cache:
+            self.cache = OCRCache(
+                OCR_CACHE_DIR, OCR_CACHE_MAX_MB * 1024 * 1024, self.model_name, CLEAN_RULES_VERSION
+            )
 
     def _clean_text(self, text):
         if not text: return ""
-        text = re.sub(r'<page_number>.*?</page_number>', '', text)
-        replacements = {
-            "เหล่าก็เหน็ด": "เหล่ากำเนิด",
-            "อำนาจอธิปไตยอ่อน": "อำนาจอธิปไตยย่อม",
-            "อุบสภา": "ยุบสภา",
-            "สำโวย": "โดย",
-            "ไขว้": "ไซร้",
-            "ฉะเพาะ": "เฉพาะ"
-        }
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-        return text.strip()
+        # ลบเลขหน้า + แก้คำผิดจาก ocr_corrections.json ในรอบเดียว
+        return self._correct(text).strip()
 
     def _parse_markdown_to_json(self, markdown_text):
         sections = []
-        text = markdown_text.replace("**", "").strip()
-        
-        chunks = re.split(r"(?:^|\n)มาตรา\s*([๐-๙0-9]+)", text)
-        
-        # ส่วน Intro (หน้าแรก)
-        if chunks[0].strip():
-            sections.append({
-                "id": "intro",
-                "content": self._clean_text(chunks[0]),
-                "type": "intro",
-                "status": "OCR"
-            })
-        
-        # Loop มาตรา
-        for i in range(1, len(chunks), 2):
-            sec_id_raw = chunks[i].strip()
-            content_raw = chunks[i+1].strip()
-            
-            sec_id = sec_id_raw.translate(str.maketrans("๐๑๒๓๔๕๖๗๘๙", "0123456789"))
-            clean_content = self._clean_text(re.sub(r'\n+', ' ', content_raw))
-            
-            # Logic: เช็คว่ามี "หมวด/ส่วน" ติดอยู่ที่ท้ายประโยคไหม?
-            # Regex: หาคำว่า "หมวด..." หรือ "ส่วนที่..." ที่อยู่ท้ายสุดของข้อความ
-            split_pattern = r"(.*?)\s+(หมวด\s*[๐-๙0-9]+.*?|ส่วนที่\s*[๐-๙0-9]+.*?)$"
-            match = re.search(split_pattern, clean_content)
-            
-            if match:
-                # ถ้าเจอ -> แยกเป็น 2 ก้อน
-                real_content = match.group(1).strip()
-                header_text = match.group(2).strip()
-                
-                # 1. เก็บเนื้อหามาตรา (ตัดหมวดออกแล้ว)
-                sections.append({
-                    "id": sec_id,
-                    "content": real_content,
-                    "type": "section",
-                    "status": "OCR"
-                })
-                
-                # 2. เก็บหมวดเป็น ID ใหม่ (เพื่อให้เรียงต่อกันสวยๆ)
-                # ตั้งชื่อ ID ให้รู้ว่าเป็น header ของ section นี้
-                sections.append({
-                    "id": f"header_after_{sec_id}", 
-                    "content": header_text,
-                    "type": "header",
-                    "status": "OCR"
-                })
-            else:
-                # ถ้าไม่เจอ -> เก็บปกติ
+        # ลบเลขหน้า + แก้คำผิดครั้งเดียวทั้งหน้า (ไม่ต้องทำซ้ำทุก section) แล้วค่อยแยก token
+        text = self._clean_text(markdown_text.replace("**", ""))
+
+        for token in tokenize(text):
+            content = token.text.strip()
+            # ตำแหน่งตัวอักษรแรกของ content ในข้อความหน้า (หลัง clean) -> provenance
+            offset = token.start + len(token.text) - len(token.text.lstrip())
+
+            # ส่วน Intro (ข้อความก่อนมาตราแรกของหน้า)
+            if token.kind == INTRO:
+                if not content: continue
                 sections.append({
-                    "id": sec_id,
-                    "content": clean_content,
-                    "type": "section",
-                    "status": "OCR"
+                    "id": "intro",
+                    "content": content,
+                    "type": "intro",
+                    "status": "OCR",
+                    "offset": offset
                 })
-            
+                continue
+
+            content = re.sub(r'\n+', ' ', content)
+
+            # "หมวด/ส่วน" ที่ตามหลังมาตรา -> เก็บเป็น header ต่อจากมาตรานั้น
+            # (หมวด + ส่วนที่ ที่ติดกันรวมเป็น header เดียว)
+            if token.kind in (CHAPTER, PART):
+                header_id = f"header_after_{token.sec_id}"
+                if sections and sections[-1]["id"] == header_id:
+                    sections[-1]["content"] += " " + content
+                else:
+                    sections.append({
+                        "id": header_id,
+                        "content": content,
+                        "type": "header",
+                        "status": "OCR",
+                        "offset": offset
+                    })
+                continue
+
+            # มาตรา / มาตราย่อย (44/1)
+            sections.append({
+                "id": token.sec_id,
+                "content": content,
+                "type": "section",
+                "status": "OCR",
+                "offset": offset
+            })
+
         return sections
 
-    def process_batch_images(self, image_paths, existing_json_sections):
-        all_sections = []
-        for img_path in tqdm(image_paths, desc="OCR Processing"):
+    def _ocr_page(self, img_path, source_path=None):
+        """OCR 1 หน้า (ผ่าน rate limiter) แล้วแปลงเป็น sections (source_path = รูปต้นฉบับก่อน preprocess)"""
+        with telemetry.call("ocr", self.model_name, label=os.path.basename(img_path)) as rec:
+            if self.cache:
+                cached = self.cache.get(img_path)
+                if cached is not None:
+                    rec["cache_hit"] = True
+                    return cached
+
+            rec["queue_seconds"] = round(self.limiter.acquire(), 6)
             try:
-                md = ocr_document(img_path)
-                parts = self._parse_markdown_to_json(md)
-                all_sections.extend(parts)
-                time.sleep(1)
+                if self.preprocess:
+                    # ไม่ให้ library ขยายรูปที่ย่อแล้วกลับไปเป็น 1800px
+                    md = self.backend.ocr(img_path, source_path=source_path or img_path,
+                                          target_image_dim=target_dim_for(img_path))
+                else:
+                    md = self.backend.ocr(img_path, source_path=source_path or img_path)
+                rec["bytes_in"] = os.path.getsize(img_path) if os.path.exists(img_path) else 0
+                rec["bytes_out"] = len(md.encode("utf-8"))
+                parse_started_at = time.perf_counter()
+                sections = self._parse_markdown_to_json(md)
+                rec["parse_seconds"] = round(time.perf_counter() - parse_started_at, 6)
             except Exception as e:
                 logging.error(f"Error {img_path}: {e}")
+                rec["status"] = "error"
+                return []
+
+        if self.cache:
+            self.cache.put(img_path, sections)
+        return sections
+
+    def _log_throughput(self, page_count, started_at):
+        elapsed = time.perf_counter() - started_at
+        if page_count and elapsed > 0:
+            logging.info(
+                f"📈 OCR throughput: {page_count / elapsed:.2f} pages/sec "
+                f"({page_count} pages in {elapsed:.1f}s, concurrency={self.concurrency})"
+            )
 
-        return all_sections
\ No newline at end of file
+    def process_batches(self, image_batches, first_pages=None):
+        """
+        OCR หลาย batch พร้อมกันด้วย thread pool
+        yield (index, sections) ตามลำดับ batch เดิม เพื่อให้ caller save checkpoint ได้ทีละ batch
+        ทุก section มี "page" = ลำดับรูปในฉบับ (เริ่ม 1) ที่ section นั้นเริ่ม
+        (ยกเว้น backend ที่ exact_pages=False เช่น replay: จุดตัดหน้าเป็นค่าเดา -> ไม่ใส่ page ให้ไปถึงตารางหน้า)
+        first_pages: เลขหน้าของรูปแรกในแต่ละ batch (default: นับต่อกันจาก 1)
+        """
+        if first_pages is None:
+            first_pages = list(accumulate([1] + [len(paths) for paths in image_batches[:-1]]))
+        page_count = sum(len(paths) for paths in image_batches)
+        started_at = time.perf_counter()
+
+        source_batches = image_batches
+        if self.preprocess:
+            processed = iter(preprocess_images([p for paths in image_batches for p in paths]))
+            image_batches = [[next(processed) for _ in paths] for paths in image_batches]
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool, \
+                tqdm(total=page_count, desc="OCR Processing") as progress:
+            pending = []
+            for paths, sources in zip(image_batches, source_batches):
+                futures = [pool.submit(self._ocr_page, p, src) for p, src in zip(paths, sources)]
+                for future in futures:
+                    future.add_done_callback(lambda _: progress.update(1))
+                pending.append(futures)
+
+            for idx, futures in enumerate(pending):
+                # รอตามลำดับหน้า -> ลำดับ sections เหมือนเดิมสำหรับ smart_heal_sequence
+                all_sections = []
+                for page, future in enumerate(futures, first_pages[idx]):
+                    sections = future.result()
+                    if self.backend.exact_pages:
+                        for item in sections:
+                            item["page"] = page
+                    all_sections.extend(sections)
+                yield idx, all_sections
+
+        self._log_throughput(page_count, started_at)
+        if self.cache:
+            logging.info(f"♻️ {self.cache.stats()}")
+
+    def process_batch_images(self, image_paths, existing_json_sections):
+        all_sections = []
+        for _, sections in self.process_batches([image_paths]):
+            all_sections = sections
+        return all_sections
@@ -0,0 +1,186 @@
+"""
+OCR Backends: ให้ Stage 1 เลือกแหล่ง OCR ได้ (config.OCR_BACKEND / env OCR_BACKEND)
+
+- typhoon : เรียก Typhoon OCR API จริง (ค่าเริ่มต้น)
+- replay  : ตอบ markdown ที่บันทึกไว้ (ocr_recordings/) หรือสร้างจาก con*_checkpoint.json -> ไม่ต้องใช้ network
+- fake    : replay + หน่วงเวลา/สุ่ม error เหมือน API จริง สำหรับ benchmark concurrency, cache, healing
+
+ตั้ง OCR_RECORD=1 ตอนใช้ typhoon เพื่อบันทึก markdown ทุกหน้าไว้ replay ภายหลัง
+"""
+import logging
+import os
+import random
+import threading
+import time
+
+from config import (
+    IMAGES_PER_BATCH,
+    OCR_BACKEND,
+    OCR_FAKE_ERROR_RATE,
+    OCR_FAKE_LATENCY,
+    OCR_RECORD,
+    OCR_RECORDINGS_DIR,
+    get_run_config,
+)
+
+
+def _page_key(img_path):
+    """images_raw/con2560/12.png -> ("con2560", 12)"""
+    const_id = os.path.basename(os.path.dirname(os.path.abspath(img_path)))
+    digits = "".join(filter(str.isdigit, os.path.basename(img_path)))
+    return const_id, int(digits or 0)
+
+
+def _recording_path(recordings_dir, const_id, page):
+    return os.path.join(recordings_dir, const_id, f"{page}.md")
+
+
+class OCRBackend:
+    name = "base"
+    # True = markdown ของแต่ละหน้ามาจากรูปหน้านั้นจริง -> page ใน provenance ใช้สร้าง json_output/pages ได้
+    exact_pages = True
+
+    def ocr(self, img_path, source_path=None, **kwargs):
+        """
+        คืนผล OCR ของรูป 1 หน้าเป็น markdown
+        source_path: รูปต้นฉบับ images_raw/<id>/<page>.png (img_path อาจเป็น images_preprocessed/<sha256>.png
+        เมื่อเปิด PREPROCESS_IMAGES) -> backend ที่ต้องรู้ (const_id, page) ใช้ path นี้ ไม่ใช่ img_path
+        """
+        raise NotImplementedError
+
+
+class TyphoonBackend(OCRBackend):
+    name = "typhoon-ocr"
+
+    def __init__(self):
+        # import ตอนสร้าง -> backend อื่นใช้งานได้โดยไม่ต้องติดตั้ง typhoon_ocr
+        from typhoon_ocr import ocr_document
+        self._ocr_document = ocr_document
+
+    def ocr(self, img_path, source_path=None, **kwargs):
+        return self._ocr_document(img_path, **kwargs)
+
+
+class RecordingBackend(OCRBackend):
+    """ห่อ backend จริง แล้วบันทึก markdown ทุกหน้าไว้ให้ ReplayBackend"""
+
+    def __init__(self, inner, recordings_dir=OCR_RECORDINGS_DIR):
+        self.inner = inner
+        self.name = inner.name
+        self.exact_pages = inner.exact_pages
+        self.recordings_dir = recordings_dir
+
+    def ocr(self, img_path, source_path=None, **kwargs):
+        md = self.inner.ocr(img_path, source_path=source_path, **kwargs)
+        const_id, page = _page_key(source_path or img_path)
+        path = _recording_path(self.recordings_dir, const_id, page)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(md)
+        return md
+
+
+def sections_to_markdown(sections):
+    """แปลง sections (รูปแบบใน checkpoint) กลับเป็น markdown ที่ _parse_markdown_to_json อ่านได้"""
+    lines = []
+    for item in sections:
+        sec_id = str(item.get("id", ""))
+        content = item.get("content", "")
+        if item.get("type") == "header" or sec_id.startswith("header_"):
+            lines.append(content)
+        elif sec_id == "intro" or item.get("type") == "intro":
+            lines.append(content)
+        else:
+            lines.append(f"มาตรา {sec_id} {content}")
+    return "\n".join(lines)
+
+
+class ReplayBackend(OCRBackend):
+    """
+    ตอบจาก ocr_recordings/<id>/<page>.md ถ้ามี ไม่งั้นสร้างจาก checkpoint
+    (section มี "page" -> ใช้หน้านั้น, checkpoint เก่าที่ไม่มี page: "intro" เกิดได้เฉพาะต้นหน้า
+    จึงใช้เป็นจุดตัดหน้า หน้าที่เหลือของ batch เป็นหน้าว่าง)
+    """
+    name = "replay"
+    # checkpoint เก่าไม่มี page -> จุดตัดหน้าเดาจาก intro (ไม่ใช่หน้าจริง)
+    exact_pages = False
+
+    def __init__(self, recordings_dir=OCR_RECORDINGS_DIR, images_per_batch=IMAGES_PER_BATCH):
+        self.recordings_dir = recordings_dir
+        self.images_per_batch = images_per_batch
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def _split_pages(self, sections):
+        pages = [[]]
+        for item in sections:
+            if item.get("id") == "intro" and pages[-1] and len(pages) < self.images_per_batch:
+                pages.append([])
+            pages[-1].append(item)
+        return pages + [[]] * (self.images_per_batch - len(pages))
+
+    def _seed_from_checkpoint(self, const_id):
+        from checkpoint import load_checkpoint
+
+        run_cfg = get_run_config(const_id)
+        pages = {}
+        batches = load_checkpoint(run_cfg.checkpoint_file, run_cfg.checkpoint_journal)
+        for batch_num, sections in batches.items():
+            first_page = (batch_num - 1) * self.images_per_batch + 1
+            if sections and all("page" in item for item in sections):
+                chunks = [[item for item in sections if item["page"] == page]
+                          for page in range(first_page, first_page + self.images_per_batch)]
+            else:
+                chunks = self._split_pages(sections)
+            for offset, chunk in enumerate(chunks):
+                pages[first_page + offset] = sections_to_markdown(chunk)
+        logging.info(f"📼 Replay: seeded {len(pages)} pages of {const_id} from checkpoint")
+        return pages
+
+    def ocr(self, img_path, source_path=None, **kwargs):
+        const_id, page = _page_key(source_path or img_path)
+        path = _recording_path(self.recordings_dir, const_id, page)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+
+        with self._lock:
+            if const_id not in self._pages:
+                self._pages[const_id] = self._seed_from_checkpoint(const_id)
+        if page not in self._pages[const_id]:
+            raise KeyError(f"No recorded OCR for {const_id} page {page}")
+        return self._pages[const_id][page]
+
+
+class FakeLatencyBackend(OCRBackend):
+    """หน่วงเวลาแบบสุ่ม (±50% รอบค่าเฉลี่ย) และสุ่ม error ก่อนส่งต่อให้ backend ข้างใน"""
+
+    def __init__(self, inner, latency=OCR_FAKE_LATENCY, error_rate=OCR_FAKE_ERROR_RATE, seed=None):
+        self.inner = inner
+        self.name = f"fake-{inner.name}"
+        self.exact_pages = inner.exact_pages
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def ocr(self, img_path, **kwargs):
+        with self._lock:
+            delay = self.latency * self._random.uniform(0.5, 1.5)
+            fail = self._random.random() < self.error_rate
+        time.sleep(delay)
+        if fail:
+            raise RuntimeError(f"Injected OCR failure for {img_path}")
+        return self.inner.ocr(img_path, **kwargs)
+
+
+def get_backend(name=OCR_BACKEND):
+    name = (name or "typhoon").lower()
+    if name == "typhoon":
+        backend = TyphoonBackend()
+        return RecordingBackend(backend) if OCR_RECORD else backend
+    if name == "replay":
+        return ReplayBackend()
+    if name == "fake":
+        return FakeLatencyBackend(ReplayBackend())
+    raise ValueError(f"Unknown OCR backend: {name!r} (expected typhoon, replay or fake)")
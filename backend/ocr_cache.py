@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+
+class OCRCache:
+    """
+    Cache ผล OCR บนดิสก์ แบบ content-addressed
+    key = sha256(bytes ของรูป + ชื่อโมเดล OCR + เวอร์ชันกฎ clean text)
+    -> เปลี่ยน IMAGES_PER_BATCH / เปลี่ยนชื่อโฟลเดอร์ ก็ยังใช้ cache เดิมได้
+    ลบไฟล์ที่ใช้น้อยที่สุด (LRU ตาม mtime) เมื่อขนาดรวมเกิน max_bytes
+    """
+
+    def __init__(self, cache_dir, max_bytes, model_name, rules_version):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.model_name = model_name
+        self.rules_version = rules_version
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self._key_memo = {}
+        self._total_bytes = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, img_path):
+        stat = os.stat(img_path)
+        memo_key = (os.path.abspath(img_path), stat.st_mtime_ns, stat.st_size)
+        if memo_key not in self._key_memo:
+            h = hashlib.sha256()
+            with open(img_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            h.update(f"|{self.model_name}|{self.rules_version}".encode("utf-8"))
+            self._key_memo[memo_key] = h.hexdigest()
+        return self._key_memo[memo_key]
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def has(self, img_path):
+        return os.path.exists(self._path(self.key(img_path)))
+
+    def get(self, img_path):
+        path = self._path(self.key(img_path))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)  # mark as recently used
+        except (OSError, ValueError):
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return entry["sections"]
+
+    def put(self, img_path, sections):
+        path = self._path(self.key(img_path))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"source": os.path.basename(img_path), "model": self.model_name, "sections": sections},
+                f, ensure_ascii=False,
+            )
+        with self.lock:
+            # เขียนทับ key เดิม -> หักขนาดไฟล์เก่าออกก่อน (ไม่งั้นยอดรวมโตเกินจริง แล้ว evict เร็วไป)
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            os.replace(tmp_path, path)
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._entries())
+            else:
+                self._total_bytes += os.path.getsize(path) - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"): continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes: break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._total_bytes = total
+        if removed:
+            logging.info(f"🧹 OCR cache evicted {removed} entries ({total / 1e6:.1f} MB kept)")
+
+    def stats(self):
+        return f"OCR cache: {self.hits} hits / {self.misses} misses"
@@ -0,0 +1,166 @@
+"""
+Page Index: section -> หน้า PDF ของแต่ละฉบับ (สร้างตอนจบ Stage 1 แทน mapping/pdfPageMapping.ts ที่แก้มือ)
+
+provenance ที่ Stage 1 เก็บในทุก section ของ <id>_clean.json:
+- page     : ลำดับรูป (เริ่ม 1) ที่ section เริ่ม (merger.process_batches) -- ไม่ใช่หน้า PDF
+- page_end : หน้าสุดท้ายที่ข้อความ section ต่อไปถึง (มีเฉพาะเมื่อไม่ใช่หน้าเดียวกับ page)
+- offset   : ตำแหน่งตัวอักษรแรกของ section ในข้อความหน้านั้น (หลัง _clean_text, ไม่มีใน OCR cache เก่า)
+heal / merge_duplicates รวม section ข้ามหน้า -> ใช้ page ของส่วนแรก แล้วขยาย page_end ด้วย extend_pages
+
+รูปใน images_raw/<id>/ ไม่ได้ตรงกับหน้า PDF (บางฉบับ 1 รูป = 2 หน้า, ข้ามปก/สารบัญ) -> แปลงผ่าน
+image_pages.json ที่แก้มือ: {"<id>": {"pdf_pages": 99, "offset": 0}} (หน้า PDF = รูป + offset)
+หรือ {"<id>": {"pdf_pages": 99, "pages": [หน้า PDF ของรูปที่ 1, 2, ...]}}
+ฉบับที่ยังไม่มี offset/pages -> ไม่เขียนตารางจาก provenance (คงตารางเดิมไว้)
+
+json_output/pages/<id>.json (หน้าเว็บเปิดหน้าของมาตราได้ทันที ไม่ต้องไล่หา, ทุกเลขเป็นหน้า PDF):
+    {"const_id": ..., "page_count": 99, "sections": {"1": 3, "44/1": 20, "header_after_7": 4, ...},
+     "ranges": {"44/1": [20, 21], ...}}   # ranges: เฉพาะ section ที่ยาวข้ามหน้า
+
+    python page_index.py                                  # สร้างจาก json_output/clean ทุกฉบับที่มี page
+    python page_index.py --import-ts ../mapping/pdfPageMapping.ts   # ย้ายตารางเก่า (ฉบับที่ยังไม่ได้รัน Stage 1 ใหม่)
+"""
+import argparse
+import json
+import os
+import re
+
+from config import OUTPUT_DIR_CLEAN, OUTPUT_DIR_FINAL, OUTPUT_DIR_PAGES
+
+PAGE_MAP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_pages.json")
+
+_TS_ENTRY = re.compile(r'"(con\w+)"\s*:\s*\[(.*?)\]', re.DOTALL)
+_TS_TOTAL = re.compile(r'"(con\w+)"\s*:\s*(\d+)')
+_TS_COMMENT = re.compile(r"//[^\n]*")
+
+
+def extend_pages(target, item):
+    """ข้อความของ item ถูกต่อท้าย target -> page_end ของ target ครอบคลุมหน้าของ item ด้วย"""
+    if "page" not in target or "page" not in item: return
+    last = max(target.get("page_end", target["page"]), item.get("page_end", item["page"]))
+    if last != target["page"]:
+        target["page_end"] = last
+
+
+def load_page_maps(path=PAGE_MAP_FILE):
+    if not os.path.exists(path): return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def image_to_pdf(const_id, image_count, page_maps=None):
+    """
+    (ฟังก์ชัน ลำดับรูป -> หน้า PDF, จำนวนหน้า PDF) ของฉบับนี้จาก image_pages.json
+    ValueError ถ้ายังไม่มี map หรือ map ไม่ครอบคลุมรูปที่ 1..image_count
+    """
+    entry = (load_page_maps() if page_maps is None else page_maps).get(const_id) or {}
+    pdf_pages = entry.get("pdf_pages")
+    if not pdf_pages or ("offset" not in entry and "pages" not in entry):
+        raise ValueError(f"no image -> PDF page map for {const_id} in {os.path.basename(PAGE_MAP_FILE)}")
+    if "pages" in entry:
+        pages = entry["pages"]
+        if len(pages) < image_count or max(pages, default=0) > pdf_pages:
+            raise ValueError(f"page map of {const_id} lists {len(pages)} images (need {image_count}) "
+                             f"within {pdf_pages} PDF pages")
+        return (lambda image: pages[image - 1]), pdf_pages
+    offset = entry["offset"]
+    if image_count + offset > pdf_pages:
+        raise ValueError(f"page map of {const_id}: image {image_count} + offset {offset} > {pdf_pages} PDF pages")
+    return (lambda image: image + offset), pdf_pages
+
+
+def build_page_index(items, const_id, page_count, to_pdf=None):
+    """section ที่มี page -> ตาราง lookup ของ 1 ฉบับ (to_pdf: แปลง page ที่เป็นลำดับรูปเป็นหน้า PDF)"""
+    to_pdf = to_pdf or (lambda page: page)
+    sections, ranges = {}, {}
+    for item in items:
+        if "page" not in item: continue
+        sec_id = str(item["id"])
+        first, last = to_pdf(item["page"]), to_pdf(item.get("page_end", item["page"]))
+        sections[sec_id] = first
+        if last != first:
+            ranges[sec_id] = [first, last]
+    return {"const_id": const_id, "page_count": page_count, "sections": sections, "ranges": ranges}
+
+
+def write_page_index(index, out_dir=OUTPUT_DIR_PAGES):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{index['const_id']}.json")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+    return path
+
+
+def _legacy_page(sec_id, last_ids):
+    """กติกาเดิมของ dataLoader.ts: หน้าแรกที่ "มาตราสุดท้ายของหน้า" >= เลขแรกใน id"""
+    match = re.search(r"\d+", sec_id)
+    number = int(match.group()) if match else 0
+    if number <= 0 or not last_ids: return 1
+    for page, last in enumerate(last_ids, 1):
+        if number <= last:
+            return page
+    return len(last_ids) + 1
+
+
+def import_ts_mapping(ts_path, final_dir=OUTPUT_DIR_FINAL):
+    """
+    แปลง PDF_PAGE_MAPPING / PDF_TOTAL_PAGES ของ pdfPageMapping.ts เป็นตารางใหม่ (section id จาก final summary)
+    หน้าเท่ากับที่ dataLoader.ts เคยคำนวณทุกประการ -> {const_id: index}
+    """
+    with open(ts_path, "r", encoding="utf-8") as f:
+        source = _TS_COMMENT.sub("", f.read())
+    mapping_part, _, totals_part = source.partition("PDF_TOTAL_PAGES")
+    totals = {const_id: int(n) for const_id, n in _TS_TOTAL.findall(totals_part)}
+    indexes = {}
+    for const_id, body in _TS_ENTRY.findall(mapping_part):
+        last_ids = [int(n) for n in re.findall(r"\d+", body)]
+        path = os.path.join(final_dir, f"{const_id}_full_summary.json")
+        if not os.path.exists(path): continue
+        with open(path, "r", encoding="utf-8") as f:
+            categories = json.load(f)
+        items = [{"id": sec["id"], "page": _legacy_page(str(sec["id"]), last_ids)}
+                 for cat in categories for sec in cat.get("sections") or []]
+        indexes[const_id] = build_page_index(items, const_id, totals.get(const_id, len(last_ids)))
+    return indexes
+
+
+def from_clean(const_id, clean_dir=OUTPUT_DIR_CLEAN, page_maps=None):
+    """
+    ตารางจาก <id>_clean.json (None ถ้ายังไม่มี provenance ครบทุก section = ยังไม่ได้รัน Stage 1 ใหม่)
+    ValueError ถ้ายังไม่มี image_pages.json ของฉบับนี้
+    """
+    path = os.path.join(clean_dir, f"{const_id}_clean.json")
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    if not items or not all("page" in item for item in items): return None
+    last_image = max(item.get("page_end", item["page"]) for item in items)
+    to_pdf, pdf_pages = image_to_pdf(const_id, last_image, page_maps)
+    return build_page_index(items, const_id, pdf_pages, to_pdf)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write the section -> PDF page lookup tables")
+    parser.add_argument("ids", nargs="*", help="constitution IDs (default: every clean output)")
+    parser.add_argument("--import-ts", metavar="PATH", help="convert the old hand-maintained pdfPageMapping.ts")
+    args = parser.parse_args()
+
+    if args.import_ts:
+        for const_id, index in sorted(import_ts_mapping(args.import_ts).items()):
+            if args.ids and const_id not in args.ids: continue
+            print(f"📄 {const_id}: {len(index['sections'])} sections, {index['page_count']} pages "
+                  f"(from {os.path.basename(args.import_ts)}) -> {write_page_index(index)}")
+    else:
+        suffix = "_clean.json"
+        const_ids = args.ids or sorted(n[:-len(suffix)] for n in os.listdir(OUTPUT_DIR_CLEAN) if n.endswith(suffix))
+        for const_id in const_ids:
+            try:
+                index = from_clean(const_id)
+            except ValueError as e:
+                print(f"⏩ {const_id}: {e}")
+                continue
+            if index is None:
+                print(f"⏩ {const_id}: no page provenance yet (re-run 01_ocr_extraction.py)")
+                continue
+            print(f"📄 {const_id}: {len(index['sections'])} sections, {index['page_count']} pages "
+                  f"-> {write_page_index(index)}")
@@ -0,0 +1,222 @@
+"""
+Preprocess รูปก่อนส่ง OCR เพื่อลดขนาด payload
+
+- แปลงเป็น grayscale
+- จำกัดความละเอียด (DPI / ด้านยาวสุด)
+- ตัดขอบขาว
+- encode เป็น PNG 16 ระดับสีเทา (4-bit) แล้ว cache ไว้ใน PREPROCESS_DIR (key = hash ของรูป + settings)
+
+หมายเหตุ: typhoon_ocr.ocr_document จะ resize รูปให้ด้านยาว = target_image_dim (ค่าเริ่มต้น 1800,
+ขยายรูปเล็กด้วย) แล้ว encode เป็น JPEG ก่อนส่ง ดังนั้น "bytes sent" ในรายงานคำนวณแบบเดียวกับ library
+
+    python preprocess.py con2560                 # รายงานขนาด payload ก่อน/หลัง
+    python preprocess.py con2560 --ocr-sample 3  # + OCR จริง 3 หน้า วัด latency และ similarity กับ legacy
+"""
+import argparse
+import glob
+import hashlib
+import io
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow เป็น optional dependency
+    Image = None
+
+from config import (
+    PREPROCESS_DIR,
+    PREPROCESS_GRAY_LEVELS,
+    PREPROCESS_MAX_DIM,
+    PREPROCESS_MAX_DPI,
+    PREPROCESS_TRIM,
+    get_run_config,
+)
+
+# ค่าเริ่มต้นของ typhoon_ocr.ocr_document
+TYPHOON_TARGET_DIM = 1800
+
+
+def default_settings():
+    return {
+        "max_dim": PREPROCESS_MAX_DIM,
+        "max_dpi": PREPROCESS_MAX_DPI,
+        "trim": PREPROCESS_TRIM,
+        "gray_levels": PREPROCESS_GRAY_LEVELS,
+    }
+
+
+def _require_pillow():
+    if Image is None:
+        raise RuntimeError("Pillow is required for image preprocessing (pip install pillow)")
+
+
+def _cache_path(src_path, settings):
+    h = hashlib.sha256()
+    with open(src_path, "rb") as f:
+        h.update(f.read())
+    h.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return os.path.join(PREPROCESS_DIR, f"{h.hexdigest()}.png")
+
+
+def _trim_margins(img, threshold=245, padding=8):
+    # หา bounding box ของส่วนที่ไม่ใช่พื้นขาว
+    mask = img.point(lambda v: 255 if v < threshold else 0)
+    bbox = mask.getbbox()
+    if not bbox: return img
+    left, top, right, bottom = bbox
+    return img.crop((
+        max(0, left - padding),
+        max(0, top - padding),
+        min(img.width, right + padding),
+        min(img.height, bottom + padding),
+    ))
+
+
+def preprocess_image(src_path, settings=None):
+    """คืน path ของรูปที่ preprocess แล้ว (ใช้ cache ถ้ามี)"""
+    _require_pillow()
+    settings = settings or default_settings()
+    dst_path = _cache_path(src_path, settings)
+    if os.path.exists(dst_path): return dst_path
+
+    with Image.open(src_path) as img:
+        dpi = (img.info.get("dpi") or (0, 0))[0]
+        img = ImageOps.grayscale(img)
+
+    scale = 1.0
+    if settings.get("max_dpi") and dpi and dpi > settings["max_dpi"]:
+        scale = settings["max_dpi"] / float(dpi)
+    if settings.get("max_dim"):
+        scale = min(scale, settings["max_dim"] / float(max(img.size)))
+    if scale < 1.0:
+        new_size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+        img = img.resize(new_size, Image.Resampling.LANCZOS)
+
+    if settings.get("trim"):
+        img = _trim_margins(img)
+
+    os.makedirs(PREPROCESS_DIR, exist_ok=True)
+    tmp_path = f"{dst_path}.{os.getpid()}.tmp"
+    levels = settings.get("gray_levels")
+    if levels and levels <= 16:
+        img.quantize(levels).save(tmp_path, format="PNG", optimize=True, bits=4)
+    else:
+        img.save(tmp_path, format="PNG", optimize=True)
+    os.replace(tmp_path, dst_path)
+    return dst_path
+
+
+def preprocess_images(paths, settings=None, workers=None):
+    """Preprocess หลายรูปพร้อมกันด้วย process pool (คืน path ตามลำดับเดิม)"""
+    _require_pillow()
+    settings = settings or default_settings()
+    if len(paths) <= 1:
+        return [preprocess_image(p, settings) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(preprocess_image, paths, [settings] * len(paths)))
+
+
+def target_dim_for(path):
+    """ด้านยาวของรูป (ส่งเป็น target_image_dim เพื่อไม่ให้ library ขยายรูปกลับขึ้นไป)"""
+    _require_pillow()
+    with Image.open(path) as img:
+        return min(TYPHOON_TARGET_DIM, max(img.size))
+
+
+def payload_bytes(path, target_dim=TYPHOON_TARGET_DIM):
+    """ขนาด JPEG ที่ typhoon_ocr จะส่งจริง (resize ด้านยาว = target_dim แล้ว encode JPEG)"""
+    _require_pillow()
+    with Image.open(path) as img:
+        scale = target_dim / float(max(img.size))
+        img = img.resize(
+            (int(img.width * scale), int(img.height * scale)), Image.Resampling.LANCZOS
+        ).convert("RGB")
+        buffered = io.BytesIO()
+        img.save(buffered, format="JPEG")
+        return buffered.tell()
+
+
+def _ocr_similarity(merger, img_path, source_path, target_dim, legacy_map, finalize_section):
+    started_at = time.perf_counter()
+    md = merger.backend.ocr(img_path, source_path=source_path, target_image_dim=target_dim)
+    latency = time.perf_counter() - started_at
+    sims = []
+    for item in merger._parse_markdown_to_json(md):
+        finalize_section(item, legacy_map, cutoff=0.0)  # รายงานค่าเฉลี่ยจริง ไม่ใช่แค่ผ่าน/ไม่ผ่าน
+        if "diff_versions" in item:
+            sims.append(item["similarity"])
+    return latency, sims
+
+
+def build_report(const_id, settings=None, ocr_sample=0):
+    settings = settings or default_settings()
+    run_cfg = get_run_config(const_id)
+    src_paths = sorted(
+        glob.glob(os.path.join(run_cfg.image_folder, "*.[pjPJ][nNpP][gG]*")),
+        key=lambda x: int("".join(filter(str.isdigit, os.path.basename(x))) or 0)
+    )
+    if not src_paths:
+        return print(f"❌ No images for {const_id}")
+
+    started_at = time.perf_counter()
+    dst_paths = preprocess_images(src_paths, settings)
+    prep_time = time.perf_counter() - started_at
+
+    before = sum(payload_bytes(p) for p in src_paths)
+    after = sum(payload_bytes(p, target_dim_for(p)) for p in dst_paths)
+    print(f"🖼️ {const_id}: {len(src_paths)} pages, settings={settings}")
+    print(f"   Files on disk : {sum(map(os.path.getsize, src_paths)) / 1e6:.2f} MB -> "
+          f"{sum(map(os.path.getsize, dst_paths)) / 1e6:.2f} MB")
+    print(f"   Bytes sent    : {before / 1e6:.2f} MB -> {after / 1e6:.2f} MB "
+          f"({100 * (1 - after / before):.0f}% smaller), preprocess took {prep_time:.1f}s")
+
+    if ocr_sample:
+        # 01_ocr_extraction ขึ้นต้นด้วยตัวเลข -> import ผ่าน importlib
+        import importlib
+        from merger import ConstitutionMerger
+        stage1 = importlib.import_module("01_ocr_extraction")
+
+        legacy_map = stage1.load_legacy_data(stage1.LEGACY_JSON, const_id)
+        merger = ConstitutionMerger(use_cache=False)
+        for label, paths, dim_fn in (
+            ("original", src_paths, lambda p: TYPHOON_TARGET_DIM),
+            ("preprocessed", dst_paths, target_dim_for),
+        ):
+            latencies, sims = [], []
+            for path, src_path in zip(paths[:ocr_sample], src_paths):
+                latency, page_sims = _ocr_similarity(
+                    merger, path, src_path, dim_fn(path), legacy_map, stage1.finalize_section
+                )
+                latencies.append(latency)
+                sims.extend(page_sims)
+            avg_sim = sum(sims) / len(sims) if sims else 0.0
+            print(f"   OCR {label:<13}: {sum(latencies) / len(latencies):.2f}s/page, "
+                  f"legacy similarity {avg_sim:.4f} over {len(sims)} sections")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocess OCR images and report payload savings")
+    parser.add_argument("const_id")
+    parser.add_argument("--max-dim", type=int, default=PREPROCESS_MAX_DIM)
+    parser.add_argument("--max-dpi", type=int, default=PREPROCESS_MAX_DPI)
+    parser.add_argument("--gray-levels", type=int, default=PREPROCESS_GRAY_LEVELS, help="0 = keep 256 levels")
+    parser.add_argument("--no-trim", action="store_true")
+    parser.add_argument("--ocr-sample", type=int, default=0, help="OCR N pages both ways (uses the API)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    settings = {
+        "max_dim": args.max_dim,
+        "max_dpi": args.max_dpi,
+        "trim": not args.no_trim,
+        "gray_levels": args.gray_levels,
+    }
+    build_report(args.const_id, settings, args.ocr_sample)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket แบบ thread-safe สำหรับคุมจำนวน request ต่อวินาที
+    rate = จำนวน token ที่เติมต่อวินาที, burst = จำนวน token สูงสุดที่สะสมได้
+    rate <= 0 หมายถึงไม่จำกัด
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate or 0)
+        self.capacity = max(1.0, float(burst or 1))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def acquire(self, tokens=1):
+        """บล็อกจนกว่าจะมี token พอ แล้วคืนเวลาที่ต้องรอ (วินาที)"""
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill(time.monotonic())
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
@@ -0,0 +1,110 @@
+"""
+รัน Stage 1 (OCR) + Stage 2 (AI Analysis) ให้หลายฉบับพร้อมกันด้วย process pool
+
+    python run_all.py all
+    python run_all.py con2540 con2550 con2560 --workers 3 --stages 1
+"""
+import argparse
+import importlib
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config import OCR_RATE_LIMIT, get_run_config, list_constitution_ids
+
+STAGE_MODULES = {
+    "1": "01_ocr_extraction",
+    "2": "02_ai_analysis",
+}
+
+
+def run_one(const_id, stages, ocr_rate_limit, stream=False, use_llm_cache=True, llm_quota_share=1.0,
+            dry_run=False, force=False):
+    """Worker: รันทุก stage ของฉบับเดียว คืนเวลาที่ใช้ต่อ stage"""
+    run_cfg = get_run_config(const_id)
+    run_cfg.dry_run = dry_run
+    run_cfg.force = force
+    run_cfg.ocr_rate_limit = ocr_rate_limit
+    run_cfg.llm_quota_share = llm_quota_share
+    run_cfg.stream = stream
+    run_cfg.use_llm_cache = use_llm_cache and run_cfg.use_llm_cache
+
+    timings = {}
+    for stage in stages:
+        started_at = time.perf_counter()
+        try:
+            # ชื่อไฟล์ขึ้นต้นด้วยตัวเลข -> ต้อง import ผ่าน importlib
+            module = importlib.import_module(STAGE_MODULES[stage])
+            module.main(run_cfg)
+        except FileNotFoundError as e:
+            # ไม่มีรูป/ไม่มีผล stage ก่อนหน้า -> ล้มเหลว (ไม่ต้องพิมพ์ traceback)
+            logging.error(f"❌ [{const_id}] Stage {stage} failed: {e}")
+            timings[stage] = time.perf_counter() - started_at
+            return const_id, timings, f"stage {stage} failed: {e}"
+        except Exception as e:
+            logging.error(f"❌ [{const_id}] Stage {stage} failed: {e}\n{traceback.format_exc()}")
+            timings[stage] = time.perf_counter() - started_at
+            return const_id, timings, f"stage {stage} failed: {e}"
+        timings[stage] = time.perf_counter() - started_at
+    return const_id, timings, "OK"
+
+
+def print_summary(results, stages, wall_time):
+    print("\n📊 Batch Summary")
+    header = f"{'ID':<14}" + "".join(f"{'stage ' + s:>10}" for s in stages) + f"{'total':>10}  status"
+    print(header)
+    print("-" * len(header))
+    for const_id in sorted(results):
+        timings, status = results[const_id]
+        cols = "".join(f"{timings[s]:>9.1f}s" if s in timings else f"{'-':>10}" for s in stages)
+        print(f"{const_id:<14}{cols}{sum(timings.values()):>9.1f}s  {status}")
+    print(f"\n⏱️ Wall time: {wall_time:.1f}s for {len(results)} constitutions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline for many constitutions in parallel")
+    parser.add_argument("ids", nargs="+", help='constitution IDs (e.g. con2560) or "all"')
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parallel worker processes")
+    parser.add_argument("--stages", choices=["1", "2", "both"], default="both")
+    parser.add_argument(
+        "--ocr-rate", type=float, default=OCR_RATE_LIMIT,
+        help="total OCR pages/sec shared by all workers (0 = unlimited)",
+    )
+    parser.add_argument("--stream", action="store_true", help="run stage 1 in streaming mode")
+    parser.add_argument("--no-llm-cache", action="store_true", help="stage 2 always calls the API")
+    parser.add_argument("--dry-run", action="store_true", help="only show what each stage would rebuild")
+    parser.add_argument("--force", action="store_true", help="rebuild everything, ignoring the build state")
+    args = parser.parse_args()
+
+    const_ids = list_constitution_ids() if args.ids == ["all"] else args.ids
+    if not const_ids:
+        return print("❌ No constitution IDs to run")
+    stages = ["1", "2"] if args.stages == "both" else [args.stages]
+
+    workers = max(1, min(args.workers, len(const_ids)))
+    # แบ่งโควต้า OCR ให้ทุก worker รวมกันไม่เกิน --ocr-rate
+    per_worker_rate = args.ocr_rate / workers if args.ocr_rate > 0 else 0
+    # โควต้า LLM (RPM ใน config.LLM_MODEL_LIMITS) ก็แบ่งเท่าๆ กันเหมือนกัน
+    llm_quota_share = 1 / workers
+
+    print(f"🚀 Running stages {'+'.join(stages)} for {len(const_ids)} constitutions on {workers} workers")
+    started_at = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(run_one, cid, stages, per_worker_rate, args.stream, not args.no_llm_cache, llm_quota_share,
+                        args.dry_run, args.force)
+            for cid in const_ids
+        ]
+        for future in as_completed(futures):
+            const_id, timings, status = future.result()
+            results[const_id] = (timings, status)
+            print(f"🏁 {const_id}: {status} ({sum(timings.values()):.1f}s)")
+
+    print_summary(results, stages, time.perf_counter() - started_at)
+
+
+if __name__ == "__main__":
+    main()
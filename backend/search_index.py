@@ -0,0 +1,295 @@
+"""
+Search Index: ค้นหาวลีในทุกฉบับ (รันหลัง 02_ai_analysis.py) แทนการโหลด *_full_summary.json ทุกไฟล์มาไล่หา
+
+ภาษาไทยไม่เว้นวรรคระหว่างคำ -> ใช้ n-gram ของตัวอักษร (n=3) แทนการตัดคำ:
+- normalize_text: NFC, เลขไทย -> อารบิก, ตัวพิมพ์เล็ก, ช่องว่างติดกันเหลือ 1 ตัว (ใช้ทั้งตอน build และ query)
+- doc = 1 มาตรา (ฉบับ, id มาตรา, หมวด) doc ของฉบับเดียวกันมี id ติดกัน -> delta ใน posting list เล็ก
+- posting list: gram -> doc id ที่มี gram นั้น เรียงแล้วเก็บแบบ delta ([3, 1, 1, 40, ...])
+- query: doc ที่มีทุก gram ของวลี (intersect จาก list ที่สั้นที่สุด) -> ตรวจว่ามีวลีจริงในข้อความ
+  -> เรียงด้วย BM25 ของจำนวนครั้งที่พบวลี (มาตรายาว/วลีที่พบบ่อยได้น้ำหนักน้อยลง)
+  ทั้ง query คือวลีเดียว (ช่องว่างเป็นส่วนหนึ่งของวลีและของ gram: "มาตรา 7" ต้องพบติดกัน)
+  หลายวลีต้องคั่นด้วย "+" ("สิทธิ + เสรีภาพ") = ต้องพบทุกวลี
+  วลีสั้นกว่า n ตัวอักษร ใช้กรองอย่างเดียว ไม่นับคะแนน (gram ไม่มี -> idf คำนวณไม่ได้)
+  query ที่ไม่มีวลียาว >= n เลย -> ValueError (เรียงลำดับไม่ได้)
+
+json_output/search/ (static ไฟล์ หน้าเว็บ fetch เฉพาะ shard ที่ต้องใช้ + .gz/.br):
+    manifest.json     n, จำนวน shard, ฉบับ [id, doc แรก, doc สุดท้าย + 1], หมวด, ความยาวเฉลี่ย
+    docs.json         [index ฉบับ, id มาตรา, index หมวด, ความยาว] ต่อ doc
+    grams-<k>.json    {gram: [delta, ...]} ของทุก gram ที่ ord(ตัวแรก) % shards == k
+    text/<id>.json    ข้อความ (normalize แล้ว) ของทุก doc ในฉบับนั้น ใช้ตรวจวลีและทำ snippet
+
+    python search_index.py build
+    python search_index.py query "สิทธิเสรีภาพ" --const con2560 --limit 5
+"""
+import argparse
+import heapq
+import json
+import math
+import os
+import re
+import time
+import unicodedata
+from collections import defaultdict, namedtuple
+from itertools import accumulate
+
+from compact_output import write_precompressed
+from config import OUTPUT_DIR_FINAL, OUTPUT_DIR_SEARCH
+
+FORMAT_VERSION = 1
+NGRAM = 3
+SHARDS = 64
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_CHARS = 40
+QUERY_SEPARATOR = "+"  # คั่นหลายวลี (AND) ใน query เดียว
+
+_THAI_DIGITS = str.maketrans("๐๑๒๓๔๕๖๗๘๙", "0123456789")
+_SPACES = re.compile(r"\s+")
+
+Hit = namedtuple("Hit", "const_id section_id category_id score count snippet")
+
+
+def normalize_text(text):
+    text = unicodedata.normalize("NFC", str(text)).translate(_THAI_DIGITS).lower()
+    return _SPACES.sub(" ", text).strip()
+
+
+def query_phrases(query):
+    """query -> วลีที่ต้องพบ (normalize แล้ว): ทั้ง query คือวลีเดียว เว้นแต่คั่นด้วย QUERY_SEPARATOR"""
+    return [p.strip() for p in normalize_text(query).split(QUERY_SEPARATOR) if p.strip()]
+
+
+def ngrams(text, n=NGRAM):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def shard_of(gram, shards=SHARDS):
+    """ฝั่งเว็บคำนวณเหมือนกัน: gram.codePointAt(0) % shards"""
+    return ord(gram[0]) % shards
+
+
+def delta_encode(doc_ids):
+    return [doc_id - prev for prev, doc_id in zip([0] + doc_ids, doc_ids)]
+
+
+def iter_documents(final_dir=OUTPUT_DIR_FINAL):
+    """(const_id, section_id, category_id, content) ของทุกมาตรา เรียงตามฉบับ"""
+    suffix = "_full_summary.json"
+    for name in sorted(os.listdir(final_dir)):
+        if not name.endswith(suffix): continue
+        with open(os.path.join(final_dir, name), "r", encoding="utf-8") as f:
+            categories = json.load(f)
+        for category in categories:
+            for sec in category.get("sections") or []:
+                yield name[:-len(suffix)], str(sec["id"]), category["category_id"], sec.get("content", "")
+
+
+class SearchIndex:
+    """
+    build(documents) สร้างใน memory, save(dir) เขียน static shard, load(dir) อ่านกลับแบบ lazy
+    (โหลด manifest + docs ตอนเปิด, shard ของ gram / ข้อความของฉบับ โหลดเมื่อ query ต้องใช้)
+    """
+
+    def __init__(self, n=NGRAM, shards=SHARDS, index_dir=None):
+        self.n = n
+        self.shards = shards
+        self.index_dir = index_dir
+        self.constitutions = []  # [const_id, doc แรก, doc สุดท้าย + 1]
+        self.categories = []
+        self.docs = []  # [index ฉบับ, section id, index หมวด, ความยาว]
+        self.avg_len = 0.0
+        self._postings = {}  # gram -> list ของ doc id (decode แล้ว) หรือ delta ที่ยังไม่ decode
+        self._decoded = set()
+        self._loaded_shards = set()
+        self._texts = []  # ข้อความของแต่ละ doc (None = ฉบับนั้นยังไม่ได้โหลด)
+
+    @classmethod
+    def build(cls, documents, n=NGRAM, shards=SHARDS):
+        index = cls(n, shards)
+        const_index, category_index = {}, {}
+        postings = defaultdict(list)
+        total_len = 0
+        for doc_id, (const_id, section_id, category_id, content) in enumerate(documents):
+            text = normalize_text(content)
+            if const_id not in const_index:
+                const_index[const_id] = len(index.constitutions)
+                index.constitutions.append([const_id, doc_id, doc_id])
+            if category_id not in category_index:
+                category_index[category_id] = len(index.categories)
+                index.categories.append(category_id)
+            c = const_index[const_id]
+            index.constitutions[c][2] = doc_id + 1
+            index.docs.append([c, section_id, category_index[category_id], len(text)])
+            index._texts.append(text)
+            total_len += len(text)
+            for gram in ngrams(text, n):
+                postings[gram].append(doc_id)  # doc id เพิ่มขึ้นเรื่อยๆ -> เรียงอยู่แล้ว
+        index._postings = dict(postings)
+        index._decoded = set(postings)
+        index._loaded_shards = set(range(shards))
+        index.avg_len = total_len / len(index.docs) if index.docs else 0.0
+        return index
+
+    def save(self, out_dir=OUTPUT_DIR_SEARCH):
+        """เขียน manifest/docs/grams-*/text/* (+ .gz/.br) -> {ชนิด: bytes รวม}"""
+        os.makedirs(os.path.join(out_dir, "text"), exist_ok=True)
+        manifest = {
+            "format": FORMAT_VERSION, "n": self.n, "shards": self.shards,
+            "normalize": "NFC, Thai digits -> 0-9, lowercase, whitespace runs -> one space",
+            "constitutions": self.constitutions, "categories": self.categories,
+            "doc_count": len(self.docs), "avg_len": round(self.avg_len, 2),
+        }
+        by_shard = defaultdict(dict)
+        for gram in sorted(self._postings):
+            by_shard[shard_of(gram, self.shards)][gram] = delta_encode(self._posting(gram))
+        files = [("manifest.json", manifest), ("docs.json", self.docs)]
+        files += [(f"grams-{k}.json", by_shard.get(k, {})) for k in range(self.shards)]
+        files += [(os.path.join("text", f"{const_id}.json"), [self._text(d) for d in range(first, end)])
+                  for const_id, first, end in self.constitutions]
+        totals = defaultdict(int)
+        for name, data in files:
+            sizes, _ = write_precompressed(os.path.join(out_dir, name), data)
+            for kind, size in sizes.items():
+                totals[kind] += size
+        return dict(totals)
+
+    @classmethod
+    def load(cls, index_dir=OUTPUT_DIR_SEARCH):
+        with open(os.path.join(index_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{index_dir} has search index format {manifest.get('format')}, "
+                             f"expected {FORMAT_VERSION} (run: python search_index.py build)")
+        index = cls(manifest["n"], manifest["shards"], index_dir)
+        index.constitutions = manifest["constitutions"]
+        index.categories = manifest["categories"]
+        index.avg_len = manifest["avg_len"]
+        with open(os.path.join(index_dir, "docs.json"), "r", encoding="utf-8") as f:
+            index.docs = json.load(f)
+        index._texts = [None] * len(index.docs)
+        return index
+
+    def _posting(self, gram):
+        """doc id ที่มี gram นี้ (โหลด shard / decode delta ครั้งแรกที่ใช้)"""
+        shard = shard_of(gram, self.shards)
+        if shard not in self._loaded_shards:
+            with open(os.path.join(self.index_dir, f"grams-{shard}.json"), "r", encoding="utf-8") as f:
+                self._postings.update(json.load(f))
+            self._loaded_shards.add(shard)
+        posting = self._postings.get(gram)
+        if posting is None:
+            return []
+        if gram not in self._decoded:
+            posting = self._postings[gram] = list(accumulate(posting))
+            self._decoded.add(gram)
+        return posting
+
+    def _text(self, doc_id):
+        """ข้อความของ doc (โหลด text/<id>.json ทั้งฉบับครั้งแรกที่ใช้)"""
+        text = self._texts[doc_id]
+        if text is None:
+            const_id, first, end = self.constitutions[self.docs[doc_id][0]]
+            with open(os.path.join(self.index_dir, "text", f"{const_id}.json"), "r", encoding="utf-8") as f:
+                self._texts[first:end] = json.load(f)
+            text = self._texts[doc_id]
+        return text
+
+    def _candidates(self, phrase):
+        """doc ที่มีทุก gram ของวลี (ยังไม่ได้ตรวจว่ามีวลีติดกันจริง, วลียาว >= n)"""
+        postings = sorted((self._posting(gram) for gram in ngrams(phrase, self.n)), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates: break
+            candidates.intersection_update(posting)
+        return candidates
+
+    def search(self, query, limit=10, const_ids=None, category_id=None):
+        """
+        [Hit] ของมาตราที่มีทุกวลีใน query (query_phrases) เรียงตามคะแนน BM25 (มากไปน้อย)
+        วลีสั้นกว่า n ใช้กรองอย่างเดียว, ไม่มีวลียาว >= n เลย -> ValueError
+        """
+        terms = query_phrases(query)
+        if not terms: return []
+        phrases = [p for p in terms if len(p) >= self.n]
+        filters = [p for p in terms if len(p) < self.n]
+        if not phrases:
+            raise ValueError(f"Query {query!r} needs at least one phrase of {self.n}+ characters to rank results")
+        allowed = None
+        if const_ids:
+            allowed = set()
+            for const_id, first, end in self.constitutions:
+                if const_id in const_ids:
+                    allowed.update(range(first, end))
+
+        candidates, df = None, {}
+        for phrase in sorted(phrases, key=len, reverse=True):  # วลียาว = candidate น้อย -> ทำก่อน
+            found = self._candidates(phrase)
+            df[phrase] = len(found)  # ประมาณ df จาก gram (ไม่ตรวจทุก doc ที่มี gram ครบ)
+            candidates = found if candidates is None else candidates & found
+            if not candidates: return []
+        if allowed is not None:
+            candidates &= allowed
+        if category_id is not None:
+            candidates = {d for d in candidates if self.categories[self.docs[d][2]] == category_id}
+
+        total_docs, texts, docs = len(self.docs), self._texts, self.docs
+        weights = [math.log(1 + (total_docs - df[p] + 0.5) / (df[p] + 0.5)) * (BM25_K1 + 1) for p in phrases]
+        length_norm = BM25_K1 * BM25_B / (self.avg_len or 1)
+        base_norm = BM25_K1 * (1 - BM25_B)
+        scored = []
+        for doc_id in candidates:
+            text = texts[doc_id]
+            if text is None:
+                text = self._text(doc_id)
+            found = [text.count(phrase) for phrase in phrases]
+            if not all(found): continue  # มีทุก gram แต่ไม่มีวลีติดกันจริง
+            if filters and not all(p in text for p in filters): continue
+            norm = base_norm + length_norm * docs[doc_id][3]
+            score = sum(w * tf / (tf + norm) for w, tf in zip(weights, found))
+            scored.append((score, -doc_id, sum(found)))
+        top = heapq.nlargest(limit, scored)
+        return [self._hit(-neg_id, score, count, phrases[0]) for score, neg_id, count in top]
+
+    def _hit(self, doc_id, score, count, phrase):
+        c, section_id, cat, _ = self.docs[doc_id]
+        text = self._text(doc_id)
+        at = text.find(phrase)
+        start, end = max(0, at - SNIPPET_CHARS), at + len(phrase) + SNIPPET_CHARS
+        snippet = ("…" if start else "") + text[start:end] + ("…" if end < len(text) else "")
+        return Hit(self.constitutions[c][0], section_id, self.categories[cat], round(score, 4), count, snippet)
+
+
+def build(out_dir=OUTPUT_DIR_SEARCH):
+    started_at = time.perf_counter()
+    index = SearchIndex.build(iter_documents())
+    sizes = index.save(out_dir)
+    postings = sum(len(p) for p in index._postings.values())
+    print(f"🔎 Indexed {len(index.docs)} sections of {len(index.constitutions)} constitutions: "
+          f"{len(index._postings)} grams, {postings} postings")
+    print("   " + ", ".join(f"{kind} {size / 1024:.0f}K" for kind, size in sizes.items()))
+    print(f"🎉 DONE! -> {out_dir} in {time.perf_counter() - started_at:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Character n-gram search index over every constitution")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="index json_output/final into json_output/search")
+    query_parser = sub.add_parser("query", help="ranked phrase search")
+    query_parser.add_argument("text")
+    query_parser.add_argument("--const", action="append", help="only these constitution IDs (repeatable)")
+    query_parser.add_argument("--category", help="only this category_id")
+    query_parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build()
+    else:
+        started_at = time.perf_counter()
+        try:
+            hits = SearchIndex.load().search(args.text, args.limit, args.const, args.category)
+        except ValueError as e:
+            raise SystemExit(f"❌ {e}")
+        elapsed = time.perf_counter() - started_at
+        for hit in hits:
+            print(f"{hit.score:>7.2f}  {hit.const_id} ม.{hit.section_id} [{hit.category_id}] x{hit.count}  {hit.snippet}")
+        print(f"⏱️ {len(hits)} hits in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,215 @@
+"""
+Section Diff: diff ระดับ token ของทุกแถวที่จับคู่แล้ว (MATCH/MODIFIED) คำนวณล่วงหน้าครั้งเดียว
+แทนการ diff ข้อความมาตราในเบราว์เซอร์ทุกครั้งที่เปิดหน้าเปรียบเทียบ
+
+อ่าน json_output/alignment/<left>-vs-<right>.json (Stage 3) + ข้อความจาก json_output/final
+แล้วเขียน json_output/diff/<left>-vs-<right>.json (ชื่อเดียวกับ slug ของหน้าเว็บ):
+
+    {"left": "con2550", "right": "con2560", "tokenizer": "tcc-1",
+     "rows": {"<row key>": [op, l1, l2, r1, r2, op, l1, l2, r1, r2, ...], ...}}
+
+- token = Thai character cluster (พยัญชนะ + สระนำ/สระบน-ล่าง/วรรณยุกต์/สระตาม ที่แยกจากกันไม่ได้),
+  เลขไทย/อารบิกติดกัน, คำภาษาอังกฤษ, ช่องว่างติดกัน, อักขระอื่นทีละตัว -> ต่อกันได้ข้อความเดิมทุกตัวอักษร
+- opcode เก็บเฉพาะช่วงที่ต่างกัน (ช่วงที่เหมือนกันคือช่วงที่เหลือ) เป็นตำแหน่งตัวอักษรใน content
+  (หน่วย UTF-16 แบบ String ของ JS): 1 = ลบ (มีแต่ซ้าย), 2 = เพิ่ม (มีแต่ขวา), 3 = แทนที่
+- แถวที่ข้อความซ้าย/ขวาเหมือนกันทุก byte (เทียบ hash) ไม่ต้อง diff และไม่อยู่ใน rows
+- ข้อความคู่เดิมซ้ำข้ามคู่ฉบับบ่อย (ฉบับชั่วคราว/ฉบับถาวร) -> cache ตาม hash คู่ข้อความต่อ worker
+  และ b-vs-a ใช้ผลของ a-vs-b กลับด้าน (ไม่ diff ซ้ำ)
+
+    python section_diff.py                      # ทุกคู่ที่มีผล Stage 3
+    python section_diff.py con2550 con2560      # เฉพาะคู่ระหว่างฉบับที่ระบุ
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from config import OUTPUT_DIR_ALIGNMENT, OUTPUT_DIR_DIFF
+
+stage3 = importlib.import_module("03_alignment")
+
+# เปลี่ยนเมื่อแก้ _TOKEN / _merge_short_equal (หน้าเว็บรู้ว่า opcode มาจากกติกาไหน)
+TOKENIZER_VERSION = "tcc-1"
+
+DELETE, INSERT, REPLACE = 1, 2, 3
+_OPCODES = {"delete": DELETE, "insert": INSERT, "replace": REPLACE}
+_INVERSE = {DELETE: INSERT, INSERT: DELETE, REPLACE: REPLACE}
+
+# สระนำ? + พยัญชนะ + สระบน/ล่าง/ไม้หันอากาศ/วรรณยุกต์/การันต์* + สระตาม (ะ า ำ ๅ)?
+_THAI_CLUSTER = r"[\u0E40-\u0E44]?[\u0E01-\u0E2E][\u0E31\u0E34-\u0E3A\u0E47-\u0E4E]*[\u0E30\u0E32\u0E33\u0E45]?"
+_TOKEN = re.compile(rf"{_THAI_CLUSTER}|[0-9\u0E50-\u0E59]+|[A-Za-z]+|\s+|.", re.DOTALL)
+
+# ช่วงที่เหมือนกันสั้นกว่านี้ (token) ระหว่างช่วงที่ต่างกัน -> รวมเป็นแทนที่ช่วงเดียว
+# (ไม่ให้คำที่ถูกแก้ถูกหั่นเป็นชิ้นเล็กๆ เพราะบังเอิญมีพยัญชนะตรงกัน 1 ตัว)
+MIN_EQUAL_TOKENS = 2
+
+
+def tokenize(text):
+    return _TOKEN.findall(text)
+
+
+def text_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+def _merge_short_equal(opcodes, left_tokens, right_tokens):
+    """รวม [ต่าง, เท่า(สั้น), ต่าง] เป็นแทนที่ช่วงเดียว (ไม่แตะช่วงเท่าที่เป็นช่องว่าง)"""
+    merged = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if merged and tag != "equal" and len(merged) >= 2 and merged[-1][0] == "equal" \
+                and merged[-2][0] != "equal":
+            _, e1, e2, _, _ = merged[-1]
+            if e2 - e1 < MIN_EQUAL_TOKENS and not left_tokens[e1].isspace():
+                merged.pop()
+                _, p1, _, q1, _ = merged.pop()
+                merged.append(("replace", p1, i2, q1, j2))
+                continue
+        if merged and tag != "equal" and merged[-1][0] != "equal":
+            _, p1, _, q1, _ = merged.pop()
+            merged.append(("replace", p1, i2, q1, j2))
+            continue
+        merged.append((tag, i1, i2, j1, j2))
+    return merged
+
+
+def _utf16_offsets(tokens):
+    """ตำแหน่งเริ่มของทุก token (+ ท้ายข้อความ) ในหน่วย UTF-16 แบบ String.length ของ JS"""
+    offsets, pos = [0], 0
+    for token in tokens:
+        pos += len(token.encode("utf-16-le")) // 2
+        offsets.append(pos)
+    return offsets
+
+
+def diff_texts(left, right):
+    """opcode แบบ flat [op, l1, l2, r1, r2, ...] ระหว่างข้อความ 2 ชุด ([] ถ้าเหมือนกัน)"""
+    if left == right: return []
+    left_tokens, right_tokens = tokenize(left), tokenize(right)
+    # autojunk=False: ข้อความไทยยาว > 200 token มี cluster ที่พบบ่อยจน difflib ทิ้งเป็น junk
+    matcher = SequenceMatcher(None, left_tokens, right_tokens, autojunk=False)
+    left_at, right_at = _utf16_offsets(left_tokens), _utf16_offsets(right_tokens)
+    ops = []
+    for tag, i1, i2, j1, j2 in _merge_short_equal(matcher.get_opcodes(), left_tokens, right_tokens):
+        if tag == "equal": continue
+        ops += [_OPCODES[tag], left_at[i1], left_at[i2], right_at[j1], right_at[j2]]
+    return ops
+
+
+def invert(ops):
+    """opcode ของ a -> b เป็นของ b -> a (สลับซ้าย/ขวา, ลบ <-> เพิ่ม)"""
+    inverted = []
+    for k in range(0, len(ops), 5):
+        op, l1, l2, r1, r2 = ops[k:k + 5]
+        inverted += [_INVERSE[op], r1, r2, l1, l2]
+    return inverted
+
+
+class DiffCache:
+    """ผล diff ตาม hash ของคู่ข้อความ (ใช้ร่วมกันทุกคู่ฉบับใน worker เดียวกัน + ทั้ง 2 ทิศทาง)"""
+
+    def __init__(self):
+        self._ops = {}
+        self.computed = self.reused = self.identical = 0
+
+    def get(self, left, right):
+        left_hash, right_hash = text_hash(left), text_hash(right)
+        if left_hash == right_hash:
+            self.identical += 1
+            return None
+        ops = self._ops.get((left_hash, right_hash))
+        if ops is not None:
+            self.reused += 1
+            return ops
+        ops = self._ops.get((right_hash, left_hash))
+        if ops is not None:
+            self.reused += 1
+            ops = self._ops[(left_hash, right_hash)] = invert(ops)
+            return ops
+        self.computed += 1
+        ops = self._ops[(left_hash, right_hash)] = diff_texts(left, right)
+        return ops
+
+
+_cache = DiffCache()
+
+
+def _write(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def diff_alignment(alignment, left, right, cache):
+    """rows ของ 1 ไฟล์ alignment: {row key: opcode} เฉพาะแถวที่มีทั้ง 2 ฝั่งและข้อความต่างกัน"""
+    left_text = {s["id"]: s["content"] for s in left}
+    right_text = {s["id"]: s["content"] for s in right}
+    rows = {}
+    for key, _, left_id, right_id, _, _ in alignment["rows"]:
+        if left_id is None or right_id is None: continue
+        ops = cache.get(left_text[left_id], right_text[right_id])
+        if ops:
+            rows[key] = ops
+    return rows
+
+
+def _read_alignment(left_id, right_id):
+    with open(os.path.join(OUTPUT_DIR_ALIGNMENT, f"{left_id}-vs-{right_id}.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def diff_pair(id_a, id_b):
+    """Worker: เขียนทั้ง a-vs-b และ b-vs-a (คู่ข้อความเดียวกันใช้ผลจาก cache กลับด้าน)"""
+    a, b = stage3.load_sections(id_a), stage3.load_sections(id_b)
+    before = (_cache.computed, _cache.reused, _cache.identical)
+    rows = 0
+    for left_id, right_id, left, right in ((id_a, id_b, a, b), (id_b, id_a, b, a)):
+        diffs = diff_alignment(_read_alignment(left_id, right_id), left, right, _cache)
+        _write(os.path.join(OUTPUT_DIR_DIFF, f"{left_id}-vs-{right_id}.json"), {
+            "left": left_id,
+            "right": right_id,
+            "tokenizer": TOKENIZER_VERSION,
+            "rows": diffs,
+        })
+        rows += len(diffs)
+    after = (_cache.computed, _cache.reused, _cache.identical)
+    return (id_a, id_b, rows) + tuple(n - m for n, m in zip(after, before))
+
+
+def main(const_ids=None, workers=None):
+    const_ids = const_ids or stage3.list_summarized_ids()
+    pairs = [
+        (id_a, id_b) for id_a, id_b in combinations(const_ids, 2)
+        if os.path.exists(os.path.join(OUTPUT_DIR_ALIGNMENT, f"{id_a}-vs-{id_b}.json"))
+        and os.path.exists(os.path.join(OUTPUT_DIR_ALIGNMENT, f"{id_b}-vs-{id_a}.json"))
+    ]
+    if not pairs:
+        return print("❌ ยังไม่มีผล Stage 3 (รัน 03_alignment.py ก่อน)")
+
+    os.makedirs(OUTPUT_DIR_DIFF, exist_ok=True)
+    print(f"🧬 Diffing aligned sections of {len(pairs)} pairs ({len(pairs) * 2} files)...")
+    started_at = time.perf_counter()
+    total_rows = computed = reused = identical = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for _, _, rows, n_computed, n_reused, n_identical in pool.map(diff_pair, *zip(*pairs)):
+            total_rows += rows
+            computed += n_computed
+            reused += n_reused
+            identical += n_identical
+    elapsed = time.perf_counter() - started_at
+    print(f"🎉 DONE! {total_rows} changed rows ({computed} diffed, {reused} reused, "
+          f"{identical} identical skipped) -> {OUTPUT_DIR_DIFF} in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute token-level diffs of aligned sections")
+    parser.add_argument("ids", nargs="*", help="constitution IDs (default: every ID with a Stage 2 summary)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+    main(args.ids, args.workers)
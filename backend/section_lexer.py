@@ -0,0 +1,80 @@
+"""
+Lexer สำหรับ markdown 1 หน้าจาก OCR (state machine ไล่ทีละบรรทัด, linear time)
+
+Token ที่ได้:
+- intro       : ข้อความก่อนมาตราแรกของหน้า (เก็บทั้งก้อน รวม "หมวด" ที่อยู่ในนั้นด้วย)
+- section     : มาตรา N
+- subsection  : มาตรา N/M (เช่น 44/1)
+- chapter     : หมวด N ... (รวมบรรทัดชื่อหมวดที่ตามมา)
+- part        : ส่วนที่ N ...
+
+<page_number> ถูกลบไปแล้วตอน clean text (corrections.py) ก่อนถึง lexer -> ไม่มี token เลขหน้า
+
+แต่ละ token เก็บตำแหน่ง start/end ใน text ต้นฉบับ (token.text คือ text[start:end])
+"""
+import re
+from collections import namedtuple
+
+INTRO = "intro"
+SECTION = "section"
+SUBSECTION = "subsection"
+CHAPTER = "chapter"
+PART = "part"
+
+_THAI_DIGITS = str.maketrans("๐๑๒๓๔๕๖๗๘๙", "0123456789")
+
+# ทุก pattern ใช้ .match(text, pos, end) -> ดูแค่ต้นบรรทัด ไม่มี backtracking ข้ามบรรทัด
+_SECTION_LINE = re.compile(r"มาตรา\s*([๐-๙0-9]+)(?:\s*/\s*([๐-๙0-9]+))?")
+_CHAPTER_LINE = re.compile(r"[ \t#]*หมวด\s*[๐-๙0-9]+")
+_PART_LINE = re.compile(r"[ \t#]*ส่วนที่\s*[๐-๙0-9]+")
+
+
+class Token(namedtuple("Token", ["kind", "sec_id", "start", "end", "source"])):
+    __slots__ = ()
+
+    @property
+    def text(self):
+        return self.source[self.start:self.end]
+
+
+def _lines(text):
+    """(start, end) ของทุกบรรทัด (end ไม่รวม \\n)"""
+    pos = 0
+    length = len(text)
+    while pos <= length:
+        nl = text.find("\n", pos)
+        end = length if nl == -1 else nl
+        yield pos, end
+        pos = end + 1
+
+
+def tokenize(text):
+    """แปลง markdown 1 หน้าเป็น token (generator)"""
+    kind, sec_id, start = INTRO, None, 0
+
+    for line_start, line_end in _lines(text):
+        section = _SECTION_LINE.match(text, line_start, line_end)
+        if section:
+            if kind != INTRO or line_start > start:
+                yield Token(kind, sec_id, start, line_start, text)
+            major = section.group(1).translate(_THAI_DIGITS)
+            minor = section.group(2)
+            if minor:
+                kind, sec_id = SUBSECTION, f"{major}/{minor.translate(_THAI_DIGITS)}"
+            else:
+                kind, sec_id = SECTION, major
+            start = section.end()
+            continue
+
+        if kind == INTRO:
+            # ก่อนมาตราแรก: ทุกอย่างเป็น intro (heal จะแยก "หมวด" ออกเอง)
+            continue
+
+        header = _CHAPTER_LINE.match(text, line_start, line_end) and CHAPTER
+        header = header or (_PART_LINE.match(text, line_start, line_end) and PART)
+        if header:
+            yield Token(kind, sec_id, start, line_start, text)
+            kind, start = header, line_start
+
+    if kind != INTRO or len(text) > start:
+        yield Token(kind, sec_id, start, len(text), text)
@@ -0,0 +1,202 @@
+"""
+Section Model: section ในหน่วยความจำแบบ __slots__ แทน dict (ใช้ใน Stage 1-2 ระหว่างโหลด JSON จนเขียนกลับ)
+
+- Section: field ที่มีเกือบทุก section (id, content, type, status, similarity, diff_versions,
+  category_id, page, offset) เก็บใน slot, key อื่น (legacy_id, page_end, ...) เก็บใน extra
+  ใช้แทน dict ได้เลย (item["id"], item.get(...), "x" in item, dict(item)) -> โค้ดเดิมไม่ต้องแก้
+  ลำดับ key จำไว้ (tuple ที่ใช้ร่วมกันทุก section) -> to_dict() ได้ JSON เหมือนเดิมทุก byte
+- from_dict ใช้ข้อความซ้ำร่วมกัน: type/status ผ่าน sys.intern, diff_versions.ai_ocr ที่เท่ากับ content
+  ชี้ไปที่ string เดียวกัน (json.load สร้างสำเนาแยก = ข้อความทั้งมาตราซ้ำ 2 ชุดในหน่วยความจำ)
+- SectionId: parse id ครั้งเดียวตอนสร้าง/เปลี่ยน id -> key สำหรับเรียงพร้อมใช้ (ไม่ต้อง parse ทุกครั้งที่ sort)
+    "intro"            -> -1.0
+    "header_3"         -> 3 - 0.1   (header ก่อนมาตรา 3)
+    "header_after_7"   -> 7 + 0.5   (header หลังมาตรา 7, header_after_44/1 -> 44.501)
+    "44/1"             -> 44.001    (มาตราย่อย อยู่หลัง 44 ก่อน header_after_44)
+    อ่านเลขไม่ได้      -> header_after_* 9999.5, header_* 0, อื่นๆ 9999
+
+    sections = load_sections("json_output/clean/con2560_clean.json")
+    sections.sort(key=lambda s: s.sid.key)
+    json.dump(to_dicts(sections), f, ensure_ascii=False, indent=2)
+"""
+import json
+import sys
+from collections.abc import MutableMapping
+
+from sequence_repair import section_key
+
+INTRO = "intro"
+HEADER = "header"
+HEADER_AFTER = "header_after"
+SECTION = "section"
+OTHER = "other"
+
+_FIELDS = ("id", "content", "type", "status", "similarity", "diff_versions", "category_id", "page", "offset")
+_FIELD_SET = frozenset(_FIELDS)
+_SECTION_IDS = {}  # id -> SectionId
+_KEY_ORDERS = {}  # ลำดับ key ที่เคยเห็น -> tuple เดียวกันทุก section ที่มี key ชุดเดียวกัน
+
+
+def _intern_order(keys):
+    return _KEY_ORDERS.setdefault(keys, keys)
+
+
+def _section_number(s):
+    """"7" -> 7.0, มาตราย่อย "44/1" -> 44.001"""
+    major, _, minor = s.partition("/")
+    return float(major) + (float(minor) / 1000 if minor else 0.0)
+
+
+class SectionId:
+    """
+    id ที่ parse แล้ว: kind, number (เลขมาตรา / เลขหมวด หรือ None), key สำหรับเรียง
+    seq = sequence_repair.section_key (major, minor) ของมาตรา/มาตราย่อย ที่ repair_section_ids ใช้
+    """
+    __slots__ = ("raw", "kind", "number", "key", "seq")
+
+    def __init__(self, raw):
+        s = str(raw)
+        self.raw = s
+        self.number = None
+        self.seq = section_key(s)
+        if s.lower() == "intro":
+            self.kind, self.key = INTRO, -1.0
+        elif s.startswith("header_after_"):
+            self.kind = HEADER_AFTER
+            try:
+                self.number = _section_number(s[len("header_after_"):])
+                self.key = self.number + 0.5
+            except ValueError:
+                self.key = 9999.5
+        elif s.startswith("header_"):
+            self.kind = HEADER
+            try:
+                self.number = float(s[len("header_"):])
+                self.key = self.number - 0.1
+            except ValueError:
+                self.key = 0
+        else:
+            try:
+                self.number = _section_number(s)
+                self.kind, self.key = SECTION, self.number
+            except ValueError:
+                self.kind, self.key = OTHER, 9999
+
+    @staticmethod
+    def of(raw):
+        """SectionId ที่ใช้ร่วมกันต่อ id (id ไม่กี่ร้อยแบบซ้ำทุกฉบับ)"""
+        sid = _SECTION_IDS.get(raw)
+        if sid is None:
+            sid = _SECTION_IDS[raw] = SectionId(raw)
+        return sid
+
+    @property
+    def is_header(self):
+        return self.kind in (HEADER, HEADER_AFTER)
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+    def __eq__(self, other):
+        return isinstance(other, SectionId) and self.raw == other.raw
+
+    def __hash__(self):
+        return hash(self.raw)
+
+    def __repr__(self):
+        return f"SectionId({self.raw!r})"
+
+
+class Section(MutableMapping):
+    __slots__ = _FIELDS + ("sid", "extra", "_keys")
+
+    def __init__(self, data=(), **fields):
+        self._keys = ()
+        self.extra = None
+        for key, value in dict(data, **fields).items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        """dict จาก JSON -> Section (ไม่ผ่าน __setitem__ ทีละ key)"""
+        sec = cls.__new__(cls)
+        extra = None
+        for key, value in data.items():
+            if key in _FIELD_SET:
+                setattr(sec, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        sec.extra = extra
+        for key in ("type", "status"):
+            value = getattr(sec, key, None)
+            if type(value) is str:
+                setattr(sec, key, sys.intern(value))
+        diff = getattr(sec, "diff_versions", None)
+        if isinstance(diff, dict) and "content" in data:
+            content = sec.content
+            sec.diff_versions = {k: content if v == content else v for k, v in diff.items()}
+        sec._keys = _intern_order(tuple(data))
+        sec.sid = SectionId.of(str(data["id"]))
+        return sec
+
+    def to_dict(self):
+        return {key: self[key] for key in self._keys}
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra is None or key not in self.extra:
+            raise KeyError(key)
+        return self.extra[key]
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        return default if self.extra is None else self.extra.get(key, default)
+
+    def __setitem__(self, key, value):
+        if key not in self._keys:
+            self._keys = _intern_order(self._keys + (key,))
+        if key in _FIELD_SET:
+            setattr(self, key, value)
+            if key == "id":
+                self.sid = SectionId.of(str(value))
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        self._keys = _intern_order(tuple(k for k in self._keys if k != key))
+        if key in _FIELD_SET:
+            delattr(self, key)
+        else:
+            del self.extra[key]
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return f"Section({self.to_dict()!r})"
+
+
+def to_dicts(items):
+    """list ของ Section (หรือ dict) -> list ของ dict สำหรับ json.dump"""
+    return [item.to_dict() if isinstance(item, Section) else item for item in items]
+
+
+def load_sections(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [Section.from_dict(item) for item in json.load(f)]
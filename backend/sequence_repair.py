@@ -0,0 +1,194 @@
+"""
+ซ่อมเลขมาตราที่ OCR อ่านผิด แบบ O(n log n) และ deterministic
+
+มองเลขมาตราทั้งเอกสารเป็นลำดับที่มี noise:
+1. หา longest non-decreasing subsequence (LIS) ของเลขมาตรา -> ตัวที่อยู่ใน LIS คือ anchor (ลำดับถูกแล้ว)
+2. ตัวที่ไม่อยู่ใน LIS คือ outlier -> เลือกเลขที่ "หายไป" ระหว่าง anchor ซ้าย/ขวา มาแทน
+   โดยเลือกเลขที่ตัวเลขใกล้กับที่ OCR อ่านได้ที่สุด (๑๓ -> ๓๑, ๘ -> ๓) และยังเรียงจากน้อยไปมาก
+   เปลี่ยนเลขเฉพาะ outlier ที่ "ผิดแน่" เท่านั้น:
+   - เลขซ้ำกับ anchor (มาตรานั้นมีอยู่แล้วในลำดับที่ถูก) หรือ
+   - ช่องว่างระหว่าง anchor ซ้าย/ขวามีเลขหายไปเท่ากับจำนวน outlier พอดี (เติมได้แบบเดียว)
+   outlier ที่เลขไม่ซ้ำใคร อยู่ในช่วง และช่องว่างไม่พอดี (เช่นหน้าสลับลำดับ) คงเลขเดิมไว้
+3. header_after_<เลขเดิม> ที่ตามหลัง section ที่ถูกซ่อม ถูกเปลี่ยนชื่อตาม
+
+มาตราย่อย (44/1) เรียงเป็น (44, 1) ร่วมใน LIS ได้ แต่ไม่นับเป็นเลขที่ "หายไป" และไม่ถูกใช้เติมช่องว่าง
+"""
+import re
+from bisect import bisect_right
+from collections import Counter
+
+from page_index import extend_pages
+
+_THAI_DIGITS = str.maketrans("๐๑๒๓๔๕๖๗๘๙", "0123456789")
+_SECTION_ID = re.compile(r"\s*(\d+)(?:\s*/\s*(\d+))?\s*")
+
+# run ที่ outlier x ช่องว่าง ใหญ่กว่านี้ใช้การจับคู่ตามลำดับแทน DP
+_MAX_ASSIGN_CELLS = 200_000
+
+
+def section_key(sec_id):
+    """"12" -> (12, 0), "44/1" -> (44, 1), intro/header/อื่นๆ -> None"""
+    match = _SECTION_ID.fullmatch(str(sec_id).translate(_THAI_DIGITS))
+    if not match: return None
+    return int(match.group(1)), int(match.group(2) or 0)
+
+
+def _item_key(item):
+    """section_key ของ item (Section ใน section_model parse ไว้แล้วใน sid.seq)"""
+    sid = getattr(item, "sid", None)
+    return sid.seq if sid is not None else section_key(item.get("id", ""))
+
+
+def longest_non_decreasing(keys):
+    """index ของ longest non-decreasing subsequence (patience sorting, O(n log n))"""
+    tails = []        # tails[k] = key ท้ายสุดที่น้อยที่สุดของ subsequence ยาว k+1
+    tail_index = []   # index ของ tails[k]
+    previous = [-1] * len(keys)
+    for i, key in enumerate(keys):
+        k = bisect_right(tails, key)
+        if k == len(tails):
+            tails.append(key)
+            tail_index.append(i)
+        else:
+            tails[k] = key
+            tail_index[k] = i
+        previous[i] = tail_index[k - 1] if k else -1
+
+    result = []
+    i = tail_index[-1] if tail_index else -1
+    while i != -1:
+        result.append(i)
+        i = previous[i]
+    result.reverse()
+    return result
+
+
+def _digit_distance(a, b):
+    """edit distance ของตัวเลขสองจำนวน (เลขมาตราสั้น -> DP ธรรมดาพอ)"""
+    a, b = str(a), str(b)
+    row = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        prev_diag, row[0] = row[0], i
+        for j, cb in enumerate(b, 1):
+            prev_diag, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev_diag + (ca != cb))
+    return row[-1]
+
+
+def _assign(read_ids, gaps, expected_start):
+    """
+    จับคู่ outlier (ตามลำดับ) กับเลขที่หายไป (เรียงแล้ว) แบบยังเรียงจากน้อยไปมาก
+    เลือกให้จับคู่ได้มากที่สุด แล้ว edit distance รวมน้อยสุด แล้วใกล้ตำแหน่งที่ควรเป็นที่สุด
+    คืน list ยาวเท่า read_ids (None = ไม่มีเลขให้)
+    """
+    k, m = len(read_ids), len(gaps)
+    if k * m > _MAX_ASSIGN_CELLS:
+        return [gaps[i] if i < m else None for i in range(k)]
+
+    def cost(r, g):
+        return _digit_distance(read_ids[r], gaps[g]), abs(gaps[g] - (expected_start + r))
+
+    # best[r][g] = (-จำนวนคู่, distance, offset) ที่ดีที่สุดของ outlier r.. กับ gaps g..
+    best = [[(0, 0, 0)] * (m + 1) for _ in range(k + 1)]
+    for r in range(k - 1, -1, -1):
+        for g in range(m - 1, -1, -1):
+            pairs, dist, offset = best[r + 1][g + 1]
+            d, o = cost(r, g)
+            best[r][g] = min((pairs - 1, dist + d, offset + o), best[r + 1][g], best[r][g + 1])
+
+    result, r, g = [], 0, 0
+    while r < k:
+        if g < m:
+            pairs, dist, offset = best[r + 1][g + 1]
+            d, o = cost(r, g)
+            if (pairs - 1, dist + d, offset + o) == best[r][g]:
+                result.append(gaps[g])
+                r, g = r + 1, g + 1
+                continue
+            if best[r][g + 1] == best[r][g]:
+                g += 1
+                continue
+        result.append(None)
+        r += 1
+    return result
+
+
+def repair_section_ids(items):
+    """
+    ซ่อม item["id"] ของ section ที่ลำดับผิด (แก้ใน items โดยตรง)
+    คืน (fixes, missing): fixes = [(เลขเดิม, เลขใหม่)], missing = เลขที่หายไปก่อนซ่อม
+    """
+    positions, keys = [], []
+    for i, item in enumerate(items):
+        key = _item_key(item)
+        if key is not None:
+            positions.append(i)
+            keys.append(key)
+    if not keys: return [], []
+
+    seen = {major for major, minor in keys if not minor}
+    if not seen: return [], []
+    first, last = min(seen), max(seen)
+    missing = sorted(set(range(first, last + 1)) - seen)
+    if not missing: return [], []
+
+    anchors = set(longest_non_decreasing(keys))
+    anchored = Counter(keys[j][0] for j in anchors if not keys[j][1])
+    fixes = []
+    renamed = {}  # index ใน items -> id เดิม
+    run = []
+    lower = None
+    for j, key in enumerate(keys + [None]):
+        if j < len(keys) and j not in anchors:
+            run.append(j)
+            continue
+        run = [r for r in run if not keys[r][1]]  # มาตราย่อยที่ลำดับผิด: ไม่เดาเลขให้
+        if run:
+            upper = key[0] if key else last + 1
+            lo = lower if lower is not None else first - 1
+            start, end = bisect_right(missing, lo), bisect_right(missing, upper - 1)
+            gaps = missing[start:end]
+            if len(gaps) != len(run):
+                # เติมช่องว่างไม่ได้แบบเดียว -> ซ่อมเฉพาะตัวที่เลขชนกับ anchor
+                run = [r for r in run if anchored[keys[r][0]]]
+            if gaps and run:
+                read_ids = [keys[r][0] for r in run]
+                for r, new_id in zip(run, _assign(read_ids, gaps, lo + 1)):
+                    if new_id is None: continue
+                    item = items[positions[r]]
+                    renamed[positions[r]] = str(item["id"])
+                    fixes.append((str(item["id"]), str(new_id)))
+                    item["id"] = str(new_id)
+            run = []
+        if key is not None:
+            lower = key[0]
+
+    # header ที่ parser ตั้งชื่อตาม section ก่อนหน้า -> เปลี่ยนตาม
+    last_renamed = None
+    for i, item in enumerate(items):
+        if i in renamed:
+            last_renamed = (renamed[i], item["id"])
+        elif _item_key(item) is not None:
+            last_renamed = None
+        elif last_renamed and item.get("id") == f"header_after_{last_renamed[0]}":
+            item["id"] = f"header_after_{last_renamed[1]}"
+    return fixes, missing
+
+
+def merge_duplicates(items):
+    """
+    รวม item ที่ id ซ้ำกัน (header ใช้ตัวแรก) ข้อความต่อท้ายเก็บใน buffer แล้ว join ครั้งเดียว
+    page = หน้าของตัวแรก, page_end ขยายตามตัวที่รวมเข้ามา
+    คืน list ตามลำดับที่พบ id ครั้งแรก
+    """
+    merged = {}
+    buffers = {}
+    for item in items:
+        sec_id = str(item["id"])
+        if sec_id not in merged:
+            merged[sec_id] = item
+        elif not sec_id.startswith("header_"):
+            buffers.setdefault(sec_id, [merged[sec_id]["content"]]).append(item["content"])
+            extend_pages(merged[sec_id], item)
+    for sec_id, parts in buffers.items():
+        merged[sec_id]["content"] = " ".join(parts)
+    return list(merged.values())
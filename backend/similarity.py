@@ -0,0 +1,160 @@
+"""
+Similarity Engine: เทียบข้อความ OCR กับ Legacy (Phase 3 ของ Stage 1)
+
+metric (config.SIMILARITY_METRIC):
+- levenshtein : 1 - edit_distance / ความยาวที่มากกว่า
+                คำนวณแบบ bit-parallel (Myers 1999) -> ทำงานทีละตัวอักษรของข้อความหนึ่ง
+                ด้วย int ของ Python เป็น bit vector ของอีกข้อความ ไม่ quadratic แม้ข้อความไทยยาวไม่มีเว้นวรรค
+- difflib     : SequenceMatcher.ratio() แบบเดิม (มี autojunk -> ข้อความยาว > 200 ตัวอักษรอาจได้คะแนนต่ำผิดปกติ)
+- dice        : Dice coefficient ของ bigram แบบเดียวกับ compareTwoStrings ของ npm "string-similarity"
+                (ที่ frontend ใช้) -> ใช้ใน 03_alignment.py ให้ได้คะแนนเท่ากับหน้าเว็บ
+
+score(a, b, cutoff) คืนคะแนนจริงถ้า >= cutoff ไม่งั้นคืน 0.0 (แบบ rapidfuzz score_cutoff)
+ถ้ามี cutoff จะลองตัวกรองราคาถูกก่อน (ความยาว, จำนวนตัวอักษรที่ตรงกัน) และหยุดคำนวณทันทีที่รู้ว่าไม่ถึง
+
+ถ้าติดตั้ง rapidfuzz ไว้ levenshtein จะใช้ implementation ภาษา C++ ของ rapidfuzz (คะแนนเท่ากันทุกค่า)
+"""
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+
+try:
+    from rapidfuzz.distance import Levenshtein as _rapidfuzz_levenshtein
+except ImportError:  # rapidfuzz เป็น optional dependency
+    _rapidfuzz_levenshtein = None
+
+from config import SIMILARITY_METRIC, SIMILARITY_THRESHOLD
+
+
+def _common_chars(a, b):
+    """จำนวนตัวอักษรที่ตรงกันได้มากที่สุด (ไม่สนลำดับ)"""
+    small, large = (a, b) if len(a) < len(b) else (b, a)
+    counts = Counter(large)
+    return sum(min(n, counts[ch]) for ch, n in Counter(small).items())
+
+
+def levenshtein_distance(a, b, max_dist=None):
+    """
+    edit distance แบบ bit-parallel (Myers)
+    max_dist: ถ้ารู้แน่ว่าเกินแล้วหยุดทันที (คืนค่าที่มากกว่า max_dist แต่ไม่ใช่ distance จริง)
+    """
+    if len(a) < len(b): a, b = b, a  # b สั้นกว่า = ความกว้างของ bit vector
+    m = len(b)
+    if m == 0: return len(a)
+
+    peq = {}
+    for i, ch in enumerate(b):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    mask = (1 << m) - 1
+    last = 1 << (m - 1)
+    pv, mv, dist = mask, 0, m
+    remaining = len(a)
+    for ch in a:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | ~(xh | pv)
+        mh = pv & xh
+        if ph & last: dist += 1
+        elif mh & last: dist -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = (mh | ~(xv | ph)) & mask
+        mv = ph & xv
+        remaining -= 1
+        # ตัวอักษรที่เหลือลด distance ได้อย่างมากตัวละ 1
+        if max_dist is not None and dist - remaining > max_dist:
+            return max_dist + 1
+    return dist
+
+
+def _levenshtein_score(a, b, cutoff):
+    if _rapidfuzz_levenshtein is not None:
+        return _rapidfuzz_levenshtein.normalized_similarity(a, b, score_cutoff=cutoff)
+    longest = max(len(a), len(b))
+    if longest == 0: return 1.0
+    if a == b: return 1.0
+    max_dist = int((1 - cutoff) * longest + 1e-9)
+    if cutoff:
+        if abs(len(a) - len(b)) > max_dist: return 0.0
+        if longest - _common_chars(a, b) > max_dist: return 0.0
+    dist = levenshtein_distance(a, b, max_dist if cutoff else None)
+    score = 1 - dist / longest
+    return score if score >= cutoff else 0.0
+
+
+def _difflib_score(a, b, cutoff):
+    matcher = SequenceMatcher(None, a, b)
+    if cutoff and (matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff):
+        return 0.0
+    score = matcher.ratio()
+    return score if score >= cutoff else 0.0
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def bigram_counts(text):
+    """Counter ของ bigram หลังตัดช่องว่างทั้งหมด (แบบ string-similarity)"""
+    text = _WHITESPACE.sub("", text)
+    return Counter(text[i:i + 2] for i in range(len(text) - 1))
+
+
+def dice_bigram(a, b):
+    """compareTwoStrings(a, b) ของ string-similarity v4"""
+    a, b = _WHITESPACE.sub("", a), _WHITESPACE.sub("", b)
+    if a == b: return 1.0
+    if len(a) < 2 or len(b) < 2: return 0.0
+    first = Counter(a[i:i + 2] for i in range(len(a) - 1))
+    second = Counter(b[i:i + 2] for i in range(len(b) - 1))
+    intersection = sum(min(n, first[bigram]) for bigram, n in second.items())
+    return (2.0 * intersection) / (len(a) + len(b) - 2)
+
+
+def _dice_score(a, b, cutoff):
+    if cutoff:
+        la, lb = len(_WHITESPACE.sub("", a)), len(_WHITESPACE.sub("", b))
+        if la != lb and la >= 2 and lb >= 2 and 2.0 * (min(la, lb) - 1) / (la + lb - 2) < cutoff:
+            return 0.0
+    score = dice_bigram(a, b)
+    return score if score >= cutoff else 0.0
+
+
+METRICS = {
+    "levenshtein": _levenshtein_score,
+    "difflib": _difflib_score,
+    "dice": _dice_score,
+}
+
+
+def _score_chunk(args):
+    metric, pairs, cutoff = args
+    fn = METRICS[metric]
+    return [fn(str(a), str(b), cutoff) for a, b in pairs]
+
+
+class SimilarityEngine:
+    def __init__(self, metric=SIMILARITY_METRIC, threshold=SIMILARITY_THRESHOLD):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown similarity metric: {metric!r} (expected {', '.join(METRICS)})")
+        self.metric = metric
+        self.threshold = threshold
+        self._fn = METRICS[metric]
+
+    def score(self, a, b, cutoff=0.0):
+        """คะแนน 0..1 (คืน 0.0 ถ้าต่ำกว่า cutoff)"""
+        return self._fn(str(a), str(b), cutoff)
+
+    def is_verified(self, a, b):
+        """ตัดสินอย่างเดียว (ใช้ตัวกรอง + หยุดก่อนได้)"""
+        return self.score(a, b, self.threshold) > self.threshold
+
+    def score_pairs(self, pairs, cutoff=0.0, workers=0, chunk_size=64):
+        """คะแนนของหลายคู่ (workers > 1 = แบ่ง chunk ไปคำนวณใน process pool)"""
+        pairs = list(pairs)
+        if workers <= 1 or len(pairs) <= chunk_size:
+            return _score_chunk((self.metric, pairs, cutoff))
+        chunks = [(self.metric, pairs[i:i + chunk_size], cutoff) for i in range(0, len(pairs), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return [score for chunk in pool.map(_score_chunk, chunks) for score in chunk]
@@ -0,0 +1,271 @@
+"""
+Telemetry: เวลาแต่ละช่วงของ stage + บันทึกทุก request OCR/LLM ของการรัน 1 ครั้ง
+
+    with telemetry.run("con2560", "stage1"):
+        with telemetry.span("heal"):
+            ...
+        with telemetry.call("llm", model, label="header mapping") as rec:
+            ...  # rec["retries"] = 2, telemetry.annotate(prompt_tokens=...) จากโค้ดที่ถูกเรียก
+
+- span  : ช่วงเวลาของ phase (ซ้อนกันได้ -> parent)
+- call  : request 1 ครั้ง (OCR 1 หน้า / LLM 1 prompt รวมทุก retry): latency, เวลารอคิว, bytes,
+          prompt/output tokens, retries, cache hit, สถานะ
+- จบ run: telemetry/<id>_<stage>.trace.jsonl (1 บรรทัดต่อ record) + <id>_<stage>.prom (Prometheus textfile
+  สำหรับ node_exporter --collector.textfile.directory) + log ตารางสรุป (tokens, retries, ค่าใช้จ่ายประมาณ)
+- profiled(): ครอบ run ด้วย cProfile (เฉพาะ main thread) เก็บ .prof และพิมพ์ฟังก์ชันที่กินเวลามากสุด
+นอก run() หรือ TELEMETRY=0: span/call เรียกได้ตามปกติแต่ไม่บันทึก
+"""
+import contextlib
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict
+
+from config import LLM_PRICES_PER_MTOK, TELEMETRY_DIR, TELEMETRY_ENABLED
+
+_SUMMED = ("bytes_in", "bytes_out", "prompt_tokens", "output_tokens")
+
+
+class Recorder:
+    def __init__(self, const_id, stage, out_dir=TELEMETRY_DIR):
+        self.const_id = const_id
+        self.stage = stage
+        self.out_dir = out_dir
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.records = []
+        self.lock = threading.Lock()
+        self.local = threading.local()  # span ที่เปิดอยู่ + call ปัจจุบันของแต่ละ thread
+
+    def add(self, record):
+        record["t"] = round(time.perf_counter() - self._t0, 6)
+        with self.lock:
+            self.records.append(record)
+
+    @property
+    def trace_path(self):
+        return os.path.join(self.out_dir, f"{self.const_id}_{self.stage}.trace.jsonl")
+
+    @property
+    def prom_path(self):
+        return os.path.join(self.out_dir, f"{self.const_id}_{self.stage}.prom")
+
+    def calls_by_target(self):
+        """{(kind, name): สถิติรวม} เรียงตาม kind, name"""
+        groups = defaultdict(list)
+        for record in self.records:
+            if record["type"] == "call":
+                groups[(record["kind"], record["name"])].append(record)
+        stats = {}
+        for key, records in sorted(groups.items()):
+            api = [r for r in records if not r.get("cache_hit")]
+            latencies = sorted(r["seconds"] for r in api)
+            total = {field: sum(r.get(field) or 0 for r in records) for field in _SUMMED}
+            price_in, price_out = LLM_PRICES_PER_MTOK.get(key[1], (0.0, 0.0)) if key[0] == "llm" else (0.0, 0.0)
+            stats[key] = dict(
+                total,
+                calls=len(records),
+                cache_hits=len(records) - len(api),
+                errors=sum(r.get("status") != "ok" for r in records),
+                retries=sum(r.get("retries") or 0 for r in records),
+                seconds=sum(latencies),
+                queue_seconds=sum(r.get("queue_seconds") or 0 for r in records),
+                p50=latencies[len(latencies) // 2] if latencies else 0.0,
+                p95=latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0,
+                cost_usd=(total["prompt_tokens"] * price_in + total["output_tokens"] * price_out) / 1e6,
+            )
+        return stats
+
+    def spans(self):
+        """{ชื่อ span: (วินาทีรวม, จำนวนครั้ง)} ตามลำดับที่เปิด"""
+        totals = {}
+        for record in self.records:
+            if record["type"] == "span":
+                seconds, count = totals.get(record["name"], (0.0, 0))
+                totals[record["name"]] = (seconds + record["seconds"], count + 1)
+        return totals
+
+    def write_trace(self):
+        with open(self.trace_path, "w", encoding="utf-8") as f:
+            header = {"type": "run", "const_id": self.const_id, "stage": self.stage,
+                      "started_at": self.started_at, "seconds": round(time.perf_counter() - self._t0, 6)}
+            f.write(json.dumps(header, ensure_ascii=False) + "\n")
+            for record in self.records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def prometheus_text(self):
+        base = f'const_id="{self.const_id}",stage="{self.stage}"'
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                extra = "".join(f',{k}="{_escape_label(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{{{base}{extra}}} {float(value)!r}")
+
+        metric("pipeline_run_timestamp_seconds", "gauge", "Start time of the last run",
+               [({}, self.started_at)])
+        metric("pipeline_run_seconds", "gauge", "Wall time of the last run",
+               [({}, time.perf_counter() - self._t0)])
+        metric("pipeline_span_seconds", "gauge", "Wall time per pipeline phase in the last run",
+               [({"span": name}, seconds) for name, (seconds, _) in self.spans().items()])
+        stats = self.calls_by_target()
+        fields = [
+            ("pipeline_calls_total", "calls", "OCR/LLM requests (cache hits included)"),
+            ("pipeline_cache_hits_total", "cache_hits", "Requests served from a cache"),
+            ("pipeline_call_errors_total", "errors", "Requests that failed after retries"),
+            ("pipeline_retries_total", "retries", "Extra attempts made by retries"),
+            ("pipeline_call_seconds_total", "seconds", "Time spent in API requests"),
+            ("pipeline_queue_seconds_total", "queue_seconds", "Time spent waiting for a rate-limit slot"),
+            ("pipeline_cost_usd_total", "cost_usd", "Estimated LLM cost (config.LLM_PRICES_PER_MTOK)"),
+        ]
+        for name, field, help_text in fields:
+            metric(name, "counter", help_text,
+                   [({"kind": kind, "name": target}, s[field]) for (kind, target), s in stats.items()])
+        metric("pipeline_tokens_total", "counter", "LLM tokens reported by the API",
+               [({"kind": kind, "name": target, "direction": d}, s[f"{d}_tokens"])
+                for (kind, target), s in stats.items() for d in ("prompt", "output")])
+        metric("pipeline_bytes_total", "counter", "Request/response payload bytes",
+               [({"kind": kind, "name": target, "direction": d}, s[f"bytes_{d}"])
+                for (kind, target), s in stats.items() for d in ("in", "out")])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self):
+        # เขียนไฟล์ชั่วคราวแล้ว rename -> node_exporter ไม่อ่านไฟล์ครึ่งๆ กลางๆ
+        tmp_path = self.prom_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, self.prom_path)
+
+    def log_summary(self):
+        elapsed = time.perf_counter() - self._t0
+        logging.info(f"⏱️ Telemetry {self.const_id} {self.stage}: {elapsed:.2f}s")
+        for name, (seconds, count) in self.spans().items():
+            share = seconds / elapsed if elapsed else 0.0
+            logging.info(f"   {name:<22}{seconds:>9.3f}s {share:>6.1%}" + (f"  x{count}" if count > 1 else ""))
+        for (kind, target), s in self.calls_by_target().items():
+            tokens = f", {s['prompt_tokens']}+{s['output_tokens']} tokens" if s["prompt_tokens"] else ""
+            cost = f", ~${s['cost_usd']:.4f}" if s["cost_usd"] else ""
+            logging.info(
+                f"   {kind} {target}: {s['calls']} calls ({s['cache_hits']} cached, {s['retries']} retries, "
+                f"{s['errors']} errors), p50 {s['p50']:.2f}s p95 {s['p95']:.2f}s{tokens}{cost}"
+            )
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_current = None
+
+
+@contextlib.contextmanager
+def run(const_id, stage, enabled=TELEMETRY_ENABLED, out_dir=TELEMETRY_DIR):
+    """บันทึกทุก span/call ระหว่างนี้ แล้วเขียน trace + Prometheus textfile ตอนจบ (แม้ stage จะ error)"""
+    global _current
+    if not enabled:
+        yield None
+        return
+    recorder = Recorder(const_id, stage, out_dir)
+    previous, _current = _current, recorder
+    try:
+        yield recorder
+    finally:
+        _current = previous
+        try:
+            os.makedirs(out_dir, exist_ok=True)
+            recorder.write_trace()
+            recorder.write_prometheus()
+            recorder.log_summary()
+            logging.info(f"📝 Telemetry: {recorder.trace_path}, {recorder.prom_path}")
+        except OSError as e:
+            logging.warning(f"⚠️ Cannot write telemetry: {e}")
+
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    recorder = _current
+    if recorder is None:
+        yield
+        return
+    stack = recorder.local.__dict__.setdefault("spans", [])
+    parent = stack[-1] if stack else None
+    stack.append(name)
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        stack.pop()
+        recorder.add(dict(type="span", name=name, parent=parent,
+                          seconds=round(time.perf_counter() - started_at, 6), **attrs))
+
+
+@contextlib.contextmanager
+def call(kind, name, **fields):
+    """
+    record ของ request 1 ครั้ง (yield dict ให้เติม field ได้ เช่น cache_hit, retries, queue_seconds)
+    exception ที่หลุดออกไป = status "error"
+    """
+    record = dict(type="call", kind=kind, name=name, status="ok", **fields)
+    recorder = _current
+    if recorder is None:
+        yield record
+        return
+    previous = getattr(recorder.local, "call", None)
+    recorder.local.call = record
+    started_at = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        record["status"] = "error"
+        raise
+    finally:
+        recorder.local.call = previous
+        record["seconds"] = round(time.perf_counter() - started_at, 6)
+        recorder.add(record)
+
+
+def annotate(**fields):
+    """เติม field ให้ call ที่เปิดอยู่ใน thread นี้ (ตัวเลขใน _SUMMED บวกสะสม = รวมทุก attempt)"""
+    recorder = _current
+    record = getattr(recorder.local, "call", None) if recorder is not None else None
+    if record is None:
+        return
+    for field, value in fields.items():
+        if value is None: continue
+        if field in _SUMMED:
+            record[field] = (record.get(field) or 0) + value
+        else:
+            record[field] = value
+
+
+def record_call(kind, name, seconds, **fields):
+    """call ที่ไม่ต้องจับเวลาเอง (เช่น ได้จาก cache)"""
+    recorder = _current
+    if recorder is not None:
+        recorder.add(dict(type="call", kind=kind, name=name, status="ok", seconds=round(seconds, 6), **fields))
+
+
+@contextlib.contextmanager
+def profiled(const_id, stage, out_dir=TELEMETRY_DIR, top=25):
+    """cProfile ครอบทั้ง block -> <out_dir>/<id>_<stage>.prof + พิมพ์ top ตาม self time และ cumulative"""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, f"{const_id}_{stage}.prof")
+        profiler.dump_stats(path)
+        for sort_key in ("tottime", "cumulative"):
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).strip_dirs().sort_stats(sort_key).print_stats(top)
+            print(f"\n🔥 Hot functions by {sort_key}:\n{out.getvalue()}")
+        print(f"💾 Profile saved to {path} (python -m pstats {path})")
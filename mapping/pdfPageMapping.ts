@@ -1,1104 +0,0 @@
-// mapping/pdfPageMapping.ts
-
-// This file configures which PDF page each section belongs to.
-// Format: An array where the index corresponds to the page number (0 = Page 1, 1 = Page 2, etc.)
-// Value: The LAST Section ID contained on that page.
-//
-// Example: [4, 8, 15]
-// - Page 1: Ends at Section 4 (includes 1, 2, 3, 4)
-// - Page 2: Ends at Section 8 (includes 5, 6, 7, 8)
-// - Page 3: Ends at Section 15
-
-export const PDF_PAGE_MAPPING: Record<string, number[]> = {
-    // ---------------------------------------------------------
-    // 1. ธรรมนูญการปกครองแผ่นดินสยามชั่วคราว 2475
-    // ---------------------------------------------------------
-    "con2475temp": [
-        0,  // Page 1 ends at Sec 2
-        4,  // Page 2 ends at Sec 4
-        8,  // Page 3 ends at Sec 6
-        10,
-        10,
-        12,
-        14,
-        18,
-        23,
-        26,
-        27,
-        29,
-        33,
-        36,
-        39
-    ],
-
-    // ---------------------------------------------------------
-    // 2. รัฐธรรมนูญแห่งราชอาณาจักรสยาม 2475
-    // ---------------------------------------------------------
-    "con2475": [
-        0,
-        0,
-        0,
-        0,
-        0,
-        6,
-        11,
-        15,
-        20,
-        23,
-        27,
-        31,
-        34,
-        39,
-        41,
-        45,
-        48,
-        51,
-        54,
-        59,
-        63,
-        65,
-        68,
-    ],
-
-    // ---------------------------------------------------------
-    // 3. รัฐธรรมนูญแห่งราชอาณาจักรไทย 2489
-    // ---------------------------------------------------------
-    "con2489": [
-        0,
-        0,
-        0,
-        0,
-        0,
-        0,
-        0,
-        5,
-        10,
-        14,
-        18,
-        21,
-        25,
-        27,
-        30,
-        33,
-        37,
-        41,
-        44,
-        48,
-        49,
-        52,
-        53,
-        54,
-        59,
-        61,
-        62,
-        66,
-        70,
-        72,
-        73,
-        77,
-        82,
-        84,
-        85,
-        88,
-        90,
-        91,
-        91,
-        95,
-        96
-    ],
-
-    // ---------------------------------------------------------
-    // 4. รัฐธรรมนูญแห่งราชอาณาจักรไทย (ฉบับชั่วคราว) 2490
-    // ---------------------------------------------------------
-    "con2490temp": [
-        0,
-        0,
-        1,
-        8,
-        12,
-        17,
-        22,
-        25,
-        30,
-        35,
-        39,
-        41,
-        45,
-        49,
-        53,
-        56,
-        58,
-        60,
-        61,
-        62,
-        67,
-        70,
-        72,
-        76,
-        78,
-        80,
-        84,
-        89,
-        93,
-        96,
-        97,
-        98
-    ],
-
-    // ---------------------------------------------------------
-    // 5. รัฐธรรมนูญแห่งราชอาณาจักรไทย 2492
-    // ---------------------------------------------------------
-    "con2492": [
-        0,
-        0,
-        0,
-        0,
-        0,
-        2,
-        9,
-        14,
-        16,
-        20,
-        21,
-        23,
-        25,
-        28,
-        30,
-        31,
-        33,
-        34,
-        35,
-        37,
-        40,
-        42,
-        47,
-        54,
-        60,
-        63,
-        68,
-        72,
-        75,
-        77,
-        80,
-        80,
-        81,
-        82,
-        84,
-        86,
-        89,
-        91,
-        92,
-        96,
-        99,
-        100,
-        103,
-        105,
-        109,
-        112,
-        116,
-        118,
-        121,
-        122,
-        123,
-        123,
-        124,
-        127,
-        130,
-        131,
-        133,
-        135,
-        137,
-        139,
-        142,
-        145,
-        147,
-        149,
-        150,
-        152,
-        156,
-        161,
-        167,
-        169,
-        171,
-        173,
-        173,
-        174,
-        177,
-        179,
-        182,
-        185,
-        187,
-        188
-    ],
-
-    // ---------------------------------------------------------
-    // 6. รัฐธรรมนูญแห่งราชอาณาจักรไทย 2475 แก้ไขเพิ่มเติม 2495
-    // ---------------------------------------------------------
-    "con2495": [
-        0,  // Page 1
-        0,  // Page 2
-        0,  // Page 3
-        0,  // Page 4
-        10, // Page 5: 1, 2, 4, 10
-        14, // Page 6: 11-14
-        18, // Page 7: 15-18
-        19, // Page 8: 19
-        23, // Page 9: 20-23
-        23, // Page 10 (Gap)
-        26, // Page 11: 25-26
-        30, // Page 12: 27-30
-        34, // Page 13: 31-34
-        37, // Page 14: 35-37
-        42, // Page 15: 38-42
-        44, // Page 16: 43-44
-        47, // Page 17: 47
-        62, // Page 18: 50, 62
-        64, // Page 19: 63-64
-        70, // Page 20: 67, 69, 70
-        73, // Page 21: 72-73
-        75, // Page 22: 75
-        76, // Page 23: 76
-        81, // Page 24: 81
-        87, // Page 25: 85-87
-        88, // Page 26: 88
-        90, // Page 27: 89-90
-        94, // Page 28: 91-94
-        98, // Page 29: 97-98
-        105, // Page 30: 101-105
-        108, // Page 31: 106-108
-        110, // Page 32: 109, 110
-        111, // Page 33: 111
-        111, // Page 34 (Gap)
-        114, // Page 35: 112-114
-        115, // Page 36: 115
-        116, // Page 37: 116
-        119, // Page 38: 117-119
-        123, // Page 39: 120-123
-        123  // Page 40 (Padding)
-    ],
-
-    // ---------------------------------------------------------
-    // 7. ธรรมนูญการปกครองราชอาณาจักร 2502
-    // ---------------------------------------------------------
-    "con2502temp": [
-        0,
-        0,
-        6,
-        10,
-        12,
-        17,
-        20,
-    ],
-
-    // ---------------------------------------------------------
-    // 8. รัฐธรรมนูญแห่งราชอาณาจักรไทย 2511
-    // ---------------------------------------------------------
-    "con2511": [
-        0,
-        0,
-        0,
-        0,
-        0,
-        0,
-        0,
-        5,
-        13,
-        16,
-        20,
-        21,
-        23,
-        25,
-        28,
-        29,
-        31,
-        33,
-        36,
-        39,
-        44,
-        52,
-        58,
-        64,
-        70,
-        74,
-        77,
-        78,
-        80,
-        83,
-        85,
-        88,
-        89,
-        95,
-        96,
-        100,
-        104,
-        107,
-        110,
-        114,
-        116,
-        117,
-        119,
-        120,
-        120,
-        121,
-        125,
-        127,
-        129,
-        132,
-        134,
-        137,
-        140,
-        144,
-        146,
-        149,
-        154,
-        159,
-        163,
-        166,
-        167,
-        169,
-        172,
-        175,
-        177,
-        181,
-        183
-    ],
-
-    // ---------------------------------------------------------
-    // 9. ธรรมนูญการปกครองราชอาณาจักร 2515
-    // ---------------------------------------------------------
-    "con2515temp": [
-        0,
-        1,
-        6,
-        8,
-        9,
-        10,
-        13,
-        14,
-        15,
-        17,
-        21,
-        23
-    ],
-
-    // ---------------------------------------------------------
-    // 10. รัฐธรรมนูญแห่งราชอาณาจักรไทย 2517
-    // ---------------------------------------------------------
-    "con2517": [
-        0,
-        0,
-        0,
-        0,
-        0,
-        3,
-        12,
-        17,
-        22,
-        23,
-        26,
-        26,
-        30,
-        32,
-        33,
-        36,
-        39,
-        40,
-        40,
-        44,
-        46,
-        48,
-        53,
-        61,
-        67,
-        72,
-        78,
-        85,
-        89,
-        94,
-        97,
-        100,
-        103,
-        105,
-        106,
-        109,
-        111,
-        113,
-        116,
-        118,
-        121,
-        124,
-        124,
-        126,
-        128,
-        131,
-        135,
-        138,
-        140,
-        143,
-        146,
-        148,
-        148,
-        149,
-        150,
-        151,
-        154,
-        155,
-        158,
-        159,
-        161,
-        164,
-        165,
-        166,
-        169,
-        172,
-        174,
-        177,
-        181,
-        185,
-        188,
-        190,
-        190,
-        193,
-        195,
-        201,
-        207,
-        210,
-        213,
-        217,
-        218,
-        222,
-        224,
-        225,
-        228,
-        229,
-        230,
-        234,
-        236,
-        238
-    ],
-
-    // ---------------------------------------------------------
-    // 11. ธรรมนูญการปกครองราชอาณาจักร 2519
-    // ---------------------------------------------------------
-    "con2519temp": [
-        0,
-        0,
-        0,
-        1,
-        6,
-        10,
-        13,
-        15,
-        18,
-        19,
-        21,
-        24,
-        24,
-        27,
-        29
-    ],
-
-    // ---------------------------------------------------------
-    // 12. ธรรมนูญการปกครองราชอาณาจักร 2520
-    // ---------------------------------------------------------
-    "con2520temp": [
-        0,
-        1,
-        6,
-        8,
-        10,
-        12,
-        14,
-        17,
-        19,
-        22,
-        26,
-        27,
-        30,
-        32,
-    ],
-
-    // ---------------------------------------------------------
-    // 13. รัฐธรรมนูญแห่งราชอาณาจักรไทย 2521
-    // ---------------------------------------------------------
-    "con2521": [
-        0,
-        0,
-        0,
-        5,
-        11,
-        16,
-        19,
-        21,
-        25,
-        29,
-        33,
-        34,
-        37,
-        40,
-        50,
-        57,
-        62,
-        68,
-        73,
-        77,
-        81,
-        83,
-        85,
-        88,
-        90,
-        91,
-        95,
-        97,
-        98,
-        103,
-        103,
-        105,
-        108,
-        112,
-        115,
-        119,
-        123,
-        125,
-        127,
-        128,
-        129,
-        132,
-        133,
-        137,
-        139,
-        142,
-        143,
-        147,
-        153,
-        155,
-        157,
-        160,
-        166,
-        173,
-        178,
-        182,
-        186,
-        189,
-        191,
-        194,
-        195,
-        199,
-        200,
-        202,
-        204,
-        206
-    ],
-
-    // ---------------------------------------------------------
-    // 14. ธรรมนูญการปกครองราชอาณาจักร 2534
-    // ---------------------------------------------------------
-    "con2534temp": [
-        0,
-        2,
-        3,
-        7,
-        10,
-        12,
-        13,
-        16,
-        18,
-        20,
-        24,
-        27,
-        29,
-        32,
-        33
-    ],
-
-    // ---------------------------------------------------------
-    // 15. รัฐธรรมนูญแห่งราชอาณาจักรไทย 2534
-    // ---------------------------------------------------------
-    "con2534": [
-        0,
-        0,
-        0,
-        0,
-        7,
-        13,
-        17,
-        19,
-        21,
-        22,
-        25,
-        31,
-        35,
-        36,
-        39,
-        42,
-        47,
-        51,
-        61,
-        66,
-        70,
-        76,
-        83,
-        86,
-        89,
-        92,
-        94,
-        95,
-        97,
-        99,
-        101,
-        103,
-        105,
-        106,
-        107,
-        108,
-        111,
-        114,
-        114,
-        116,
-        118,
-        120,
-        125,
-        127,
-        131,
-        134,
-        137,
-        138,
-        140,
-        141,
-        142,
-        143,
-        145,
-        147,
-        150,
-        152,
-        154,
-        155,
-        158,
-        161,
-        165,
-        169,
-        172,
-        172,
-        173,
-        176,
-        181,
-        187,
-        193,
-        198,
-        201,
-        205,
-        205,
-        210,
-        211,
-        212,
-        216,
-        219,
-        222,
-        223
-    ],
-
-    // ---------------------------------------------------------
-    // 16. รัฐธรรมนูญแห่งราชอาณาจักรไทย 2540
-    // ---------------------------------------------------------
-    "con2540": [
-        0,
-        7,
-        15,
-        21,
-        24,
-        29,
-        34,
-        39,
-        42,
-        47,
-        50,
-        56,
-        62,
-        68,
-        75,
-        81,
-        89,
-        94,
-        98,
-        101,
-        103,
-        106,
-        109,
-        110,
-        116,
-        118,
-        120,
-        125,
-        129,
-        134,
-        137,
-        138,
-        142,
-        145,
-        147,
-        152,
-        157,
-        160,
-        166,
-        168,
-        173,
-        175,
-        176,
-        178,
-        180,
-        185,
-        188,
-        191,
-        192,
-        197,
-        200,
-        202,
-        208,
-        214,
-        214,
-        218,
-        220,
-        229,
-        233,
-        239,
-        245,
-        249,
-        255,
-        257,
-        258,
-        261,
-        262,
-        264,
-        269,
-        274,
-        277,
-        281,
-        284,
-        286,
-        290,
-        292,
-        295,
-        298,
-        301,
-        303,
-        305,
-        308,
-        311,
-        313,
-        314,
-        315,
-        316,
-        318,
-        321,
-        323,
-        324,
-        326,
-        327,
-        329,
-        331,
-        332,
-        334,
-        335,
-        336
-    ],
-
-    // ---------------------------------------------------------
-    // 17. รัฐธรรมนูญแห่งราชอาณาจักรไทย (ฉบับชั่วคราว) 2549
-    // ---------------------------------------------------------
-    "con2549temp": [
-        0,
-        3,
-        7,
-        10,
-        13,
-        16,
-        20,
-        23,
-        26,
-        29,
-        32,
-        35,
-        37,
-        39,
-    ],
-
-    // ---------------------------------------------------------
-    // 18. รัฐธรรมนูญแห่งราชอาณาจักรไทย 2550
-    // ---------------------------------------------------------
-    "con2550": [
-        0,
-        3,
-        13,
-        19,
-        22,
-        24,
-        28,
-        32,
-        35,
-        39,
-        41,
-        43,
-        46,
-        48,
-        52,
-        57,
-        62,
-        66,
-        68,
-        74,
-        77,
-        78,
-        80,
-        81,
-        84,
-        84,
-        86,
-        87,
-        91,
-        93,
-        94,
-        95,
-        98,
-        100,
-        102,
-        106,
-        107,
-        110,
-        111,
-        114,
-        115,
-        119,
-        122,
-        125,
-        127,
-        130,
-        131,
-        135,
-        136,
-        138,
-        140,
-        142,
-        144,
-        146,
-        148,
-        151,
-        154,
-        156,
-        158,
-        162,
-        165,
-        167,
-        168,
-        169,
-        171,
-        175,
-        181,
-        184,
-        185,
-        189,
-        192,
-        197,
-        201,
-        204,
-        205,
-        207,
-        209,
-        211,
-        216,
-        219,
-        221,
-        223,
-        227,
-        230,
-        231,
-        233,
-        236,
-        236,
-        237,
-        240,
-        242,
-        244,
-        246,
-        248,
-        250,
-        251,
-        252,
-        254,
-        256,
-        257,
-        259,
-        261,
-        264,
-        265,
-        269,
-        271,
-        272,
-        274,
-        276,
-        278,
-        280,
-        282,
-        283,
-        285,
-        288,
-        290,
-        291,
-        292,
-        296,
-        299,
-        300,
-        302,
-        303,
-        303,
-        305,
-        308,
-        309
-    ],
-
-    // ---------------------------------------------------------
-    // 19. รัฐธรรมนูญแห่งราชอาณาจักรไทย (ฉบับชั่วคราว) 2557
-    // ---------------------------------------------------------
-    "con2557temp": [
-        0,
-        2,
-        8,
-        12,
-        15,
-        18,
-        20,
-        24,
-        28,
-        31,
-        33,
-        35,
-        37,
-        41,
-        44,
-        47,
-        48
-    ],
-
-    // ---------------------------------------------------------
-    // 20. รัฐธรรมนูญแห่งราชอาณาจักรไทย 2560
-    // ---------------------------------------------------------
-    "con2560": [
-        0,
-        0,
-        0,
-        0,
-        0,
-        0,
-        3,
-        11,
-        18,
-        21,
-        25,
-        28,
-        35,
-        37,
-        42,
-        47,
-        50,
-        54,
-        58,
-        62,
-        68,
-        72,
-        76,
-        80,
-        82,
-        85,
-        89,
-        91,
-        95,
-        98,
-        101,
-        103,
-        106,
-        108,
-        111,
-        117,
-        121,
-        124,
-        127,
-        129,
-        132,
-        134,
-        137,
-        139,
-        143,
-        144,
-        148,
-        151,
-        156,
-        160,
-        164,
-        168,
-        172,
-        174,
-        179,
-        184,
-        187,
-        191,
-        195,
-        198,
-        200,
-        202,
-        206,
-        210,
-        214,
-        217,
-        222,
-        224,
-        227,
-        230,
-        232,
-        234,
-        235,
-        238,
-        242,
-        246,
-        248,
-        250,
-        255,
-        256,
-        257,
-        257,
-        257,
-        259,
-        263,
-        264,
-        266,
-        267,
-        269,
-        269,
-        271,
-        273,
-        278,
-        279,
-    ],
-};
-
-// Default Page Count for each PDF
-export const PDF_TOTAL_PAGES: Record<string, number> = {
-    "con2475temp": 14,
-    "con2475": 23,
-    "con2489": 51,
-    "con2490temp": 32,
-    "con2492": 80,
-    "con2495": 40,
-    "con2502temp": 8,
-    "con2511": 68,
-    "con2515temp": 12,
-    "con2517": 90,
-    "con2519temp": 15,
-    "con2520temp": 14,
-    "con2521": 66,
-    "con2534temp": 14,
-    "con2534": 80,
-    "con2540": 99,
-    "con2549temp": 14,
-    "con2550": 127,
-    "con2557temp": 17,
-    "con2560": 99,
-};
@@ -1,6 +1,5 @@
 
 import { CATEGORY_COLORS } from '@/utils/categoryColors';
-import { PDF_PAGE_MAPPING, PDF_TOTAL_PAGES } from '@/mapping/pdfPageMapping';
 
 // --- Type Definitions ---
 export interface CategoryOverview {
@@ -50,6 +49,14 @@ export interface RichCategory {
     sections: RichSection[];
 }
 
+// ตาราง section -> หน้า PDF ที่ Stage 1 สร้าง (backend/json_output/pages/<id>.json, ดู backend/page_index.py)
+export interface PageIndex {
+    const_id: string;
+    page_count: number;
+    sections: Record<string, number>;
+    ranges: Record<string, [number, number]>;
+}
+
 export interface PageRatio {
     categoryId: string;
     pageRatio: number;
@@ -100,26 +107,15 @@ export const CONSTITUTIONS: Constitution[] = [
 ];
 
 // Helper: แปลง Rich JSON เป็น Flat List
-const transformRichData = (richData: RichCategory[], id: string, name: string) => {
+const transformRichData = (richData: RichCategory[], id: string, name: string, pageIndex: PageIndex | null) => {
     const flatSections: SectionContent[] = [];
-    const pageMapping: number[] = PDF_PAGE_MAPPING[id] || [];
+    const sectionPages = pageIndex?.sections ?? {};
 
     if (Array.isArray(richData)) {
         richData.forEach((cat: RichCategory) => {
             if (cat.sections) {
                 cat.sections.forEach((sec: RichSection) => {
-                    const numericPart = sec.id.match(/\d+/);
-                    const secId = numericPart ? parseInt(numericPart[0]) : 0;
-
-                    let pageNum = 1;
-                    if (secId > 0 && pageMapping.length > 0) {
-                        const foundIndex = pageMapping.findIndex(lastSec => secId <= lastSec);
-                        if (foundIndex !== -1) {
-                            pageNum = foundIndex + 1;
-                        } else {
-                            pageNum = pageMapping.length + 1;
-                        }
-                    }
+                    const pageNum = sectionPages[sec.id] ?? 1;
 
                     flatSections.push({
                         id: sec.id,
@@ -147,6 +143,38 @@ const transformRichData = (richData: RichCategory[], id: string, name: string) =
     };
 };
 
+// Helper: โหลดตารางหน้า PDF ของฉบับ (null = ยังไม่มี -> ทุกมาตราอยู่หน้า 1)
+const loadPageIndex = async (id: string): Promise<PageIndex | null> => {
+    try {
+        switch (id) {
+            case 'con2475temp': return (await import('@/backend/json_output/pages/con2475temp.json')).default as PageIndex;
+            case 'con2475': return (await import('@/backend/json_output/pages/con2475.json')).default as PageIndex;
+            case 'con2489': return (await import('@/backend/json_output/pages/con2489.json')).default as PageIndex;
+            case 'con2490temp': return (await import('@/backend/json_output/pages/con2490temp.json')).default as PageIndex;
+            case 'con2492': return (await import('@/backend/json_output/pages/con2492.json')).default as PageIndex;
+            case 'con2495': return (await import('@/backend/json_output/pages/con2495.json')).default as PageIndex;
+            case 'con2502temp': return (await import('@/backend/json_output/pages/con2502temp.json')).default as PageIndex;
+            case 'con2511': return (await import('@/backend/json_output/pages/con2511.json')).default as PageIndex;
+            case 'con2515temp': return (await import('@/backend/json_output/pages/con2515temp.json')).default as PageIndex;
+            case 'con2517': return (await import('@/backend/json_output/pages/con2517.json')).default as PageIndex;
+            case 'con2519temp': return (await import('@/backend/json_output/pages/con2519temp.json')).default as PageIndex;
+            case 'con2520temp': return (await import('@/backend/json_output/pages/con2520temp.json')).default as PageIndex;
+            case 'con2521': return (await import('@/backend/json_output/pages/con2521.json')).default as PageIndex;
+            case 'con2534': return (await import('@/backend/json_output/pages/con2534.json')).default as PageIndex;
+            case 'con2534temp': return (await import('@/backend/json_output/pages/con2534temp.json')).default as PageIndex;
+            case 'con2540': return (await import('@/backend/json_output/pages/con2540.json')).default as PageIndex;
+            case 'con2549temp': return (await import('@/backend/json_output/pages/con2549temp.json')).default as PageIndex;
+            case 'con2550': return (await import('@/backend/json_output/pages/con2550.json')).default as PageIndex;
+            case 'con2557temp': return (await import('@/backend/json_output/pages/con2557temp.json')).default as PageIndex;
+            case 'con2560': return (await import('@/backend/json_output/pages/con2560.json')).default as PageIndex;
+            default: return null;
+        }
+    } catch (e) {
+        console.error(`Error loading page index for ${id}:`, e);
+        return null;
+    }
+};
+
 // Return type with meta and content separated, to allow easier partial loading if needed
 export interface ConstitutionData {
     meta: ConstitutionMeta;
@@ -192,7 +220,8 @@ export const fetchConstitutionData = async (id: string): Promise<ConstitutionDat
         richData = [];
     }
 
-    const content = transformRichData(richData, id, name);
+    const pageIndex = await loadPageIndex(id);
+    const content = transformRichData(richData, id, name, pageIndex);
 
     // 3. เตรียม Categories สำหรับ DNA Bar
     let categories: CategoryOverview[] = [];
@@ -205,7 +234,7 @@ export const fetchConstitutionData = async (id: string): Promise<ConstitutionDat
     }
 
     // 4. คำนวณ Page Ratio (DNA Bar)
-    const totalPages = PDF_TOTAL_PAGES[id] || 10;
+    const totalPages = pageIndex?.page_count || 10;
 
     // Calculate total character count
     let totalLength = 0;